@@ -1,60 +1,55 @@
+import math
+import os
 import streamlit as st
-import uuid
 from datetime import datetime
 import pandas as pd
-import googleapiclient.discovery
+
+import banco
+import cliente_youtube
+import coletor
+import rastreador
+import resolvedor
 
 st.set_page_config(page_title="YouTube Automation MVP – Monitor", layout="wide")
 st.title("📺 Monitor de Produção de Vídeos (Pipeline YouTube)")
 
 # -------------------------------------------------------------------
-# DB em sessão
+# Banco compartilhado (SQLite) – só a seleção atual fica na sessão
 # -------------------------------------------------------------------
-def criar_db_vazio():
-    return {"canais": {}}
-
-if "db" not in st.session_state:
-    st.session_state.db = criar_db_vazio()
-db = st.session_state.db
-
 if "canal_atual_id" not in st.session_state:
     st.session_state.canal_atual_id = None
 if "video_atual_id" not in st.session_state:
     st.session_state.video_atual_id = None
 
+# Coletor de arquivos órfãos / cota de disco (uma thread por processo)
+coletor.iniciar_em_segundo_plano()
+
 # -------------------------------------------------------------------
 # YouTube API (para importar canal pelo link)
 # -------------------------------------------------------------------
+def chave_youtube() -> str | None:
+    chave = cliente_youtube.chave(st.secrets)
+    if not chave and not cliente_youtube.em_replay():
+        st.error("YOUTUBE_API_KEY não encontrado em st.secrets ou variáveis de ambiente.")
+        st.stop()
+    return chave
+
 @st.cache_resource
 def get_youtube_service():
-    return googleapiclient.discovery.build(
-        "youtube", "v3", developerKey=st.secrets["YOUTUBE_API_KEY"]
-    )
-
-youtube = get_youtube_service()
-
-def gerar_id():
-    return str(uuid.uuid4())[:8]
+    # Só na primeira importação por link: abrir o monitor não carrega o googleapiclient
+    return cliente_youtube.criar_cliente(chave_youtube())
 
 def obter_canal(canal_id):
-    return db["canais"].get(canal_id)
+    return banco.obter_canal(canal_id)
 
 def obter_video(canal_id, video_id):
-    canal = obter_canal(canal_id)
-    if not canal:
+    video = banco.obter_video(video_id)
+    if not video or video["canal_id"] != canal_id:
         return None
-    return canal["videos"].get(video_id)
+    return video
 
 def etapa_atual(status_dict):
-    ordem = [
-        "0_canal",
-        "1_roteiro",
-        "2_thumbnail",
-        "3_audio",
-        "4_video",
-        "5_publicacao",
-        "6_dashboard",
-    ]
+    ordem = banco.ETAPAS
     ultima = -1
     for i, k in enumerate(ordem):
         if status_dict.get(k):
@@ -76,59 +71,62 @@ def nome_etapa(idx):
         return nomes[idx]
     return "Não iniciado"
 
+# Vídeos são lidos página a página (nunca o canal inteiro a cada rerun)
+TAMANHO_PAGINA = 50
+
+def pagina_de_videos(canal_id, busca="", pagina=1, incluir_atual=False):
+    """Uma página de vídeos do canal; com `incluir_atual`, o vídeo em foco
+    entra no início da lista mesmo estando fora da página/busca."""
+    vids = banco.listar_videos(
+        canal_id,
+        limite=TAMANHO_PAGINA,
+        offset=(pagina - 1) * TAMANHO_PAGINA,
+        busca=busca,
+    )
+    atual = st.session_state.video_atual_id
+    if incluir_atual and atual and all(v["video_id"] != atual for v in vids):
+        v_atual = banco.obter_video(atual, com_artefatos=False)
+        if v_atual and v_atual["canal_id"] == canal_id:
+            vids = [v_atual] + vids
+    return vids
+
+def formatar_duracao(segundos):
+    minutos = int(segundos // 60)
+    if minutos < 60:
+        return f"{minutos} min"
+    horas, minutos = divmod(minutos, 60)
+    if horas < 24:
+        return f"{horas}h{minutos:02d}"
+    dias, horas = divmod(horas, 24)
+    return f"{dias}d {horas}h"
+
 # -------------------------------------------------------------------
 # Função auxiliar: importar dados de canal pelo link do YouTube
 # -------------------------------------------------------------------
-from urllib.parse import urlparse
-
-def extrair_channel_id(url: str):
-    url = url.strip()
-    if not url:
-        return None
-    parsed = urlparse(url)
-    path = parsed.path.strip("/")
-
-    if path.startswith("channel/"):
-        return path.split("/")[1]
-
-    if path.startswith("@"):
-        handle = path[1:]
-        try:
-            ch_req = youtube.channels().list(part="id", forHandle=handle)
-            ch_res = ch_req.execute()
-            items = ch_res.get("items", [])
-            if items:
-                return items[0]["id"]
-        except Exception:
-            return None
-
-    return None
-
 def importar_canal_por_link(link: str):
-    """Retorna dict básico de canal (nome, idioma pt-BR default) ou None."""
-    ch_id = extrair_channel_id(link)
-    if not ch_id:
-        return None
-
-    try:
-        ch_req = youtube.channels().list(part="snippet", id=ch_id)
-        ch_res = ch_req.execute()
-        items = ch_res.get("items", [])
-        if not items:
+    """
+    Retorna dict básico de canal (nome, idioma pt-BR default) ou None se o
+    canal não existir. Falhas da API levantam `rastreador.ErroYoutube`.
+    """
+    youtube = get_youtube_service()
+    with rastreador.contexto("Monitor", "importar canal"):
+        ch_id = resolvedor.resolver(youtube, link)
+        if not ch_id:
             return None
-        sn = items[0]["snippet"]
-        nome = sn.get("title", "")
-        return {
-            "nome": nome,
-            "link_youtube": link.strip(),
-            "nicho": "",
-            "persona": "",
-            "idioma": "pt-BR",
-            "criado_em": datetime.now().isoformat(),
-            "videos": {},
-        }
-    except Exception:
+        # Mesma requisição da análise do Laboratório: sai do cache em disco
+        info = rastreador.obter_canal(youtube, ch_id)
+    if not info:
         return None
+    sn = info["snippet"]
+    nome = sn.get("title", "")
+    return {
+        "nome": nome,
+        "link_youtube": link.strip(),
+        "nicho": "",
+        "persona": "",
+        "idioma": "pt-BR",
+        "criado_em": datetime.now().isoformat(),
+    }
 
 # -------------------------------------------------------------------
 # SIDEBAR – apenas seleção rápida de canal e vídeo
@@ -136,9 +134,10 @@ def importar_canal_por_link(link: str):
 with st.sidebar:
     st.header("📡 Seleção rápida")
 
-    canais_ids = list(db["canais"].keys())
+    canais = banco.listar_canais()
+    canais_ids = [c["canal_id"] for c in canais]
     if canais_ids:
-        canais_nomes = [db["canais"][cid]["nome"] for cid in canais_ids]
+        canais_nomes = [c["nome"] for c in canais]
         idx_canal = st.selectbox(
             "Canal atual",
             options=range(len(canais_ids)),
@@ -153,57 +152,57 @@ with st.sidebar:
         canal_atual_id = None
         st.info("Nenhum canal cadastrado ainda.")
 
-    # Seleção de vídeo atual
+    # Seleção de vídeo atual (busca pelo índice de títulos + 1ª página)
     video_atual_id = None
+    total_videos = banco.kpis(canal_atual_id)["total"] if canal_atual_id else 0
     if canal_atual_id:
-        canal = db["canais"][canal_atual_id]
-        vids = canal["videos"]
-        if vids:
-            vids_ids = list(vids.keys())
-            vids_tit = [vids[v]["titulo"] for v in vids_ids]
-            idx_vid = st.selectbox(
-                "Vídeo atual",
-                options=range(len(vids_ids)),
-                format_func=lambda i: vids_tit[i],
-                index=0
-                if st.session_state.video_atual_id not in vids_ids
-                else vids_ids.index(st.session_state.video_atual_id),
+        if total_videos:
+            busca_sidebar = st.text_input(
+                "Buscar vídeo",
+                placeholder="Trecho do título",
+                key="busca_video_sidebar",
             )
-            video_atual_id = vids_ids[idx_vid]
-            st.session_state.video_atual_id = video_atual_id
+            vids_sidebar = pagina_de_videos(
+                canal_atual_id, busca_sidebar, incluir_atual=True
+            )
+            if vids_sidebar:
+                vids_ids = [v["video_id"] for v in vids_sidebar]
+                vids_tit = [v["titulo"] for v in vids_sidebar]
+                idx_vid = st.selectbox(
+                    "Vídeo atual",
+                    options=range(len(vids_ids)),
+                    format_func=lambda i: vids_tit[i],
+                    index=0
+                    if st.session_state.video_atual_id not in vids_ids
+                    else vids_ids.index(st.session_state.video_atual_id),
+                )
+                video_atual_id = vids_ids[idx_vid]
+                st.session_state.video_atual_id = video_atual_id
+                if total_videos > TAMANHO_PAGINA:
+                    st.caption(
+                        f"Mostrando até {TAMANHO_PAGINA} de {total_videos} vídeos. "
+                        "Use a busca para achar os demais."
+                    )
+            else:
+                st.caption("Nenhum vídeo encontrado para essa busca.")
         else:
             st.caption("Nenhum vídeo para este canal ainda.")
 
     # Botão simples de novo vídeo
     if canal_atual_id:
         if st.button("➕ Novo vídeo (rápido)"):
-            vid_id = gerar_id()
-            canal = db["canais"][canal_atual_id]
-            canal["videos"][vid_id] = {
-                "titulo": f"Novo vídeo {len(canal['videos']) + 1}",
-                "descricao": "",
-                "status": {
-                    "0_canal": True,
-                    "1_roteiro": False,
-                    "2_thumbnail": False,
-                    "3_audio": False,
-                    "4_video": False,
-                    "5_publicacao": False,
-                    "6_dashboard": False,
-                },
-                "artefatos": {
-                    "roteiro": None,
-                    "thumbs": None,
-                    "audio_path": None,
-                    "video_path": None,
-                    "youtube_url": None,
-                },
-                "criado_em": datetime.now().isoformat(),
-                "ultima_atualizacao": datetime.now().isoformat(),
-            }
+            vid_id = banco.criar_video(
+                canal_atual_id, f"Novo vídeo {total_videos + 1}"
+            )
             st.session_state.video_atual_id = vid_id
             st.rerun()
 
+    quota = rastreador.LIMITADOR.situacao()
+    st.caption(
+        f"YouTube API hoje: {quota['usada']}/{quota['limite']} unidades"
+        + (" – quota esgotada" if quota["esgotada"] else "")
+    )
+
 # -------------------------------------------------------------------
 # Corpo – se não há canal, mostrar chamada
 # -------------------------------------------------------------------
@@ -225,7 +224,7 @@ if canal:
     with col_c2:
         st.metric("Idioma", canal.get("idioma", "-"))
     with col_c3:
-        st.metric("Vídeos cadastrados", len(canal["videos"]))
+        st.metric("Vídeos cadastrados", total_videos)
     with col_c4:
         st.metric("Criado em", canal.get("criado_em", "")[:10])
 
@@ -247,12 +246,11 @@ else:
         "persona": "",
         "idioma": "pt-BR",
         "criado_em": datetime.now().isoformat(),
-        "videos": {},
     }
 
 with st.expander(
     "Criar novo canal ou editar canal atual",
-    expanded=not bool(db["canais"]),
+    expanded=not bool(canais),
 ):
     col_f1, col_f2 = st.columns(2)
 
@@ -295,14 +293,15 @@ with st.expander(
             elif not nome_canal.strip():
                 st.warning("Informe um nome para o canal.")
             else:
-                db["canais"][canal_atual_id].update(
+                banco.atualizar_canal(
+                    canal_atual_id,
                     {
                         "nome": nome_canal.strip(),
                         "link_youtube": link_canal.strip(),
                         "nicho": nicho_canal.strip(),
                         "persona": persona.strip(),
                         "idioma": idioma,
-                    }
+                    },
                 )
                 st.success("Canal atualizado.")
                 st.rerun()
@@ -313,16 +312,16 @@ with st.expander(
             if not nome_canal.strip():
                 st.warning("Informe um nome para o novo canal.")
             else:
-                new_id = gerar_id()
-                db["canais"][new_id] = {
-                    "nome": nome_canal.strip(),
-                    "link_youtube": link_canal.strip(),
-                    "nicho": nicho_canal.strip(),
-                    "persona": persona.strip(),
-                    "idioma": idioma,
-                    "criado_em": datetime.now().isoformat(),
-                    "videos": {},
-                }
+                new_id = banco.criar_canal(
+                    {
+                        "nome": nome_canal.strip(),
+                        "link_youtube": link_canal.strip(),
+                        "nicho": nicho_canal.strip(),
+                        "persona": persona.strip(),
+                        "idioma": idioma,
+                        "criado_em": datetime.now().isoformat(),
+                    }
+                )
                 st.session_state.canal_atual_id = new_id
                 st.success("Novo canal criado.")
                 st.rerun()
@@ -333,15 +332,20 @@ with st.expander(
             if not link_canal.strip():
                 st.warning("Cole o link do canal do YouTube.")
             else:
-                canal_importado = importar_canal_por_link(link_canal)
-                if not canal_importado:
-                    st.error("Não foi possível importar esse canal. Verifique o link.")
+                try:
+                    canal_importado = importar_canal_por_link(link_canal)
+                except rastreador.QuotaEsgotada as e:
+                    st.error(f"Quota da YouTube API esgotada: {e}")
+                except rastreador.ErroYoutube as e:
+                    st.error(f"A YouTube API falhou ao importar o canal: {e}")
                 else:
-                    new_id = gerar_id()
-                    db["canais"][new_id] = canal_importado
-                    st.session_state.canal_atual_id = new_id
-                    st.success(f"Canal importado: {canal_importado['nome']}")
-                    st.rerun()
+                    if not canal_importado:
+                        st.error("Canal não encontrado. Verifique o link.")
+                    else:
+                        new_id = banco.criar_canal(canal_importado)
+                        st.session_state.canal_atual_id = new_id
+                        st.success(f"Canal importado: {canal_importado['nome']}")
+                        st.rerun()
 
 st.markdown("---")
 
@@ -359,45 +363,79 @@ canal = obter_canal(canal_id)
 # -------------------------------------------------------------------
 st.header("🎞️ Vídeos deste canal")
 
-videos_dict = canal["videos"]
-if not videos_dict:
+if canal_id != canal_atual_id:
+    total_videos = banco.kpis(canal_id)["total"]
+if not total_videos:
     st.info("Nenhum vídeo cadastrado ainda para este canal.")
 else:
+    col_bs1, col_bs2 = st.columns([3, 1])
+    with col_bs1:
+        busca_tabela = st.text_input(
+            "Filtrar vídeos pelo título",
+            placeholder="Trecho do título",
+            key="busca_video_tabela",
+        )
+    total_filtrado = (
+        banco.contar_videos(canal_id, busca=busca_tabela)
+        if busca_tabela
+        else total_videos
+    )
+    n_paginas = max(1, math.ceil(total_filtrado / TAMANHO_PAGINA))
+    with col_bs2:
+        pagina = st.number_input(
+            f"Página (de {n_paginas})",
+            min_value=1,
+            max_value=n_paginas,
+            value=1,
+            step=1,
+        )
+
     rows = []
-    for vid, data in videos_dict.items():
+    for data in pagina_de_videos(canal_id, busca_tabela, int(pagina)):
         idx, done = etapa_atual(data["status"])
         rows.append(
             {
-                "video_id": vid,
+                "video_id": data["video_id"],
                 "Título": data["titulo"],
                 "Etapa atual": nome_etapa(idx) if idx >= 0 else "Não iniciado",
                 "Concluído": "✅" if done else "⏳",
                 "Criado em": data.get("criado_em", "")[:16],
             }
         )
-    df_list = pd.DataFrame(rows)
 
     col_ls1, col_ls2 = st.columns([2, 1])
     with col_ls1:
-        st.dataframe(
-            df_list[["Título", "Etapa atual", "Concluído", "Criado em"]],
-            use_container_width=True,
-            height=260,
-        )
+        if rows:
+            df_list = pd.DataFrame(rows)
+            st.dataframe(
+                df_list[["Título", "Etapa atual", "Concluído", "Criado em"]],
+                use_container_width=True,
+                height=260,
+            )
+            st.caption(f"{total_filtrado} vídeo(s) · página {int(pagina)} de {n_paginas}")
+        else:
+            st.info("Nenhum vídeo encontrado para esse filtro.")
 
     with col_ls2:
         vids_ids = [r["video_id"] for r in rows]
         vids_titulos = [r["Título"] for r in rows]
-        idx_video_sel = st.selectbox(
-            "Vídeo em foco",
-            options=range(len(vids_ids)),
-            format_func=lambda i: vids_titulos[i],
-            index=0
-            if st.session_state.video_atual_id not in vids_ids
-            else vids_ids.index(st.session_state.video_atual_id),
-        )
-        video_atual_id = vids_ids[idx_video_sel]
-        st.session_state.video_atual_id = video_atual_id
+        atual = st.session_state.video_atual_id
+        if atual and atual not in vids_ids:
+            v_atual = banco.obter_video(atual, com_artefatos=False)
+            if v_atual and v_atual["canal_id"] == canal_id:
+                vids_ids.insert(0, atual)
+                vids_titulos.insert(0, v_atual["titulo"])
+        if vids_ids:
+            idx_video_sel = st.selectbox(
+                "Vídeo em foco",
+                options=range(len(vids_ids)),
+                format_func=lambda i: vids_titulos[i],
+                index=0
+                if st.session_state.video_atual_id not in vids_ids
+                else vids_ids.index(st.session_state.video_atual_id),
+            )
+            video_atual_id = vids_ids[idx_video_sel]
+            st.session_state.video_atual_id = video_atual_id
 
 # Expander para criação detalhada de novo vídeo
 with st.expander("➕ Criar novo vídeo para este canal"):
@@ -415,30 +453,12 @@ with st.expander("➕ Criar novo vídeo para este canal"):
         if not novo_titulo_video.strip():
             st.warning("Informe um título para o vídeo.")
         else:
-            vid_id = gerar_id()
-            canal["videos"][vid_id] = {
-                "titulo": novo_titulo_video.strip(),
-                "descricao": descricao_rapida.strip(),
-                "tipo": tipo_video,
-                "status": {
-                    "0_canal": True,
-                    "1_roteiro": False,
-                    "2_thumbnail": False,
-                    "3_audio": False,
-                    "4_video": False,
-                    "5_publicacao": False,
-                    "6_dashboard": False,
-                },
-                "artefatos": {
-                    "roteiro": None,
-                    "thumbs": None,
-                    "audio_path": None,
-                    "video_path": None,
-                    "youtube_url": None,
-                },
-                "criado_em": datetime.now().isoformat(),
-                "ultima_atualizacao": datetime.now().isoformat(),
-            }
+            vid_id = banco.criar_video(
+                canal_id,
+                novo_titulo_video.strip(),
+                descricao=descricao_rapida.strip(),
+                tipo=tipo_video,
+            )
             st.session_state.video_atual_id = vid_id
             st.success("Vídeo criado.")
             st.rerun()
@@ -466,6 +486,9 @@ with col_v2:
 
 st.markdown("#### 🧩 Etapas da pipeline")
 
+# Lead time de cada etapa, dos instantes de conclusão gravados em `status`
+tempos_etapa = banco.lead_times(video["video_id"])
+
 etapas = [
     ("0_canal", "0 – Canal pronto", "Somente cadastro e análise do canal"),
     ("1_roteiro", "1 – Roteiro", "Roteiro gerado e aprovado"),
@@ -482,9 +505,11 @@ for key, nome, desc in etapas:
 
     col_e1, col_e2, col_e3 = st.columns([2, 4, 2])
     with col_e1:
-        icone = "✅" if done else ("🟡" if idx <= etapa_atual(video["status"])[0] + 1 else "⚪")
+        icone = "✅" if done else ("🟡" if idx <= idx_e + 1 else "⚪")
         st.markdown(f"**{icone} {nome}**")
         st.caption(desc)
+        if done and key in tempos_etapa:
+            st.caption(f"⏱ Lead time: {formatar_duracao(tempos_etapa[key])}")
     with col_e2:
         resumo = ""
         artefatos = video.get("artefatos", {})
@@ -530,49 +555,175 @@ for key, nome, desc in etapas:
 # -------------------------------------------------------------------
 st.header("📊 Resumo de progresso do canal")
 
-contagem = {
-    "Ideia / só criado": 0,
-    "Roteiro pronto": 0,
-    "Thumb pronta": 0,
-    "Áudio pronto": 0,
-    "Vídeo pronto": 0,
-    "Publicado": 0,
-}
-
-for vid_id, v in canal["videos"].items():
-    stt = v["status"]
-    if stt.get("5_publicacao"):
-        contagem["Publicado"] += 1
-    elif stt.get("4_video"):
-        contagem["Vídeo pronto"] += 1
-    elif stt.get("3_audio"):
-        contagem["Áudio pronto"] += 1
-    elif stt.get("2_thumbnail"):
-        contagem["Thumb pronta"] += 1
-    elif stt.get("1_roteiro"):
-        contagem["Roteiro pronto"] += 1
-    else:
-        contagem["Ideia / só criado"] += 1
+# KPIs materializados (atualizados a cada escrita de status), sem listar vídeos
+indicadores = banco.kpis(canal_id)
+por_fase = indicadores["por_fase"]
+idade_fase = indicadores["idade_media_dias"]
+
+
+def metrica_fase(rotulo, fase):
+    idade = idade_fase.get(fase)
+    st.metric(
+        rotulo,
+        por_fase[fase],
+        help=(
+            f"Idade média nesta etapa: {formatar_duracao(idade * 86400)}"
+            if idade is not None
+            else None
+        ),
+    )
+
 
 col_r1, col_r2, col_r3 = st.columns(3)
 with col_r1:
-    st.metric("Somente criados", contagem["Ideia / só criado"])
+    metrica_fase("Somente criados", 0)
 with col_r2:
-    st.metric("Roteiro pronto", contagem["Roteiro pronto"])
+    metrica_fase("Roteiro pronto", 1)
 with col_r3:
-    st.metric("Thumb pronta", contagem["Thumb pronta"])
+    metrica_fase("Thumb pronta", 2)
 
 col_r4, col_r5, col_r6 = st.columns(3)
 with col_r4:
-    st.metric("Áudio pronto", contagem["Áudio pronto"])
+    metrica_fase("Áudio pronto", 3)
 with col_r5:
-    st.metric("Vídeo pronto", contagem["Vídeo pronto"])
+    metrica_fase("Vídeo pronto", 4)
 with col_r6:
-    st.metric("Publicados", contagem["Publicado"])
+    metrica_fase("Publicados", 5)
+
+globais = banco.kpis()
+col_t1, col_t2, col_t3 = st.columns(3)
+with col_t1:
+    st.metric("Em andamento (canal)", indicadores["em_andamento"])
+with col_t2:
+    st.metric("Concluídos (canal)", indicadores["concluidos"])
+with col_t3:
+    st.metric(
+        "Todos os canais",
+        globais["total"],
+        help=(
+            f"{globais['em_andamento']} em andamento, "
+            f"{globais['concluidos']} publicados, "
+            f"{globais['so_criados']} só criados."
+        ),
+    )
+
+# Consultas pelos índices etapa_max / publicado_em (sem varrer o canal)
+col_r7, col_r8 = st.columns(2)
+with col_r7:
+    proximo = banco.proximo_para_renderizar(canal_id)
+    st.metric(
+        "Próximo a renderizar",
+        proximo["titulo"] if proximo else "—",
+        help="Vídeo mais antigo com áudio pronto e vídeo ainda não gerado.",
+    )
+with col_r8:
+    st.metric("Publicados nesta semana", len(banco.publicados_na_semana(canal_id)))
+
+# -------------------------------------------------------------------
+# BLOCO 6 – Armazenamento (cota de disco e coletor)
+# -------------------------------------------------------------------
+def formatar_bytes(n):
+    for unidade in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unidade}" if unidade == "B" else f"{n:.1f} {unidade}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+with st.expander("🧹 Armazenamento de arquivos gerados", expanded=False):
+    uso = coletor.uso_armazem()
+    st.progress(
+        min(uso / coletor.QUOTA_BYTES, 1.0) if coletor.QUOTA_BYTES else 0.0,
+        text=f"{formatar_bytes(uso)} de {formatar_bytes(coletor.QUOTA_BYTES)} (cota)",
+    )
+    ultimo = coletor.ultimo_relatorio
+    if ultimo:
+        if ultimo.get("erro"):
+            st.warning(f"Última coleta falhou: {ultimo['erro']}")
+        else:
+            st.caption(
+                f"Última coleta automática: {ultimo['executado_em'][:19]} – "
+                f"{len(ultimo['itens'])} arquivo(s), "
+                f"{formatar_bytes(ultimo['bytes_liberados'])} liberados. "
+                f"Próxima por volta de {coletor.proxima_execucao_estimada()[11:19]}."
+            )
+
+    legados = st.checkbox(
+        "Incluir arquivos antigos em /tmp e imagens_video/",
+        value=coletor.VARRER_LEGADOS,
+        help=(
+            "Versões antigas gravavam áudio, imagens e vídeos em /tmp. Marque só se este "
+            "servidor não for compartilhado: qualquer tmp*.mp3/.wav/.png/.mp4 com mais de "
+            "1 hora que o banco não cite é apagado."
+        ),
+    )
+    col_g1, col_g2 = st.columns(2)
+    with col_g1:
+        simular = st.button("Simular limpeza (dry-run)")
+    with col_g2:
+        executar = st.button("Limpar agora")
+
+    if simular or executar:
+        relatorio = coletor.coletar(dry_run=simular, legados=legados)
+        if relatorio.get("ignorado"):
+            st.info(relatorio["ignorado"])
+        verbo = "seriam liberados" if relatorio["dry_run"] else "liberados"
+        st.write(
+            f"**{len(relatorio['itens'])} arquivo(s)**, "
+            f"{formatar_bytes(relatorio['bytes_liberados'])} {verbo}. "
+            f"Armazém: {formatar_bytes(relatorio['uso_bytes'])} → "
+            f"{formatar_bytes(relatorio['uso_final_bytes'])}."
+        )
+        if relatorio["itens"]:
+            st.dataframe(
+                pd.DataFrame(relatorio["itens"]), use_container_width=True, hide_index=True
+            )
+
+with st.expander("📦 Exportar / importar banco (Parquet / Arrow)", expanded=False):
+    st.caption(
+        "Exporta todos os canais e vídeos (status, publicação e métricas manuais) "
+        "em tabelas colunares para análise offline; a importação carrega de volta "
+        "no banco em lotes."
+    )
+    col_x1, col_x2 = st.columns(2)
+    with col_x1:
+        formato_exp = st.radio("Formato", ["parquet", "arrow"], horizontal=True)
+        pasta_exp = st.text_input(
+            "Pasta de destino",
+            value=os.path.join("dados", "exportacao", datetime.now().strftime("%Y%m%d")),
+        )
+        if st.button("Exportar"):
+            try:
+                # exportacao puxa o pyarrow: só carrega quando alguém exporta ou importa
+                import exportacao
+
+                with st.spinner("Exportando..."):
+                    res = exportacao.exportar(pasta_exp, formato=formato_exp)
+                st.success(
+                    f"{res['canais']} canais e {res['videos']} vídeos exportados "
+                    f"em {res['segundos']:.1f}s: {', '.join(res['arquivos'])}"
+                )
+            except RuntimeError as e:
+                st.error(str(e))
+    with col_x2:
+        pasta_imp = st.text_input("Pasta com canais/videos exportados")
+        if st.button("Importar") and pasta_imp:
+            try:
+                import exportacao
+
+                with st.spinner("Importando..."):
+                    res = exportacao.importar(pasta_imp)
+                st.success(
+                    f"{res['canais']} canais e {res['videos']} vídeos importados "
+                    f"em {res['segundos']:.1f}s."
+                )
+            except (RuntimeError, FileNotFoundError) as e:
+                st.error(str(e))
 
 st.markdown("---")
 st.caption(
     "Use este monitor como painel central. Cada página (0–6) lê "
     "`st.session_state.canal_atual_id` e `st.session_state.video_atual_id` "
-    "para saber em qual vídeo trabalhar e atualiza o `db` conforme as etapas avançam."
+    "para saber em qual vídeo trabalhar e atualiza o banco compartilhado "
+    "(`banco.py`, SQLite) conforme as etapas avançam."
 )
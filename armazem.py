@@ -0,0 +1,263 @@
+"""
+Armazém de arquivos gerados pela pipeline, endereçado por conteúdo.
+
+Imagens, áudios e vídeos ficam em `dados/artefatos/<h[:2]>/<sha256><ext>`.
+O mesmo conteúdo gerado duas vezes ocupa um único arquivo; cada vídeo
+aponta para ele por um "papel" (ex.: `audio_path`, `imagens_roteiro/hook/0`)
+na tabela `blob_refs`, e o número de referências decide quando o arquivo
+pode ser apagado. Toda escrita vai primeiro para um temporário dentro do
+próprio armazém e só então é renomeada (`os.replace`) para o nome final.
+
+Ligar um vídeo a um blob e apagar um blob órfão acontecem, cada um, numa
+transação de escrita do banco que também cobre o arquivo (o rename ou a
+conferência de que ele existe; a remoção). Como o SQLite serializa
+escritores, um arquivo nunca some entre "já existe, não precisa gravar" e
+a referência nova.
+"""
+
+import os
+import hashlib
+import tempfile
+from datetime import datetime, timedelta
+
+import banco
+
+PASTA_TMP = "tmp"
+_BLOCO = 1024 * 1024
+
+
+def _agora():
+    return datetime.now().isoformat()
+
+
+def _raiz(conn) -> str:
+    return conn.pasta_artefatos
+
+
+def caminho_blob(conn, hash_: str, ext: str) -> str:
+    return os.path.join(_raiz(conn), hash_[:2], hash_ + ext)
+
+
+def novo_temporario(ext: str, conn=None) -> str:
+    """
+    Caminho de um arquivo temporário dentro do armazém (mesmo sistema de
+    arquivos do destino), para TTS/FFmpeg escreverem antes do `guardar_arquivo`.
+    """
+    conn = conn or banco.conectar()
+    pasta = os.path.join(_raiz(conn), PASTA_TMP)
+    os.makedirs(pasta, exist_ok=True)
+    fd, caminho = tempfile.mkstemp(suffix=ext, dir=pasta)
+    os.close(fd)
+    return caminho
+
+
+def descartar_temporario(caminho: str | None) -> None:
+    if caminho and os.path.exists(caminho):
+        os.remove(caminho)
+
+
+# -------------------------------------------------------------------
+# Escrita
+# -------------------------------------------------------------------
+def _registrar_blob(conn, hash_, ext, tamanho, tipo, video_id, papel, tmp=None) -> bool:
+    """
+    Liga o vídeo ao blob. Com `tmp`, o conteúdo entra no lugar dentro da
+    transação; sem ele, o arquivo já deveria existir: se sumiu (um órfão
+    apagado no meio do caminho), devolve False e quem chama grava de novo.
+    """
+    agora = _agora()
+    destino = caminho_blob(conn, hash_, ext)
+    with conn:
+        # Primeira escrita: a partir daqui a transação segura a trava de escrita
+        conn.execute(
+            "INSERT INTO blobs (hash, ext, tamanho, tipo, criado_em, acessado_em) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(hash) DO UPDATE SET "
+            "acessado_em = excluded.acessado_em",
+            (hash_, ext, tamanho, tipo, agora, agora),
+        )
+        if tmp is not None:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            os.replace(tmp, destino)
+        elif not os.path.exists(destino):
+            return False
+        anterior = conn.execute(
+            "SELECT hash FROM blob_refs WHERE video_id = ? AND papel = ?",
+            (video_id, papel),
+        ).fetchone()
+        conn.execute(
+            "INSERT INTO blob_refs (video_id, papel, hash) VALUES (?, ?, ?) "
+            "ON CONFLICT(video_id, papel) DO UPDATE SET hash = excluded.hash",
+            (video_id, papel, hash_),
+        )
+    if anterior and anterior["hash"] != hash_:
+        apagar_orfao(conn, anterior["hash"])
+    return True
+
+
+def guardar_bytes(
+    dados: bytes,
+    ext: str,
+    video_id: str,
+    papel: str,
+    tipo: str | None = None,
+    conn=None,
+) -> str:
+    """Grava `dados` (se ainda não existirem) e liga o vídeo a eles. Devolve o caminho."""
+    conn = conn or banco.conectar()
+    hash_ = hashlib.sha256(dados).hexdigest()
+    destino = caminho_blob(conn, hash_, ext)
+    tmp = None
+    try:
+        while True:
+            if tmp is None and not os.path.exists(destino):
+                tmp = novo_temporario(ext, conn=conn)
+                with open(tmp, "wb") as f:
+                    f.write(dados)
+                    f.flush()
+                    os.fsync(f.fileno())
+            if _registrar_blob(conn, hash_, ext, len(dados), tipo, video_id, papel, tmp):
+                return destino
+    finally:
+        descartar_temporario(tmp)
+
+
+def _para_temporario(origem: str, ext: str, conn) -> str:
+    """Move `origem` para um temporário do armazém (mesmo sistema de arquivos do destino)."""
+    tmp = novo_temporario(ext, conn=conn)
+    try:
+        os.replace(origem, tmp)
+    except OSError:
+        # Origem em outro sistema de arquivos: copia e apaga
+        with open(origem, "rb") as src, open(tmp, "wb") as dst:
+            for bloco in iter(lambda: src.read(_BLOCO), b""):
+                dst.write(bloco)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.remove(origem)
+    return tmp
+
+
+def guardar_arquivo(
+    origem: str,
+    video_id: str,
+    papel: str,
+    tipo: str | None = None,
+    ext: str | None = None,
+    conn=None,
+) -> str:
+    """
+    Move um arquivo já pronto para o armazém (rename atômico) e liga o vídeo
+    a ele. Se o conteúdo já existe, o arquivo de origem é só descartado.
+    """
+    conn = conn or banco.conectar()
+    ext = ext if ext is not None else os.path.splitext(origem)[1].lower()
+    h = hashlib.sha256()
+    with open(origem, "rb") as f:
+        for bloco in iter(lambda: f.read(_BLOCO), b""):
+            h.update(bloco)
+    hash_ = h.hexdigest()
+    tamanho = os.path.getsize(origem)
+    destino = caminho_blob(conn, hash_, ext)
+    tmp = None
+    try:
+        while True:
+            if tmp is None and not os.path.exists(destino):
+                tmp = _para_temporario(origem, ext, conn)
+            if _registrar_blob(conn, hash_, ext, tamanho, tipo, video_id, papel, tmp):
+                break
+    finally:
+        descartar_temporario(tmp)
+    if os.path.exists(origem):
+        os.remove(origem)
+    return destino
+
+
+# -------------------------------------------------------------------
+# Leitura (marca uso para o despejo LRU do coletor)
+# -------------------------------------------------------------------
+# Só regrava acessado_em se a marca anterior for mais velha que isto, para
+# que cada rerun do Streamlit não vire uma escrita no banco
+_INTERVALO_TOQUE = timedelta(minutes=10)
+
+
+def tocar(caminhos, conn=None) -> None:
+    """Atualiza `acessado_em` dos blobs exibidos/usados (caminhos do armazém)."""
+    if isinstance(caminhos, str):
+        caminhos = [caminhos]
+    hashes = [
+        os.path.splitext(os.path.basename(c))[0]
+        for c in caminhos
+        if c and os.path.exists(c)
+    ]
+    if not hashes:
+        return
+    conn = conn or banco.conectar()
+    agora = datetime.now()
+    marcas = ",".join("?" * len(hashes))
+    with conn:
+        conn.execute(
+            f"UPDATE blobs SET acessado_em = ? WHERE hash IN ({marcas}) "
+            f"AND acessado_em < ?",
+            (agora.isoformat(), *hashes, (agora - _INTERVALO_TOQUE).isoformat()),
+        )
+
+
+# -------------------------------------------------------------------
+# Referências e remoção
+# -------------------------------------------------------------------
+def contar_referencias(hash_: str, conn=None) -> int:
+    conn = conn or banco.conectar()
+    return conn.execute(
+        "SELECT COUNT(*) FROM blob_refs WHERE hash = ?", (hash_,)
+    ).fetchone()[0]
+
+
+def apagar_orfao(conn, hash_: str, ocioso_antes: str | None = None) -> bool:
+    """
+    Apaga o blob (linha e arquivo) se ele não tem referências e, com
+    `ocioso_antes`, se não é usado desde então (ISO). A conferência, o DELETE
+    e a remoção do arquivo ficam na mesma transação de escrita: um
+    `guardar_*` concorrente do mesmo conteúdo espera e depois regrava.
+    """
+    row = conn.execute("SELECT ext FROM blobs WHERE hash = ?", (hash_,)).fetchone()
+    if not row:
+        return False
+    with conn:
+        apagou = conn.execute(
+            "DELETE FROM blobs WHERE hash = ? AND (? IS NULL OR acessado_em < ?) "
+            "AND NOT EXISTS (SELECT 1 FROM blob_refs r WHERE r.hash = blobs.hash)",
+            (hash_, ocioso_antes, ocioso_antes),
+        ).rowcount
+        if apagou:
+            caminho = caminho_blob(conn, hash_, row["ext"])
+            if os.path.exists(caminho):
+                os.remove(caminho)
+    return bool(apagou)
+
+
+def liberar(video_id: str, papel: str | None = None, prefixo: str | None = None, conn=None) -> int:
+    """
+    Remove as referências do vídeo (um papel, todos com um prefixo ou todos)
+    e apaga os arquivos que ficaram sem nenhuma referência. Devolve quantos
+    arquivos foram apagados.
+    """
+    conn = conn or banco.conectar()
+    if papel is not None:
+        filtro, params = "papel = ?", (papel,)
+    elif prefixo is not None:
+        filtro, params = "substr(papel, 1, ?) = ?", (len(prefixo), prefixo)
+    else:
+        filtro, params = "1", ()
+    with conn:
+        hashes = [
+            r["hash"]
+            for r in conn.execute(
+                f"SELECT DISTINCT hash FROM blob_refs WHERE video_id = ? AND {filtro}",
+                (video_id, *params),
+            )
+        ]
+        conn.execute(
+            f"DELETE FROM blob_refs WHERE video_id = ? AND {filtro}",
+            (video_id, *params),
+        )
+    return sum(apagar_orfao(conn, h) for h in hashes)
@@ -0,0 +1,1014 @@
+"""
+Banco compartilhado da pipeline (SQLite em modo WAL).
+
+Substitui o antigo `st.session_state.db` (um dict aninhado por sessão) por um
+arquivo SQLite que todas as páginas importam. Leituras e escritas são feitas
+por linha (canal, vídeo, etapa, artefato), sem carregar o catálogo inteiro.
+
+Toda gravação também é anotada no diário (`diario.py`, ao lado do arquivo do
+banco), dentro da mesma transação e antes do commit; se o arquivo SQLite
+sumir, ele é reconstruído a partir do diário.
+Arquivos gerados (imagens, áudio, vídeo) ficam em `armazem.py`, cujas
+tabelas de blobs e referências também vivem aqui.
+
+Concorrência: canais, vídeos e cada artefato têm um contador `versao`.
+Escritas comuns são por campo (uma página gravando `audio_path` não apaga o
+`video_path` de outra); quem faz ler-alterar-gravar num mesmo artefato usa
+`alterar_artefato`/`alterar_canal`, que gravam com compare-and-swap na
+versão lida e repetem só aquele campo se outro processo chegou antes.
+"""
+
+import os
+import copy
+import uuid
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import diario
+import modelos
+
+DB_PATH = os.environ.get("PIPELINE_DB_PATH", os.path.join("dados", "pipeline.db"))
+
+ETAPAS = modelos.ETAPAS
+
+ARTEFATOS_PADRAO = {
+    "roteiro": None,
+    "thumbs": None,
+    "audio_path": None,
+    "video_path": None,
+    "youtube_url": None,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS canais (
+    canal_id   TEXT PRIMARY KEY,
+    nome       TEXT NOT NULL DEFAULT '',
+    config     TEXT NOT NULL DEFAULT '{}',
+    criado_em  TEXT,
+    versao     INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS videos (
+    video_id            TEXT PRIMARY KEY,
+    canal_id            TEXT NOT NULL REFERENCES canais(canal_id) ON DELETE CASCADE,
+    titulo              TEXT NOT NULL DEFAULT '',
+    descricao           TEXT NOT NULL DEFAULT '',
+    tipo                TEXT,
+    criado_em           TEXT,
+    ultima_atualizacao  TEXT,
+    versao              INTEGER NOT NULL DEFAULT 0,
+    -- Índices secundários mantidos a cada escrita de status (ver
+    -- _atualizar_indices): etapa mais avançada entre 1 e 5 (0 = só criado)
+    -- e data de publicação (NULL = não publicado)
+    etapa_max           INTEGER NOT NULL DEFAULT 0,
+    publicado_em        TEXT,
+    -- Quando o vídeo entrou na etapa_max atual (julianday, hora local)
+    fase_desde          REAL
+);
+-- Cobre o filtro por canal e a ordenação das páginas (LIMIT/OFFSET)
+DROP INDEX IF EXISTS idx_videos_canal;
+CREATE INDEX IF NOT EXISTS idx_videos_canal_ordem
+    ON videos(canal_id, criado_em, video_id);
+CREATE INDEX IF NOT EXISTS idx_videos_canal_etapa
+    ON videos(canal_id, etapa_max, criado_em);
+CREATE INDEX IF NOT EXISTS idx_videos_canal_publicado
+    ON videos(canal_id, publicado_em) WHERE publicado_em IS NOT NULL;
+
+-- atualizado_em = quando `concluido` mudou pela última vez (para uma etapa
+-- concluída, quando ela foi concluída: é a base do lead time)
+CREATE TABLE IF NOT EXISTS status (
+    video_id       TEXT NOT NULL REFERENCES videos(video_id) ON DELETE CASCADE,
+    etapa          TEXT NOT NULL,
+    concluido      INTEGER NOT NULL DEFAULT 0,
+    atualizado_em  TEXT,
+    PRIMARY KEY (video_id, etapa)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS artefatos (
+    video_id       TEXT NOT NULL REFERENCES videos(video_id) ON DELETE CASCADE,
+    chave          TEXT NOT NULL,
+    valor          TEXT,
+    atualizado_em  TEXT,
+    versao         INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (video_id, chave)
+) WITHOUT ROWID;
+
+-- Armazém de arquivos por conteúdo (ver armazem.py)
+CREATE TABLE IF NOT EXISTS blobs (
+    hash         TEXT PRIMARY KEY,
+    ext          TEXT NOT NULL DEFAULT '',
+    tamanho      INTEGER NOT NULL,
+    tipo         TEXT,
+    criado_em    TEXT,
+    acessado_em  TEXT
+);
+
+CREATE TABLE IF NOT EXISTS blob_refs (
+    video_id  TEXT NOT NULL,
+    papel     TEXT NOT NULL,
+    hash      TEXT NOT NULL REFERENCES blobs(hash),
+    PRIMARY KEY (video_id, papel)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_blob_refs_hash ON blob_refs(hash);
+
+-- Cache das respostas da YouTube Data API (ver cache_api.py)
+CREATE TABLE IF NOT EXISTS respostas_api (
+    chave       TEXT PRIMARY KEY,
+    metodo      TEXT NOT NULL,
+    etag        TEXT,
+    corpo       BLOB NOT NULL,
+    gravado_em  REAL NOT NULL
+);
+
+-- Cache das respostas do LLM, chaveado pelo hash de modelo + parâmetros +
+-- prompts (ver cache_llm.py). Despejo LRU por usado_em.
+CREATE TABLE IF NOT EXISTS respostas_llm (
+    chave       TEXT PRIMARY KEY,
+    modelo      TEXT NOT NULL,
+    corpo       BLOB NOT NULL,
+    bytes       INTEGER NOT NULL,
+    tokens      INTEGER NOT NULL DEFAULT 0,
+    gravado_em  REAL NOT NULL,
+    usado_em    REAL NOT NULL,
+    acertos     INTEGER NOT NULL DEFAULT 0,
+    tokens_poupados INTEGER NOT NULL DEFAULT 0
+);
+
+-- Telemetria do LLM (ver telemetria_llm.py): uma linha por chamada, tempos
+-- em ms; custo e tokens/s são calculados na leitura.
+CREATE TABLE IF NOT EXISTS chamadas_llm (
+    em              REAL NOT NULL,
+    canal_id        TEXT,
+    modelo          TEXT NOT NULL,
+    etapa           TEXT NOT NULL,
+    fila_ms         INTEGER NOT NULL DEFAULT 0,
+    ttft_ms         INTEGER,
+    total_ms        INTEGER NOT NULL,
+    tokens_prompt   INTEGER NOT NULL DEFAULT 0,
+    tokens_resposta INTEGER NOT NULL DEFAULT 0,
+    fim             TEXT,
+    cache           INTEGER NOT NULL DEFAULT 0,
+    erro            TEXT,
+    tentativas      INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_chamadas_llm_canal ON chamadas_llm(canal_id, em);
+CREATE INDEX IF NOT EXISTS idx_chamadas_llm_em ON chamadas_llm(em);
+
+-- Link de canal -> channelId; channel_id NULL = não existe (ver resolvedor.py)
+CREATE TABLE IF NOT EXISTS resolucoes_canal (
+    entrada       TEXT PRIMARY KEY,
+    channel_id    TEXT,
+    resolvido_em  REAL NOT NULL,
+    expira_em     REAL NOT NULL
+) WITHOUT ROWID;
+
+-- Catálogo de canais do YouTube acompanhados e série temporal de views
+-- (ver sincronizador.py). Snapshots: uma linha por vídeo e coleta, com o
+-- instante em segundos Unix.
+CREATE TABLE IF NOT EXISTS yt_videos (
+    video_id      TEXT PRIMARY KEY,
+    channel_id    TEXT NOT NULL,
+    titulo        TEXT NOT NULL DEFAULT '',
+    publicado_em  TEXT NOT NULL,
+    duracao       TEXT NOT NULL DEFAULT '',
+    is_short      INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_yt_videos_canal
+    ON yt_videos(channel_id, publicado_em);
+CREATE TABLE IF NOT EXISTS yt_snapshots (
+    video_id     TEXT NOT NULL,
+    coletado_em  INTEGER NOT NULL,
+    views        INTEGER NOT NULL,
+    likes        INTEGER NOT NULL DEFAULT 0,
+    comments     INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (video_id, coletado_em)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS yt_sync (
+    channel_id        TEXT PRIMARY KEY,
+    ultimo_publicado  TEXT,
+    sincronizado_em   REAL
+) WITHOUT ROWID;
+
+-- Índice invertido de n-gramas dos títulos analisados (ver indice_titulos.py).
+-- Postings ordenados por views dentro de cada (nicho, n-grama); a mediana
+-- de cada n-grama é recalculada só quando um vídeo dele muda.
+CREATE TABLE IF NOT EXISTS ngramas_docs (
+    video_id    TEXT PRIMARY KEY,
+    nicho       TEXT NOT NULL,
+    channel_id  TEXT NOT NULL DEFAULT '',
+    titulo      TEXT NOT NULL,
+    views       INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ngramas (
+    nicho     TEXT NOT NULL,
+    ngrama    TEXT NOT NULL,
+    views     INTEGER NOT NULL,
+    video_id  TEXT NOT NULL,
+    PRIMARY KEY (nicho, ngrama, views, video_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ngramas_stats (
+    nicho    TEXT NOT NULL,
+    ngrama   TEXT NOT NULL,
+    qtd      INTEGER NOT NULL,
+    mediana  INTEGER NOT NULL,
+    PRIMARY KEY (nicho, ngrama)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_ngramas_stats_mediana
+    ON ngramas_stats(nicho, mediana DESC) WHERE qtd >= 3;
+
+-- KPIs materializados: por canal e etapa_max, quantos vídeos, quantos têm
+-- fase_desde e a soma deles (idade média na etapa = agora - soma /
+-- qtd_desde; um fase_desde NULL não entra na média). Mantidos por triggers
+-- a cada insert/delete de vídeo e a cada mudança de etapa_max.
+CREATE TABLE IF NOT EXISTS kpis (
+    canal_id    TEXT NOT NULL,
+    fase        INTEGER NOT NULL,
+    qtd         INTEGER NOT NULL DEFAULT 0,
+    qtd_desde   INTEGER NOT NULL DEFAULT 0,
+    soma_desde  REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (canal_id, fase)
+) WITHOUT ROWID;
+-- Versão anterior somava NULL como 0 (idades de milhões de dias)
+DROP TRIGGER IF EXISTS kpis_ai;
+DROP TRIGGER IF EXISTS kpis_ad;
+DROP TRIGGER IF EXISTS kpis_au;
+CREATE TRIGGER IF NOT EXISTS kpis_insere AFTER INSERT ON videos BEGIN
+    INSERT OR IGNORE INTO kpis (canal_id, fase) VALUES (new.canal_id, new.etapa_max);
+    UPDATE kpis SET qtd = qtd + 1, qtd_desde = qtd_desde + (new.fase_desde IS NOT NULL),
+        soma_desde = soma_desde + COALESCE(new.fase_desde, 0)
+    WHERE canal_id = new.canal_id AND fase = new.etapa_max;
+END;
+CREATE TRIGGER IF NOT EXISTS kpis_apaga AFTER DELETE ON videos BEGIN
+    UPDATE kpis SET qtd = qtd - 1, qtd_desde = qtd_desde - (old.fase_desde IS NOT NULL),
+        soma_desde = soma_desde - COALESCE(old.fase_desde, 0)
+    WHERE canal_id = old.canal_id AND fase = old.etapa_max;
+END;
+CREATE TRIGGER IF NOT EXISTS kpis_muda AFTER UPDATE OF etapa_max, fase_desde ON videos BEGIN
+    UPDATE kpis SET qtd = qtd - 1, qtd_desde = qtd_desde - (old.fase_desde IS NOT NULL),
+        soma_desde = soma_desde - COALESCE(old.fase_desde, 0)
+    WHERE canal_id = old.canal_id AND fase = old.etapa_max;
+    INSERT OR IGNORE INTO kpis (canal_id, fase) VALUES (new.canal_id, new.etapa_max);
+    UPDATE kpis SET qtd = qtd + 1, qtd_desde = qtd_desde + (new.fase_desde IS NOT NULL),
+        soma_desde = soma_desde + COALESCE(new.fase_desde, 0)
+    WHERE canal_id = new.canal_id AND fase = new.etapa_max;
+END;
+"""
+
+# Índice de busca por título (FTS5 com trigramas: acha qualquer trecho de
+# 3+ caracteres). Mantido por triggers a partir da tabela `videos`.
+_SCHEMA_BUSCA = """
+CREATE VIRTUAL TABLE videos_busca USING fts5(
+    titulo, content='videos', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER videos_busca_ai AFTER INSERT ON videos BEGIN
+    INSERT INTO videos_busca(rowid, titulo) VALUES (new.rowid, new.titulo);
+END;
+CREATE TRIGGER videos_busca_ad AFTER DELETE ON videos BEGIN
+    INSERT INTO videos_busca(videos_busca, rowid, titulo)
+    VALUES ('delete', old.rowid, old.titulo);
+END;
+CREATE TRIGGER videos_busca_au AFTER UPDATE OF titulo ON videos BEGIN
+    INSERT INTO videos_busca(videos_busca, rowid, titulo)
+    VALUES ('delete', old.rowid, old.titulo);
+    INSERT INTO videos_busca(rowid, titulo) VALUES (new.rowid, new.titulo);
+END;
+INSERT INTO videos_busca(videos_busca) VALUES ('rebuild');
+"""
+
+# -------------------------------------------------------------------
+# Conexão (uma por thread; o Streamlit roda cada sessão em sua thread)
+# -------------------------------------------------------------------
+_local = threading.local()
+
+
+class _Conexao(sqlite3.Connection):
+    """Conexão que sabe onde ficam o diário e os arquivos do seu banco."""
+
+    pasta_diario: str = ""
+    pasta_artefatos: str = ""
+    tem_busca: bool = False
+
+
+def conectar(caminho: str | None = None) -> sqlite3.Connection:
+    """Retorna a conexão da thread atual, criando o banco se necessário."""
+    caminho = caminho or DB_PATH
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(caminho)
+    if conn is not None:
+        return conn
+
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    novo = not os.path.exists(caminho)
+    conn = sqlite3.connect(caminho, timeout=30, factory=_Conexao)
+    conn.pasta_diario = os.path.join(pasta, "diario")
+    conn.pasta_artefatos = os.path.join(pasta, "artefatos")
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute("PRAGMA busy_timeout=30000")
+    _migrar_colunas(conn)
+    tinha_kpis = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'kpis'"
+    ).fetchone()
+    conn.executescript(_SCHEMA)
+    if not tinha_kpis:
+        with conn:
+            _recalcular_kpis(conn)
+    conn.tem_busca = _criar_indice_busca(conn)
+    _migrar_etapas(conn)
+    if novo and diario.existe(conn.pasta_diario):
+        diario.reconstruir_banco(conn, diario.restaurar(conn.pasta_diario))
+        with conn:
+            _atualizar_indices(conn)
+            _recalcular_kpis(conn)
+    conns[caminho] = conn
+    return conn
+
+
+def _criar_indice_busca(conn) -> bool:
+    """Cria o índice FTS5 se o SQLite suportar; sem ele a busca usa LIKE."""
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'videos_busca'"
+    ).fetchone()
+    if existe:
+        return True
+    try:
+        conn.executescript("BEGIN;" + _SCHEMA_BUSCA + "COMMIT;")
+        return True
+    except sqlite3.OperationalError:
+        if conn.in_transaction:
+            conn.rollback()
+        # Outro processo pode ter criado o índice ao mesmo tempo
+        return bool(
+            conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'videos_busca'"
+            ).fetchone()
+        )
+
+
+# Colunas acrescentadas depois da criação do schema: (tabela, coluna, definição)
+_COLUNAS_NOVAS = [
+    ("canais", "versao", "INTEGER NOT NULL DEFAULT 0"),
+    ("videos", "versao", "INTEGER NOT NULL DEFAULT 0"),
+    ("artefatos", "versao", "INTEGER NOT NULL DEFAULT 0"),
+    ("videos", "etapa_max", "INTEGER NOT NULL DEFAULT 0"),
+    ("videos", "publicado_em", "TEXT"),
+    ("videos", "fase_desde", "REAL"),
+    ("kpis", "qtd_desde", "INTEGER NOT NULL DEFAULT 0"),
+    ("chamadas_llm", "tentativas", "INTEGER NOT NULL DEFAULT 1"),
+]
+
+
+def _migrar_colunas(conn) -> None:
+    """Acrescenta em bancos antigos as colunas que o schema atual espera."""
+    acrescentadas = set()
+    for tabela, coluna, definicao in _COLUNAS_NOVAS:
+        colunas = {r["name"] for r in conn.execute(f"PRAGMA table_info({tabela})")}
+        if colunas and coluna not in colunas:
+            try:
+                conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+                conn.commit()
+                acrescentadas.add(coluna)
+            except sqlite3.OperationalError:
+                pass  # outro processo acrescentou a coluna ao mesmo tempo
+    if acrescentadas & {"etapa_max", "publicado_em"}:
+        _atualizar_indices(conn)
+        conn.commit()
+    if "fase_desde" in acrescentadas:
+        conn.execute(
+            "UPDATE videos SET fase_desde = julianday(COALESCE(ultima_atualizacao, criado_em))"
+        )
+        conn.commit()
+    if "qtd_desde" in acrescentadas:
+        # Bancos reconstruídos pelo diário antes desta correção ficaram com
+        # fase_desde NULL; os KPIs são refeitos com a contagem nova
+        conn.execute(
+            "UPDATE videos SET fase_desde = julianday(COALESCE(ultima_atualizacao, criado_em)) "
+            "WHERE fase_desde IS NULL"
+        )
+        _recalcular_kpis(conn)
+        conn.commit()
+
+
+def _migrar_etapas(conn) -> None:
+    """Funde linhas de status gravadas com nomes antigos de etapa."""
+    for antiga, atual in modelos.ALIASES_ETAPA.items():
+        if not conn.execute(
+            "SELECT 1 FROM status WHERE etapa = ? LIMIT 1", (antiga,)
+        ).fetchone():
+            continue
+        with conn:
+            conn.execute(
+                "INSERT INTO status (video_id, etapa, concluido, atualizado_em) "
+                "SELECT video_id, ?, concluido, atualizado_em FROM status "
+                "WHERE etapa = ? AND true ON CONFLICT(video_id, etapa) DO UPDATE SET "
+                "concluido = max(concluido, excluded.concluido), "
+                "atualizado_em = max(atualizado_em, excluded.atualizado_em)",
+                (atual, antiga),
+            )
+            conn.execute("DELETE FROM status WHERE etapa = ?", (antiga,))
+
+
+class ConflitoDeVersao(Exception):
+    """Um artefato/canal mudou desde que foi lido (compare-and-swap falhou)."""
+
+    def __init__(self, registro: str, chaves):
+        self.registro = registro
+        self.chaves = sorted(chaves)
+        super().__init__(f"Conflito de versão em {registro}: {', '.join(self.chaves)}")
+
+
+# Quantas vezes alterar_artefato/alterar_canal releem e repetem um campo
+TENTATIVAS_CAS = 5
+
+
+def gerar_id():
+    return str(uuid.uuid4())[:8]
+
+
+def _agora():
+    return datetime.now().isoformat()
+
+
+def _dumps(valor):
+    return modelos.dumps_texto(valor)
+
+
+def _loads(texto):
+    return modelos.loads(texto) if texto is not None else None
+
+
+def _registrar(conn, evento: dict) -> None:
+    # Chamado dentro da transação, antes do commit: se o processo cair entre
+    # os dois, o diário fica à frente do banco (e reaplicar o evento não
+    # muda nada), nunca atrás. Como a transação já segura a trava de escrita
+    # do SQLite, a ordem das linhas no diário é a ordem dos commits.
+    diario.registrar(conn.pasta_diario, evento)
+
+
+# -------------------------------------------------------------------
+# Canais
+# -------------------------------------------------------------------
+def listar_canais(conn=None) -> list[dict]:
+    """Cabeçalhos dos canais (id e nome), na ordem de criação."""
+    conn = conn or conectar()
+    rows = conn.execute(
+        "SELECT canal_id, nome FROM canais ORDER BY criado_em, canal_id"
+    ).fetchall()
+    return [{"canal_id": r["canal_id"], "nome": r["nome"]} for r in rows]
+
+
+def obter_canal(canal_id, conn=None) -> dict | None:
+    if not canal_id:
+        return None
+    conn = conn or conectar()
+    row = conn.execute(
+        "SELECT canal_id, nome, config, criado_em FROM canais WHERE canal_id = ?",
+        (canal_id,),
+    ).fetchone()
+    if not row:
+        return None
+    canal = _loads(row["config"]) or {}
+    canal.update(
+        {"canal_id": row["canal_id"], "nome": row["nome"], "criado_em": row["criado_em"]}
+    )
+    return canal
+
+
+def criar_canal(dados: dict, canal_id: str | None = None, conn=None) -> str:
+    """Cria um canal a partir de um dict de configurações e devolve o id."""
+    conn = conn or conectar()
+    canal_id = canal_id or gerar_id()
+    config = {
+        k: v
+        for k, v in dados.items()
+        if k not in ("canal_id", "nome", "criado_em", "videos")
+    }
+    nome = dados.get("nome", "")
+    criado_em = dados.get("criado_em") or _agora()
+    with conn:
+        conn.execute(
+            "INSERT INTO canais (canal_id, nome, config, criado_em) VALUES (?, ?, ?, ?)",
+            (canal_id, nome, _dumps(config), criado_em),
+        )
+        _registrar(
+            conn,
+            {
+                "tipo": "canal",
+                "canal_id": canal_id,
+                "campos": {**config, "nome": nome, "criado_em": criado_em},
+            },
+        )
+    return canal_id
+
+
+def atualizar_canal(canal_id: str, campos: dict, conn=None) -> None:
+    """Mescla `campos` nas configurações do canal."""
+    alterar_canal(canal_id, lambda atual: campos, conn=conn)
+
+
+def alterar_canal(canal_id: str, funcao, conn=None) -> dict:
+    """
+    Ler-alterar-gravar das configurações de um canal com compare-and-swap.
+    `funcao` recebe o canal atual (como em `obter_canal`) e devolve os campos
+    a mesclar; se outro processo gravar no meio, relê e chama de novo.
+    """
+    conn = conn or conectar()
+    for _ in range(TENTATIVAS_CAS):
+        row = conn.execute(
+            "SELECT nome, config, criado_em, versao FROM canais WHERE canal_id = ?",
+            (canal_id,),
+        ).fetchone()
+        if not row:
+            raise KeyError(f"Canal não encontrado: {canal_id}")
+        config = _loads(row["config"]) or {}
+        atual = {**config, "canal_id": canal_id, "nome": row["nome"], "criado_em": row["criado_em"]}
+        campos = funcao(copy.deepcopy(atual)) or {}
+        nome = campos.get("nome", row["nome"])
+        alterados = {
+            k: v
+            for k, v in campos.items()
+            if k not in ("canal_id", "nome", "criado_em", "videos")
+        }
+        config.update(alterados)
+        with conn:
+            gravou = conn.execute(
+                "UPDATE canais SET nome = ?, config = ?, versao = versao + 1 "
+                "WHERE canal_id = ? AND versao = ?",
+                (nome, _dumps(config), canal_id, row["versao"]),
+            ).rowcount
+            if gravou:
+                _registrar(
+                    conn,
+                    {"tipo": "canal", "canal_id": canal_id, "campos": {**alterados, "nome": nome}},
+                )
+        if gravou:
+            return campos
+    raise ConflitoDeVersao(f"canal {canal_id}", ["config"])
+
+
+# -------------------------------------------------------------------
+# Vídeos
+# -------------------------------------------------------------------
+def criar_video(
+    canal_id: str,
+    titulo: str,
+    descricao: str = "",
+    tipo: str | None = None,
+    video_id: str | None = None,
+    conn=None,
+) -> str:
+    """Cria um vídeo com a etapa 0 concluída e os artefatos padrão vazios."""
+    conn = conn or conectar()
+    video_id = video_id or gerar_id()
+    agora = _agora()
+    with conn:
+        conn.execute(
+            "INSERT INTO videos (video_id, canal_id, titulo, descricao, tipo, "
+            "criado_em, ultima_atualizacao, fase_desde) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, julianday(?))",
+            (video_id, canal_id, titulo, descricao, tipo, agora, agora, agora),
+        )
+        conn.executemany(
+            "INSERT INTO status (video_id, etapa, concluido, atualizado_em) "
+            "VALUES (?, ?, ?, ?)",
+            [(video_id, e, int(e == "0_canal"), agora) for e in ETAPAS],
+        )
+        conn.executemany(
+            "INSERT INTO artefatos (video_id, chave, valor, atualizado_em) "
+            "VALUES (?, ?, NULL, ?)",
+            [(video_id, k, agora) for k in ARTEFATOS_PADRAO],
+        )
+        _registrar(
+            conn,
+            {
+                "ts": agora,
+                "tipo": "video",
+                "video_id": video_id,
+                "canal_id": canal_id,
+                "campos": {
+                    "titulo": titulo,
+                    "descricao": descricao,
+                    "tipo": tipo,
+                    "criado_em": agora,
+                },
+                "status": {e: e == "0_canal" for e in ETAPAS},
+                "artefatos": dict(ARTEFATOS_PADRAO),
+            },
+        )
+    return video_id
+
+
+def _filtro_busca(conn, busca: str):
+    """Trecho SQL (e parâmetros) que filtra `videos v` pelo título."""
+    busca = (busca or "").strip()
+    if not busca:
+        return "", ()
+    if conn.tem_busca and len(busca) >= 3:
+        termo = '"' + busca.replace('"', '""') + '"'
+        return (
+            " AND v.rowid IN (SELECT rowid FROM videos_busca WHERE videos_busca MATCH ?)",
+            (termo,),
+        )
+    padrao = "%" + busca.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return " AND v.titulo LIKE ? ESCAPE '\\'", (padrao,)
+
+
+def _filtro_publicado(publicado: bool | None):
+    if publicado is None:
+        return ""
+    return " AND v.publicado_em IS NOT NULL" if publicado else " AND v.publicado_em IS NULL"
+
+
+def contar_videos(
+    canal_id: str, busca: str = "", publicado: bool | None = None, conn=None
+) -> int:
+    conn = conn or conectar()
+    filtro, params = _filtro_busca(conn, busca)
+    return conn.execute(
+        f"SELECT COUNT(*) FROM videos v WHERE v.canal_id = ?{filtro}"
+        f"{_filtro_publicado(publicado)}",
+        (canal_id, *params),
+    ).fetchone()[0]
+
+
+# -------------------------------------------------------------------
+# Índices secundários (etapa mais avançada e data de publicação)
+# -------------------------------------------------------------------
+_CASOS_FASE = " ".join(
+    f"WHEN '{e}' THEN {i}" for i, e in enumerate(ETAPAS[1:6], start=1)
+)
+
+
+def _atualizar_indices(conn, video_id: str | None = None) -> None:
+    """
+    Recalcula `etapa_max` e `publicado_em` de um vídeo (ou de todos) a
+    partir das linhas de status/artefatos. Roda dentro da transação de quem
+    gravou o status, então o índice nunca fica defasado.
+
+    Para um vídeo, a mudança de etapa acontece agora. Para todos (migração,
+    importação, reconstrução pelo diário), a data da mudança é a última
+    atualização registrada do vídeo, não a hora da recarga.
+    """
+    if video_id:
+        onde, params, desde = "WHERE video_id = ?", (_agora(), video_id), "julianday(?)"
+    else:
+        onde, params, desde = "", (), "julianday(COALESCE(ultima_atualizacao, criado_em))"
+    fase = (
+        f"(SELECT COALESCE(MAX(CASE s.etapa {_CASOS_FASE} END), 0) "
+        f" FROM status s WHERE s.video_id = videos.video_id AND s.concluido)"
+    )
+    # Os SETs enxergam os valores antigos da linha: fase_desde só muda
+    # quando a etapa_max muda
+    conn.execute(
+        f"UPDATE videos SET "
+        f"fase_desde = CASE WHEN etapa_max = {fase} AND fase_desde IS NOT NULL "
+        f"  THEN fase_desde ELSE {desde} END, "
+        f"etapa_max = {fase}, "
+        f"publicado_em = (SELECT COALESCE("
+        f"   (SELECT json_extract(a.valor, '$.published_at') FROM artefatos a"
+        f"    WHERE a.video_id = videos.video_id AND a.chave = 'publicacao_info'"
+        f"    AND json_valid(a.valor)),"
+        f"   s.atualizado_em)"
+        f"  FROM status s WHERE s.video_id = videos.video_id"
+        f"  AND s.etapa = '5_publicacao' AND s.concluido) "
+        f"{onde}",
+        params,
+    )
+
+
+def _recalcular_kpis(conn) -> None:
+    """Refaz a tabela `kpis` do zero (migração e reconstrução pelo diário)."""
+    conn.execute("DELETE FROM kpis")
+    conn.execute(
+        "INSERT INTO kpis (canal_id, fase, qtd, qtd_desde, soma_desde) "
+        "SELECT canal_id, etapa_max, COUNT(*), COUNT(fase_desde), COALESCE(SUM(fase_desde), 0) "
+        "FROM videos GROUP BY canal_id, etapa_max"
+    )
+
+
+def contar_por_fase(canal_id: str, conn=None) -> dict:
+    """
+    Quantidade de vídeos por etapa mais avançada concluída entre 1 e 5
+    (0 = só criado), lida da tabela materializada `kpis`.
+    """
+    return kpis(canal_id, conn=conn)["por_fase"]
+
+
+def kpis(canal_id: str | None = None, conn=None) -> dict:
+    """
+    KPIs pré-calculados de um canal (ou de todos, com `canal_id=None`):
+    vídeos por fase, totais (só criados / em andamento / publicados) e idade
+    média, em dias, dos vídeos parados em cada fase. Custo constante:
+    lê no máximo 6 linhas por canal, independente do tamanho do catálogo.
+    """
+    conn = conn or conectar()
+    onde, params = ("WHERE canal_id = ?", (canal_id,)) if canal_id else ("", ())
+    rows = conn.execute(
+        f"SELECT fase, SUM(qtd) AS qtd, SUM(qtd_desde) AS qtd_desde, SUM(soma_desde) AS soma "
+        f"FROM kpis {onde} "
+        f"GROUP BY fase",
+        params,
+    ).fetchall()
+    agora = conn.execute("SELECT julianday(?)", (_agora(),)).fetchone()[0]
+    por_fase = {i: 0 for i in range(6)}
+    idade = {}
+    for r in rows:
+        por_fase[r["fase"]] = r["qtd"]
+        if r["qtd_desde"]:
+            idade[r["fase"]] = max(agora - r["soma"] / r["qtd_desde"], 0.0)
+    return {
+        "por_fase": por_fase,
+        "total": sum(por_fase.values()),
+        "so_criados": por_fase[0],
+        "em_andamento": sum(por_fase[i] for i in range(1, 5)),
+        "concluidos": por_fase[5],
+        "idade_media_dias": idade,
+    }
+
+
+def proximo_para_renderizar(canal_id: str, conn=None) -> dict | None:
+    """Vídeo mais antigo com áudio pronto e vídeo ainda não gerado (etapa 3)."""
+    conn = conn or conectar()
+    row = conn.execute(
+        "SELECT video_id, titulo, criado_em FROM videos "
+        "WHERE canal_id = ? AND etapa_max = 3 ORDER BY criado_em LIMIT 1",
+        (canal_id,),
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def publicados_desde(canal_id: str, desde: str, conn=None) -> list[dict]:
+    """Vídeos publicados a partir de `desde` (ISO), do mais recente ao mais antigo."""
+    conn = conn or conectar()
+    rows = conn.execute(
+        "SELECT video_id, titulo, publicado_em FROM videos "
+        "WHERE canal_id = ? AND publicado_em >= ? ORDER BY publicado_em DESC",
+        (canal_id, desde),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def publicados_na_semana(canal_id: str, hoje: datetime | None = None, conn=None) -> list[dict]:
+    """Publicados desde a segunda-feira da semana de `hoje`."""
+    hoje = hoje or datetime.now()
+    inicio = (hoje - timedelta(days=hoje.weekday())).date().isoformat()
+    return publicados_desde(canal_id, inicio, conn=conn)
+
+
+def _status_de(conn, video_id):
+    """Mapa {etapa: bool} de um vídeo."""
+    status = {e: False for e in ETAPAS}
+    for r in conn.execute(
+        "SELECT etapa, concluido FROM status WHERE video_id = ?", (video_id,)
+    ):
+        status[r["etapa"]] = bool(r["concluido"])
+    return status
+
+
+def lead_times(video_id: str, conn=None) -> dict:
+    """Segundos gastos em cada etapa concluída (desde a etapa anterior)."""
+    conn = conn or conectar()
+    row = conn.execute("SELECT criado_em FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+    if not row:
+        return {}
+    concluidas = {
+        r["etapa"]: r["atualizado_em"]
+        for r in conn.execute(
+            "SELECT etapa, atualizado_em FROM status WHERE video_id = ? AND concluido",
+            (video_id,),
+        )
+    }
+    anterior = row["criado_em"]
+    tempos = {}
+    for etapa in ETAPAS:
+        ts = concluidas.get(etapa)
+        if not ts:
+            continue
+        if anterior:
+            delta = datetime.fromisoformat(ts) - datetime.fromisoformat(anterior)
+            tempos[etapa] = max(delta.total_seconds(), 0.0)
+        anterior = ts
+    return tempos
+
+
+def listar_videos(
+    canal_id: str,
+    artefatos=(),
+    limite: int | None = None,
+    offset: int = 0,
+    busca: str = "",
+    publicado: bool | None = None,
+    conn=None,
+) -> list[dict]:
+    """
+    Vídeos do canal com status, em ordem de criação. Com `limite`, devolve
+    só uma página (o índice canal_id+criado_em evita varrer o canal todo);
+    `busca` filtra por trecho do título e `publicado` (True/False) pela
+    coluna indexada `publicado_em`. Artefatos só são lidos para as chaves
+    pedidas em `artefatos` (roteiros e afins ficam fora da listagem).
+    """
+    conn = conn or conectar()
+    filtro, params = _filtro_busca(conn, busca)
+    filtro += _filtro_publicado(publicado)
+    pagina = ""
+    if limite is not None:
+        pagina = " LIMIT ? OFFSET ?"
+        params = (*params, int(limite), int(offset))
+    # As etapas concluídas vêm agregadas numa única coluna por vídeo,
+    # evitando materializar 7 linhas de status por vídeo em Python.
+    rows = conn.execute(
+        "SELECT v.video_id, v.canal_id, v.titulo, v.descricao, v.tipo, "
+        "v.criado_em, v.ultima_atualizacao, v.etapa_max, v.publicado_em, "
+        "(SELECT group_concat(s.etapa) FROM status s "
+        " WHERE s.video_id = v.video_id AND s.concluido) AS feitas "
+        f"FROM videos v WHERE v.canal_id = ?{filtro} "
+        f"ORDER BY v.criado_em, v.video_id{pagina}",
+        (canal_id, *params),
+    ).fetchall()
+    videos = []
+    for r in rows:
+        v = dict(r)
+        feitas = v.pop("feitas")
+        feitas = feitas.split(",") if feitas else ()
+        v["status"] = {e: e in feitas for e in ETAPAS}
+        videos.append(v)
+    if artefatos and videos:
+        por_id = {v["video_id"]: v for v in videos}
+        for v in videos:
+            v["artefatos"] = {k: None for k in artefatos}
+        chaves = ",".join("?" * len(artefatos))
+        ids = list(por_id)
+        for i in range(0, len(ids), 500):
+            lote = ids[i : i + 500]
+            for r in conn.execute(
+                f"SELECT video_id, chave, valor FROM artefatos "
+                f"WHERE video_id IN ({','.join('?' * len(lote))}) "
+                f"AND chave IN ({chaves})",
+                (*lote, *artefatos),
+            ):
+                por_id[r["video_id"]]["artefatos"][r["chave"]] = _loads(r["valor"])
+    return videos
+
+
+def obter_video(video_id, com_artefatos: bool = True, conn=None) -> dict | None:
+    """Vídeo completo: campos, status e (por padrão) artefatos."""
+    if not video_id:
+        return None
+    conn = conn or conectar()
+    row = conn.execute(
+        "SELECT video_id, canal_id, titulo, descricao, tipo, criado_em, "
+        "ultima_atualizacao, versao FROM videos WHERE video_id = ?",
+        (video_id,),
+    ).fetchone()
+    if not row:
+        return None
+    video = dict(row)
+    video["status"] = _status_de(conn, video_id)
+    if not com_artefatos:
+        return video
+    # `versoes` guarda a versão lida de cada artefato, para gravar com CAS
+    video["artefatos"], video["versoes"] = {}, {}
+    for r in conn.execute(
+        "SELECT chave, valor, versao FROM artefatos WHERE video_id = ?", (video_id,)
+    ):
+        video["artefatos"][r["chave"]] = _loads(r["valor"])
+        video["versoes"][r["chave"]] = r["versao"]
+    return video
+
+
+def obter_artefato(video_id: str, chave: str, conn=None):
+    conn = conn or conectar()
+    row = conn.execute(
+        "SELECT valor FROM artefatos WHERE video_id = ? AND chave = ?",
+        (video_id, chave),
+    ).fetchone()
+    return _loads(row["valor"]) if row else None
+
+
+def atualizar_video(
+    video_id: str,
+    artefatos: dict | None = None,
+    status: dict | None = None,
+    campos: dict | None = None,
+    versoes: dict | None = None,
+    conn=None,
+) -> None:
+    """
+    Grava, numa única transação, apenas as linhas alteradas de um vídeo:
+    artefatos (chave -> valor JSON), etapas (etapa -> bool) e campos simples
+    (titulo, descricao, tipo). Sempre renova `ultima_atualizacao` e soma 1
+    à versão do vídeo e de cada artefato gravado.
+
+    Com `versoes` ({chave: versão lida}), os artefatos listados só são
+    gravados se ainda estiverem naquela versão; senão nada é gravado e sobe
+    `ConflitoDeVersao` com as chaves em conflito.
+    """
+    conn = conn or conectar()
+    agora = _agora()
+    status = modelos.normalizar_status(status)
+    versoes = versoes or {}
+    with conn:
+        conflitos = []
+        for chave, valor in (artefatos or {}).items():
+            if chave in versoes:
+                gravou = conn.execute(
+                    "UPDATE artefatos SET valor = ?, atualizado_em = ?, "
+                    "versao = versao + 1 WHERE video_id = ? AND chave = ? AND versao = ?",
+                    (_dumps(valor), agora, video_id, chave, versoes[chave]),
+                ).rowcount
+                if not gravou and not versoes[chave]:
+                    # Versão 0 também vale para "ainda não existe"
+                    gravou = conn.execute(
+                        "INSERT INTO artefatos (video_id, chave, valor, atualizado_em, versao) "
+                        "VALUES (?, ?, ?, ?, 1) ON CONFLICT(video_id, chave) DO NOTHING",
+                        (video_id, chave, _dumps(valor), agora),
+                    ).rowcount
+                if not gravou:
+                    conflitos.append(chave)
+                continue
+            conn.execute(
+                "INSERT INTO artefatos (video_id, chave, valor, atualizado_em, versao) "
+                "VALUES (?, ?, ?, ?, 1) ON CONFLICT(video_id, chave) DO UPDATE SET "
+                "valor = excluded.valor, atualizado_em = excluded.atualizado_em, "
+                "versao = versao + 1",
+                (video_id, chave, _dumps(valor), agora),
+            )
+        if conflitos:
+            # Sai do `with` com exceção: a transação inteira é desfeita
+            raise ConflitoDeVersao(f"vídeo {video_id}", conflitos)
+        for etapa, concluido in status.items():
+            conn.execute(
+                "INSERT INTO status (video_id, etapa, concluido, atualizado_em) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(video_id, etapa) DO UPDATE SET "
+                "atualizado_em = CASE WHEN concluido = excluded.concluido "
+                "  THEN atualizado_em ELSE excluded.atualizado_em END, "
+                "concluido = excluded.concluido",
+                (video_id, etapa, int(bool(concluido)), agora),
+            )
+        sets = ["ultima_atualizacao = ?", "versao = versao + 1"]
+        params = [agora]
+        for campo in ("titulo", "descricao", "tipo"):
+            if campos and campo in campos:
+                sets.append(f"{campo} = ?")
+                params.append(campos[campo])
+        conn.execute(
+            f"UPDATE videos SET {', '.join(sets)} WHERE video_id = ?",
+            (*params, video_id),
+        )
+        if status or "publicacao_info" in (artefatos or {}):
+            _atualizar_indices(conn, video_id)
+        _registrar(
+            conn,
+            {
+                "ts": agora,
+                "tipo": "video",
+                "video_id": video_id,
+                "campos": {
+                    k: v for k, v in (campos or {}).items() if k in ("titulo", "descricao", "tipo")
+                },
+                "status": status,
+                "artefatos": artefatos or {},
+            },
+        )
+
+
+def alterar_artefato(
+    video_id: str,
+    chave: str,
+    funcao,
+    status: dict | None = None,
+    conn=None,
+):
+    """
+    Ler-alterar-gravar de um artefato com compare-and-swap: `funcao` recebe
+    o valor atual (uma cópia) e devolve o novo. Se outro processo gravar o
+    mesmo artefato no meio, relê só esse campo e chama `funcao` de novo.
+    Devolve o valor gravado.
+    """
+    conn = conn or conectar()
+    for _ in range(TENTATIVAS_CAS):
+        row = conn.execute(
+            "SELECT valor, versao FROM artefatos WHERE video_id = ? AND chave = ?",
+            (video_id, chave),
+        ).fetchone()
+        atual = _loads(row["valor"]) if row else None
+        novo = funcao(copy.deepcopy(atual))
+        try:
+            atualizar_video(
+                video_id,
+                artefatos={chave: novo},
+                status=status,
+                versoes={chave: row["versao"] if row else 0},
+                conn=conn,
+            )
+            return novo
+        except ConflitoDeVersao:
+            continue
+    raise ConflitoDeVersao(f"vídeo {video_id}", [chave])
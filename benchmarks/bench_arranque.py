@@ -0,0 +1,96 @@
+"""
+Benchmark: arranque a frio de cada página (até o primeiro render completo).
+
+Cada medição roda num processo Python novo, como a primeira visita à
+página depois de subir o servidor: o Streamlit já está importado (o
+servidor carrega ele antes), mas os módulos da página não. Mede o tempo de
+`AppTest.run()`, que executa o script da página de cima a baixo, com um
+canal e um vídeo selecionados num banco temporário.
+
+Uso:
+    python benchmarks/bench_arranque.py
+    python benchmarks/bench_arranque.py --sem-segredos   # secrets vazios
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import banco  # noqa: E402
+
+PAGINAS = ["app.py"] + sorted(
+    os.path.join("pages", f) for f in os.listdir(os.path.join(RAIZ, "pages")) if f.endswith(".py")
+)
+
+# Roda no processo filho: argv = [pagina, canal_id, video_id, segredos_json]
+FILHO = """
+import sys, json, time
+from streamlit.testing.v1 import AppTest
+
+pagina, canal_id, video_id, segredos = sys.argv[1], sys.argv[2], sys.argv[3], json.loads(sys.argv[4])
+at = AppTest.from_file(pagina, default_timeout=120)
+for k, v in segredos.items():
+    at.secrets[k] = v
+at.session_state["canal_atual_id"] = canal_id
+at.session_state["video_atual_id"] = video_id
+t0 = time.perf_counter()
+at.run()
+ms = (time.perf_counter() - t0) * 1000
+erro = at.exception[0].message.splitlines()[0] if at.exception else ""
+print(json.dumps({"ms": ms, "erro": erro, "modulos": len(sys.modules)}))
+"""
+
+
+def medir_pagina(pagina, canal_id, video_id, segredos, env):
+    saida = subprocess.run(
+        [sys.executable, "-c", FILHO, os.path.join(RAIZ, pagina), canal_id, video_id, json.dumps(segredos)],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--sem-segredos", action="store_true")
+    ap.add_argument("--paginas", nargs="*", default=PAGINAS)
+    args = ap.parse_args()
+
+    segredos = {} if args.sem_segredos else {"YOUTUBE_API_KEY": "x", "GROQ_API_KEY": "x"}
+    with tempfile.TemporaryDirectory() as tmp:
+        banco.DB_PATH = os.path.join(tmp, "p.db")
+        canal_id = banco.criar_canal({"nome": "Canal de teste", "nicho": "história"})
+        video_id = banco.criar_video(canal_id, "Vídeo de teste")
+        env = {
+            **os.environ,
+            "PIPELINE_DB_PATH": banco.DB_PATH,
+            "PYTHONPATH": RAIZ + os.pathsep + os.environ.get("PYTHONPATH", ""),
+        }
+        env.pop("GROQ_API_KEY", None)
+
+        print(f"Arranque a frio por página (mediana de {args.repeticoes}, ms)")
+        for pagina in args.paginas:
+            medidas = [
+                medir_pagina(pagina, canal_id, video_id, segredos, env)
+                for _ in range(args.repeticoes)
+            ]
+            ms = statistics.median(m["ms"] for m in medidas)
+            erro = medidas[-1]["erro"]
+            print(
+                f"  {pagina:<32} {ms:8.0f}  ({medidas[-1]['modulos']} módulos)"
+                + (f"  ERRO: {erro[:70]}" if erro else "")
+            )
+
+
+if __name__ == "__main__":
+    main()
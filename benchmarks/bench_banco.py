@@ -0,0 +1,177 @@
+"""
+Benchmark: carga de página do monitor com o dict em sessão vs. banco SQLite.
+
+Simula o que o app.py faz a cada rerun para o canal selecionado (lista de
+canais, vídeos do canal com status e o vídeo em foco com artefatos) e
+também a carga "a frio" de um processo novo: desserializar o dict inteiro
+de um JSON vs. abrir o SQLite e ler só as linhas necessárias.
+
+Uso:
+    python benchmarks/bench_banco.py --canais 100 --videos 5000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+
+
+def roteiro_fake(i):
+    return {
+        "id": f"r{i}",
+        "titulo_video": f"Vídeo {i}",
+        "roteiro": {"hook": ["texto " * 50]},
+        "image_prompts": {"hook": ["cinematic wide shot"]},
+    }
+
+
+def montar_dict(n_canais, n_videos):
+    agora = datetime.now().isoformat()
+    db = {"canais": {}}
+    for c in range(n_canais):
+        videos = {}
+        for v in range(n_videos):
+            videos[f"c{c}v{v}"] = {
+                "titulo": f"Vídeo {v} do canal {c}",
+                "descricao": "",
+                "status": {e: (i <= v % 7) for i, e in enumerate(banco.ETAPAS)},
+                "artefatos": {
+                    **banco.ARTEFATOS_PADRAO,
+                    "roteiro": roteiro_fake(v) if v % 3 == 0 else None,
+                },
+                "criado_em": agora,
+                "ultima_atualizacao": agora,
+            }
+        db["canais"][f"c{c}"] = {
+            "nome": f"Canal {c}",
+            "nicho": "teste",
+            "idioma": "pt-BR",
+            "criado_em": agora,
+            "videos": videos,
+        }
+    return db
+
+
+def popular_sqlite(conn, db):
+    with conn:
+        for cid, canal in db["canais"].items():
+            conn.execute(
+                "INSERT INTO canais (canal_id, nome, config, criado_em) VALUES (?, ?, ?, ?)",
+                (cid, canal["nome"], json.dumps({"nicho": canal["nicho"]}), canal["criado_em"]),
+            )
+            conn.executemany(
+                "INSERT INTO videos (video_id, canal_id, titulo, descricao, criado_em, "
+                "ultima_atualizacao) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (vid, cid, v["titulo"], v["descricao"], v["criado_em"], v["ultima_atualizacao"])
+                    for vid, v in canal["videos"].items()
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO status (video_id, etapa, concluido, atualizado_em) VALUES (?, ?, ?, ?)",
+                [
+                    (vid, e, int(ok), v["criado_em"])
+                    for vid, v in canal["videos"].items()
+                    for e, ok in v["status"].items()
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO artefatos (video_id, chave, valor, atualizado_em) VALUES (?, ?, ?, ?)",
+                [
+                    (vid, k, json.dumps(val), v["criado_em"])
+                    for vid, v in canal["videos"].items()
+                    for k, val in v["artefatos"].items()
+                ],
+            )
+
+
+def etapa_atual(status_dict):
+    ultima = -1
+    for i, k in enumerate(banco.ETAPAS):
+        if status_dict.get(k):
+            ultima = i
+    return ultima, all(status_dict.get(k, False) for k in banco.ETAPAS)
+
+
+def pagina_dict(db, canal_id, video_id):
+    nomes = [c["nome"] for c in db["canais"].values()]
+    canal = db["canais"][canal_id]
+    rows = [
+        (vid, v["titulo"], *etapa_atual(v["status"]))
+        for vid, v in canal["videos"].items()
+    ]
+    video = canal["videos"][video_id]
+    return nomes, rows, video
+
+
+def pagina_sqlite(conn, canal_id, video_id):
+    nomes = [c["nome"] for c in banco.listar_canais(conn=conn)]
+    rows = [
+        (v["video_id"], v["titulo"], *etapa_atual(v["status"]))
+        for v in banco.listar_videos(canal_id, conn=conn)
+    ]
+    video = banco.obter_video(video_id, conn=conn)
+    return nomes, rows, video
+
+
+def medir(fn, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        tempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tempos)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--canais", type=int, default=100)
+    ap.add_argument("--videos", type=int, default=5000)
+    ap.add_argument("--repeticoes", type=int, default=20)
+    args = ap.parse_args()
+
+    print(f"Montando {args.canais} canais × {args.videos} vídeos...")
+    db = montar_dict(args.canais, args.videos)
+    canal_id = f"c{args.canais // 2}"
+    video_id = f"{canal_id}v{args.videos // 2}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho_db = os.path.join(tmp, "bench.db")
+        caminho_json = os.path.join(tmp, "bench.json")
+
+        conn = banco.conectar(caminho_db)
+        t0 = time.perf_counter()
+        popular_sqlite(conn, db)
+        print(f"Carga inicial do SQLite: {time.perf_counter() - t0:.1f}s")
+        with open(caminho_json, "w") as f:
+            json.dump(db, f)
+
+        print("\nCarga de página (mediana, ms)")
+        print(f"  dict em sessão : {medir(lambda: pagina_dict(db, canal_id, video_id), args.repeticoes):8.2f}")
+        print(f"  SQLite (WAL)   : {medir(lambda: pagina_sqlite(conn, canal_id, video_id), args.repeticoes):8.2f}")
+
+        def frio_json():
+            with open(caminho_json) as f:
+                pagina_dict(json.load(f), canal_id, video_id)
+
+        def frio_sqlite():
+            banco._local.conns.pop(caminho_db).close()
+            pagina_sqlite(banco.conectar(caminho_db), canal_id, video_id)
+
+        print("\nProcesso novo / refresh (mediana, ms)")
+        print(f"  dict via JSON  : {medir(frio_json, 3):8.2f}")
+        print(f"  SQLite (WAL)   : {medir(frio_sqlite, args.repeticoes):8.2f}")
+
+        banco._local.conns.pop(caminho_db).close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: restauração do banco a partir do diário (snapshot + cauda).
+
+Gera um diário com N vídeos e vários eventos por vídeo, compacta, grava uma
+cauda de eventos novos e mede o tempo de `diario.restaurar` e de
+`diario.reconstruir_banco` num SQLite vazio.
+
+Uso:
+    python benchmarks/bench_diario.py --videos 5000 --cauda 2000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+import diario  # noqa: E402
+
+
+def gerar_eventos(n_videos, inicio):
+    yield {"ts": inicio.isoformat(), "tipo": "canal", "canal_id": "c0",
+           "campos": {"nome": "Canal", "criado_em": inicio.isoformat()}}
+    for v in range(n_videos):
+        t = inicio + timedelta(minutes=v)
+        vid = f"v{v}"
+        yield {"ts": t.isoformat(), "tipo": "video", "video_id": vid, "canal_id": "c0",
+               "campos": {"titulo": f"Vídeo {v}", "descricao": "", "criado_em": t.isoformat()},
+               "status": {e: e == "0_canal" for e in banco.ETAPAS},
+               "artefatos": dict(banco.ARTEFATOS_PADRAO)}
+        for i, etapa in enumerate(banco.ETAPAS[1:v % 7 + 1], start=1):
+            yield {"ts": (t + timedelta(hours=i)).isoformat(), "tipo": "video",
+                   "video_id": vid, "campos": {}, "status": {etapa: True},
+                   "artefatos": {"roteiro": {"hook": ["texto " * 40]}} if i == 1 else {}}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--videos", type=int, default=5000)
+    ap.add_argument("--cauda", type=int, default=2000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pasta = os.path.join(tmp, "diario")
+        os.makedirs(pasta)
+        eventos = list(gerar_eventos(args.videos, datetime(2026, 1, 1)))
+        with open(os.path.join(pasta, diario.ARQ_EVENTOS), "w") as f:
+            for ev in eventos:
+                f.write(json.dumps(ev, ensure_ascii=False) + "\n")
+
+        t0 = time.perf_counter()
+        diario.restaurar(pasta)
+        print(f"Replay completo ({len(eventos)} eventos): {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+        t0 = time.perf_counter()
+        diario.compactar(pasta)
+        print(f"Compactação: {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+        for i in range(args.cauda):
+            diario.registrar(pasta, {"tipo": "video", "video_id": f"v{i % args.videos}",
+                                     "status": {"4_video": True}, "artefatos": {}})
+
+        t0 = time.perf_counter()
+        estado = diario.restaurar(pasta)
+        print(f"Snapshot + cauda de {args.cauda} eventos: {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+        conn = banco.conectar(os.path.join(tmp, "vazio.db"))
+        t0 = time.perf_counter()
+        diario.reconstruir_banco(conn, estado)
+        print(f"Reconstrução do SQLite: {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+        t0 = time.perf_counter()
+        for vid in list(estado["videos"])[:1000]:
+            banco.lead_times(vid, conn=conn)
+        print(f"Lead times de 1000 vídeos: {(time.perf_counter() - t0) * 1000:.1f} ms")
+        banco._local.conns.pop(os.path.join(tmp, "vazio.db")).close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: exportação/importação colunar do banco (`exportacao.py`).
+
+Popula um SQLite com N vídeos (status variados e publicacao_info em parte
+deles), exporta para Parquet e Arrow IPC e reimporta num banco vazio.
+
+Uso:
+    python benchmarks/bench_exportacao.py --videos 1000000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+import exportacao  # noqa: E402
+
+
+def popular(conn, n_videos):
+    ts = "2026-01-02T00:00:00"
+    with conn:
+        conn.execute(
+            "INSERT INTO canais (canal_id, nome, config, criado_em) "
+            "VALUES ('c0', 'Canal', '{}', ?)",
+            (ts,),
+        )
+        conn.executemany(
+            "INSERT INTO videos (video_id, canal_id, titulo, criado_em, "
+            "ultima_atualizacao, fase_desde) VALUES (?, 'c0', ?, ?, ?, julianday(?4))",
+            ((f"v{i}", f"Vídeo {i}", ts, ts) for i in range(n_videos)),
+        )
+        conn.executemany(
+            "INSERT INTO status (video_id, etapa, concluido, atualizado_em) VALUES (?, ?, ?, ?)",
+            (
+                (f"v{i}", e, int(j <= i % 7), ts)
+                for i in range(n_videos)
+                for j, e in enumerate(banco.ETAPAS)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO artefatos (video_id, chave, valor, atualizado_em) "
+            "VALUES (?, 'publicacao_info', ?, ?)",
+            (
+                (f"v{i}", json.dumps({"privacy": "public", "manual_views": i}), ts)
+                for i in range(0, n_videos, 3)
+            ),
+        )
+        banco._atualizar_indices(conn)
+        banco._recalcular_kpis(conn)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--videos", type=int, default=200_000)
+    ap.add_argument("--lote", type=int, default=exportacao.TAMANHO_LOTE)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = banco.conectar(os.path.join(tmp, "origem", "p.db"))
+        t0 = time.perf_counter()
+        popular(conn, args.videos)
+        print(f"População de {args.videos} vídeos: {time.perf_counter() - t0:.1f}s")
+
+        for formato in exportacao.FORMATOS:
+            pasta = os.path.join(tmp, formato)
+            res = exportacao.exportar(pasta, formato=formato, tamanho_lote=args.lote, conn=conn)
+            tamanho = sum(os.path.getsize(c) for c in res["arquivos"]) / 1024 / 1024
+            print(f"Exportação {formato:8}: {res['segundos']:6.1f}s  ({tamanho:.1f} MB)")
+
+        destino = banco.conectar(os.path.join(tmp, "destino", "p.db"))
+        res = exportacao.importar(os.path.join(tmp, "parquet"), tamanho_lote=args.lote, conn=destino)
+        print(f"Importação parquet  : {res['segundos']:6.1f}s  ({res['videos']} vídeos)")
+
+
+if __name__ == "__main__":
+    main()
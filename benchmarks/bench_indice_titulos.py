@@ -0,0 +1,82 @@
+"""
+Benchmark: índice invertido de n-gramas (`indice_titulos.py`).
+
+Indexa N títulos sintéticos (em lotes, como chegam das análises), mede a
+reindexação incremental de um lote com views novas e o tempo das consultas
+"top n-gramas por mediana de views" e "títulos com <termo> por views".
+
+Uso:
+    python benchmarks/bench_indice_titulos.py --titulos 200000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+import indice_titulos  # noqa: E402
+from bench_banco import medir  # noqa: E402
+
+PALAVRAS = ["como", "ganhar", "dinheiro", "segredo", "rápido", "história", "roma",
+            "nunca", "fácil", "império", "milionário", "sempre", "guerra", "verdade",
+            "antiga", "egito", "faraó", "mistério", "revelado", "ninguém", "conta",
+            "perigoso", "incrível", "bizarro", "descoberta", "cientistas", "oceano"]
+
+
+def gerar(n, semente=7):
+    rnd = random.Random(semente)
+    for i in range(n):
+        partes = rnd.choices(PALAVRAS, k=rnd.randint(4, 10))
+        if rnd.random() < 0.3:
+            partes.insert(0, str(rnd.randint(1, 20)))
+        yield {
+            "video_id": f"v{i}",
+            "titulo": " ".join(partes),
+            "views": int(rnd.paretovariate(1.2) * 1000),
+            "channel_id": f"c{i % 50}",
+        }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--titulos", type=int, default=200_000)
+    ap.add_argument("--lote", type=int, default=5_000)
+    ap.add_argument("--repeticoes", type=int, default=5)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = banco.conectar(os.path.join(tmp, "p.db"))
+        t0 = time.perf_counter()
+        lote = []
+        for v in gerar(args.titulos):
+            lote.append(v)
+            if len(lote) >= args.lote:
+                indice_titulos.indexar(lote, "historia", conn=conn)
+                lote = []
+        if lote:
+            indice_titulos.indexar(lote, "historia", conn=conn)
+        print(f"Indexação de {args.titulos} títulos: {time.perf_counter() - t0:.1f}s")
+
+        atualizados = [dict(v, views=v["views"] + 1) for v in gerar(500)]
+        t0 = time.perf_counter()
+        res = indice_titulos.indexar(atualizados, "historia", conn=conn)
+        print(f"Reindexação de 500 vídeos com views novas: "
+              f"{(time.perf_counter() - t0) * 1000:.0f} ms ({res['ngramas_recalculados']} n-gramas)")
+
+        print(f"\nConsultas (mediana de {args.repeticoes}, ms)")
+        for nome, fn in (
+            ("top 20 n-gramas por mediana", lambda: indice_titulos.top_ngramas("historia", conn=conn)),
+            ("top 20 bigramas por mediana", lambda: indice_titulos.top_ngramas("historia", tamanho=2, conn=conn)),
+            ("títulos com 'segredo'       ", lambda: indice_titulos.buscar("segredo", "historia", conn=conn)),
+            ("títulos com 'segredo revelado'", lambda: indice_titulos.buscar("segredo revelado", conn=conn)),
+        ):
+            print(f"  {nome}: {medir(fn, args.repeticoes):8.2f}")
+
+
+if __name__ == "__main__":
+    main()
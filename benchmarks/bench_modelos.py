@@ -0,0 +1,97 @@
+"""
+Benchmark: registros compactos (`modelos.py`) vs. dicts aninhados.
+
+Mede memória do estado em processo (tracemalloc) e a vazão de
+serialização/desserialização de um catálogo inteiro: dicts + `json` da
+biblioteca padrão (formato antigo do snapshot) vs. registros em listas +
+codec de `modelos` (orjson quando instalado).
+
+Uso:
+    python benchmarks/bench_modelos.py --videos 20000
+"""
+
+import os
+import sys
+import json
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import modelos  # noqa: E402
+from bench_banco import medir  # noqa: E402
+
+
+def montar_dicts(n_videos):
+    agora = "2026-01-01T12:00:00"
+    return {
+        f"v{v}": {
+            "canal_id": "c0",
+            "titulo": f"Vídeo {v} sobre história antiga",
+            "descricao": "",
+            "tipo": "longo",
+            "criado_em": agora,
+            "ultima_atualizacao": agora,
+            "status": {e: i <= v % 7 for i, e in enumerate(modelos.ETAPAS)},
+            "artefatos": {"roteiro": None, "thumbs": None, "audio_path": None,
+                          "video_path": None, "youtube_url": None},
+        }
+        for v in range(n_videos)
+    }
+
+
+def memoria(fn):
+    tracemalloc.start()
+    obj = fn()
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, atual
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--videos", type=int, default=20000)
+    ap.add_argument("--repeticoes", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"Codec de modelos: {'orjson' if modelos.orjson else 'json (stdlib)'}")
+    dicts, mem_dicts = memoria(lambda: montar_dicts(args.videos))
+    registros, mem_regs = memoria(
+        lambda: {vid: modelos.Video.de_dict(vid, d) for vid, d in dicts.items()}
+    )
+    print(f"\nMemória do estado ({args.videos} vídeos)")
+    print(f"  dicts aninhados : {mem_dicts / 1024 / 1024:8.1f} MB")
+    print(f"  registros slots : {mem_regs / 1024 / 1024:8.1f} MB")
+
+    bruto_json = json.dumps(dicts, ensure_ascii=False).encode("utf-8")
+    listas = {vid: v.para_lista() for vid, v in registros.items()}
+    bruto_modelos = modelos.dumps(listas)
+    mb_json = len(bruto_json) / 1024 / 1024
+    mb_modelos = len(bruto_modelos) / 1024 / 1024
+    print(f"\nTamanho serializado: json {mb_json:.1f} MB | modelos {mb_modelos:.1f} MB")
+
+    def salvar_json():
+        json.dumps(dicts, ensure_ascii=False).encode("utf-8")
+
+    def carregar_json():
+        json.loads(bruto_json)
+
+    def salvar_modelos():
+        modelos.dumps({vid: v.para_lista() for vid, v in registros.items()})
+
+    def carregar_modelos():
+        {vid: modelos.Video.de_lista(v) for vid, v in modelos.loads(bruto_modelos).items()}
+
+    print("\nSerialização / desserialização (mediana, ms | MB/s)")
+    for nome, fn, mb in (
+        ("salvar   dicts+json   ", salvar_json, mb_json),
+        ("salvar   registros    ", salvar_modelos, mb_modelos),
+        ("carregar dicts+json   ", carregar_json, mb_json),
+        ("carregar registros    ", carregar_modelos, mb_modelos),
+    ):
+        ms = medir(fn, args.repeticoes)
+        print(f"  {nome}: {ms:8.1f} ms | {mb / (ms / 1000):7.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: listagem completa vs. paginação + busca indexada (monitor).
+
+Compara o que o monitor fazia a cada rerun (listar todos os vídeos do canal
+e montar as linhas da tabela) com o modo paginado: contagem, uma página de
+50 vídeos e uma busca por trecho do título no índice FTS5.
+
+Uso:
+    python benchmarks/bench_paginacao.py --videos 10000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+from bench_banco import montar_dict, popular_sqlite, etapa_atual  # noqa: E402
+
+PAGINA = 50
+
+
+def medir(fn, repeticoes=20):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        tempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tempos)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--canais", type=int, default=3)
+    ap.add_argument("--videos", type=int, default=10000)
+    args = ap.parse_args()
+
+    db = montar_dict(args.canais, args.videos)
+    canal_id = "c1"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "bench.db")
+        conn = banco.conectar(caminho)
+        popular_sqlite(conn, db)
+        print(f"{args.videos} vídeos por canal · FTS5: {conn.tem_busca}\n")
+
+        def completo():
+            return [
+                (v["video_id"], v["titulo"], *etapa_atual(v["status"]))
+                for v in banco.listar_videos(canal_id, conn=conn)
+            ]
+
+        def paginado(pagina):
+            banco.contar_videos(canal_id, conn=conn)
+            return [
+                (v["video_id"], v["titulo"], *etapa_atual(v["status"]))
+                for v in banco.listar_videos(
+                    canal_id, limite=PAGINA, offset=(pagina - 1) * PAGINA, conn=conn
+                )
+            ]
+
+        def busca(termo):
+            banco.contar_videos(canal_id, busca=termo, conn=conn)
+            return banco.listar_videos(canal_id, limite=PAGINA, busca=termo, conn=conn)
+
+        print("Mediana por rerun (ms)")
+        print(f"  lista completa (antes)   : {medir(completo, 5):8.2f}")
+        print(f"  1ª página + contagem     : {medir(lambda: paginado(1)):8.2f}")
+        meio = args.videos // PAGINA // 2
+        print(f"  página {meio:<4} + contagem  : {medir(lambda: paginado(meio)):8.2f}")
+        print(f"  busca '{args.videos // 2}' (FTS5)    : {medir(lambda: busca(str(args.videos // 2))):8.2f}")
+        print(f"  busca 'canal 1' (ampla)  : {medir(lambda: busca('canal 1')):8.2f}")
+        banco._local.conns.pop(caminho).close()
+
+
+if __name__ == "__main__":
+    main()
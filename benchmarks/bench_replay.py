@@ -0,0 +1,94 @@
+"""
+Benchmark/teste de carga da análise de canais contra o replay local da
+YouTube API (`youtube_replay.py`), sem rede nem quota.
+
+Grava um cenário sintético, sobe o servidor com latência (e, opcionalmente,
+erros injetados) e roda o caminho do Laboratório: resolução de @handles em
+lote e análise de todos os canais em paralelo, com o cliente real do
+googleapiclient apontado para o replay.
+
+Uso:
+    python benchmarks/bench_replay.py --canais 20 --videos 500 --latencia-ms 50
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+import cache_api  # noqa: E402
+import cliente_youtube  # noqa: E402
+import rastreador  # noqa: E402
+import resolvedor  # noqa: E402
+import youtube_replay  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--canais", type=int, default=20)
+    ap.add_argument("--videos", type=int, default=500)
+    ap.add_argument("--latencia-ms", type=float, default=50)
+    ap.add_argument("--jitter-ms", type=float, default=10)
+    ap.add_argument("--taxa-erro", type=float, default=0.0)
+    ap.add_argument("--threads", type=int, default=rastreador.THREADS)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        banco.DB_PATH = os.path.join(tmp, "p.db")
+        pasta = os.path.join(tmp, "gravacoes")
+        t0 = time.perf_counter()
+        youtube_replay.gerar_cenario(pasta, args.canais, args.videos)
+        print(f"Cenário: {args.canais} canais x {args.videos} vídeos ({time.perf_counter() - t0:.1f}s)")
+
+        servidor, url = youtube_replay.servir_em_segundo_plano(
+            pasta=pasta,
+            latencia_ms=args.latencia_ms,
+            jitter_ms=args.jitter_ms,
+            taxa_erro=args.taxa_erro,
+            semente=1,
+        )
+
+        def criar():
+            return cliente_youtube.criar_cliente(endpoint=url)
+
+        links = [f"https://www.youtube.com/@canalreplay{c}" for c in range(args.canais)]
+        t0 = time.perf_counter()
+        with rastreador.contexto("bench", "resolver"):
+            resolvidos, uso, erros = resolvedor.resolver_varios(criar, links, threads=args.threads)
+        ok = sum(1 for c in resolvidos.values() if c)
+        print(
+            f"Resolução de {len(links)} @handles: {time.perf_counter() - t0:.2f}s "
+            f"({ok} ok, {len(erros)} erros, {uso['retentativas']} retentativas)"
+        )
+
+        ids = [c for c in resolvidos.values() if c]
+        for rodada in ("fria (API)", "quente (cache em disco)"):
+            t0 = time.perf_counter()
+            with rastreador.contexto("bench", f"análise {rodada}"):
+                analises, erros = rastreador.analisar_varios(criar, ids, threads=args.threads)
+            total = time.perf_counter() - t0
+            mais_lento = max((a["segundos"] for a in analises), default=0)
+            soma = sum(a["segundos"] for a in analises)
+            quota = sum(a["uso"]["quota"] for a in analises)
+            retentativas = sum(a["uso"]["retentativas"] for a in analises)
+            print(
+                f"Análise em lote, {rodada}: {total:.2f}s (canal mais lento {mais_lento:.2f}s, "
+                f"soma {soma:.1f}s) | {quota} unidades | {retentativas} retentativas "
+                f"| {len(erros)} erros"
+            )
+
+        print(f"\nServidor: {servidor.estatisticas}")
+        print(f"Cache: {cache_api.resumo()}")
+        print(f"Quota do dia: {rastreador.LIMITADOR.situacao()}")
+        for linha in rastreador.uso_por_contexto():
+            print(f"  {linha['acao']:<28} {linha['quota']:>5} unidades, "
+                  f"{linha['retentativas']} retentativas, {linha['erros']} erros")
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Benchmark: geração de roteiro (`roteiro_ia.py`) contra um modelo simulado.
+
+O `ModeloSimulado` imita a interface `chat.completions.create` do SDK da
+Groq: responde ao prompt de roteiro completo, ao de planejamento e ao de
+um bloco só com JSON sintético do tamanho pedido (`ESPECIFICACAO`), em
+streaming, a `--tokens-s` tokens por segundo (~4 caracteres por token)
+depois de `--latencia-ms`, e corta a resposta em `max_tokens` como a API.
+
+Compara uma chamada só (sem e com streaming) com o modo planejamento +
+blocos em paralelo: tempo até o primeiro bloco, tempo total e quantas
+palavras do roteiro chegaram inteiras. Depois repete o modo paralelo com o
+cache de respostas (`cache_llm`) já preenchido e com `ignorar_cache`. Usa
+um banco temporário, então cada execução começa com o cache vazio. Para
+o modo paralelo, mostra também o que `telemetria_llm` registrou (espera na
+fila, primeiro token, tokens/s).
+
+Por fim, a recuperação de respostas cortadas: `completar` sobre o roteiro
+que a chamada única deixou pela metade, comparado com refazer tudo, e
+quantos blocos `ler_tolerante` tira de um JSON cortado ou com defeitos.
+
+Uso:
+    python benchmarks/bench_roteiro.py --tokens-s 250
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+from types import SimpleNamespace as NS
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+import cache_llm  # noqa: E402
+import roteiro_ia  # noqa: E402
+import telemetria_llm  # noqa: E402
+from bench_banco import medir  # noqa: E402
+
+CARACTERES_POR_TOKEN = 4
+PALAVRA = "palavra "  # 8 caracteres ~ 2 tokens, como o português no Llama
+CONTEXTO = dict(
+    titulo_video="A queda de Roma",
+    briefing="",
+    objetivo="Documentário inspirador",
+    persona="Adultos curiosos",
+    tom="Conversado",
+    restricoes="",
+    canal_nome="Canal",
+    canal_nicho="história",
+)
+_POR_DESCRICAO = {roteiro_ia._descricao(b): b for b in roteiro_ia.BLOCOS}
+
+
+def bloco_sintetico(bloco: str) -> dict:
+    n, palavras = roteiro_ia.ESPECIFICACAO[bloco]
+    return {
+        "paragrafos": [(PALAVRA * (palavras // n)).strip() for _ in range(n)],
+        "image_prompts": ["cinematic wide shot of an ancient city at dawn, 16:9"] * n,
+    }
+
+
+def resposta_para(prompt: str) -> dict:
+    resumo = {"hook": "gancho", "promessa": "promessa", "estrutura": "estrutura"}
+    if "NÃO escreva o roteiro ainda" in prompt:
+        return {"resumo": resumo, "plano": {b: "o que acontece " * 8 for b in roteiro_ia.BLOCOS}}
+    pedido = re.search(r'Escreva SOMENTE o bloco "(.+?)"', prompt)
+    if pedido:
+        return bloco_sintetico(_POR_DESCRICAO[pedido.group(1)])
+    return {"resumo": resumo, **{b: bloco_sintetico(b) for b in roteiro_ia.BLOCOS}}
+
+
+class ModeloSimulado:
+    def __init__(self, tokens_s: float, latencia_ms: float):
+        self.tokens_s = tokens_s
+        self.latencia_ms = latencia_ms
+        self.chat = NS(completions=self)
+        self.chamadas = 0
+
+    def create(self, messages, max_tokens=roteiro_ia.MAX_TOKENS, stream=False, **_):
+        self.chamadas += 1
+        texto = json.dumps(resposta_para(messages[-1]["content"]), ensure_ascii=False)
+        fim = "stop"
+        if len(texto) > max_tokens * CARACTERES_POR_TOKEN:
+            texto, fim = texto[: max_tokens * CARACTERES_POR_TOKEN], "length"
+        tokens = len(texto) // CARACTERES_POR_TOKEN
+        prompt = sum(len(m["content"]) for m in messages) // CARACTERES_POR_TOKEN
+        passo = CARACTERES_POR_TOKEN * 4  # a Groq manda alguns tokens por pedaço
+        intervalo = 4 / self.tokens_s
+
+        def pedacos():
+            time.sleep(self.latencia_ms / 1000)
+            for i in range(0, len(texto), passo):
+                time.sleep(intervalo)
+                yield NS(choices=[NS(delta=NS(content=texto[i : i + passo]), finish_reason=None)])
+            yield NS(
+                choices=[NS(delta=NS(content=""), finish_reason=fim)],
+                x_groq=NS(usage=NS(prompt_tokens=prompt, completion_tokens=tokens, total_tokens=prompt + tokens)),
+            )
+
+        if stream:
+            return pedacos()
+        for _ in pedacos():
+            pass
+        return NS(choices=[NS(message=NS(content=texto), finish_reason=fim)], usage=NS(prompt_tokens=prompt, completion_tokens=tokens, total_tokens=prompt + tokens))
+
+
+def palavras(blocos: dict) -> int:
+    total = 0
+    for bloco in roteiro_ia.BLOCOS:
+        paragrafos, _ = roteiro_ia.normalizar_bloco(blocos.get(bloco))
+        total += sum(len(p.split()) for p in paragrafos)
+    return total
+
+
+def rodar(nome, gerar):
+    chegadas = {}
+    t0 = time.perf_counter()
+
+    def ao_bloco(chave, _):
+        if chave in roteiro_ia.BLOCOS:
+            chegadas.setdefault(chave, time.perf_counter() - t0)
+
+    resultado = gerar(ao_bloco)
+    total = time.perf_counter() - t0
+    primeiro = min(chegadas.values(), default=float("nan"))
+    print(
+        f"  {nome:<34} 1º bloco {primeiro:6.1f}s | total {total:6.1f}s | "
+        f"{len(chegadas)}/8 blocos, {palavras(resultado['blocos'])} palavras | "
+        f"{resultado['tokens']} tokens ({resultado.get('tokens_poupados', 0)} do cache) | "
+        f"fim={resultado['fim']}"
+    )
+    return resultado, total
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tokens-s", type=float, default=250)
+    ap.add_argument("--latencia-ms", type=float, default=300)
+    ap.add_argument("--concorrencia", type=int, default=roteiro_ia.CONCORRENCIA)
+    args = ap.parse_args()
+    banco.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_roteiro.db")
+
+    alvo = sum(p for _, p in roteiro_ia.ESPECIFICACAO.values())
+    print(f"Roteiro de {alvo} palavras, modelo simulado a {args.tokens_s:.0f} tokens/s")
+    modelo = ModeloSimulado(args.tokens_s, args.latencia_ms)
+    usuario = roteiro_ia.montar_prompt(**CONTEXTO)
+
+    t0 = time.perf_counter()
+    modelo.create([{"role": "user", "content": usuario}])
+    print(f"  {'uma chamada, sem streaming':<34} 1º bloco {time.perf_counter() - t0:6.1f}s")
+    truncado, _ = rodar(
+        "uma chamada, streaming",
+        lambda ao_bloco: roteiro_ia.gerar_em_fluxo(modelo, usuario, ao_bloco=ao_bloco),
+    )
+    completo, t_completo = rodar(
+        f"plano + paralelo ({args.concorrencia} simultâneos)",
+        lambda ao_bloco: roteiro_ia.gerar_em_paralelo(
+            modelo, CONTEXTO, concorrencia=args.concorrencia, ao_bloco=ao_bloco
+        ),
+    )
+    for nome, etapas in (("plano", ["plano"]), ("blocos", roteiro_ia.BLOCOS)):
+        medidas = [m for m in telemetria_llm.serie() if not m["cache"] and m["etapa"] in etapas]
+        mediana = sorted(medidas, key=lambda m: m["ttft_ms"])[len(medidas) // 2]
+        print(
+            f"  {'':<34} {nome}: {len(medidas)} chamadas | fila até {max(m['fila_ms'] for m in medidas) / 1000:.1f}s "
+            f"| 1º token p50 {mediana['ttft_ms'] / 1000:.1f}s "
+            f"| {sum(m['tokens_resposta'] for m in medidas) / sum(m['total_ms'] for m in medidas) * 1000:.0f} tokens/s por chamada"
+        )
+
+    roteiro = roteiro_ia.roteiro_vazio("bench")
+    for chave, valor in truncado["blocos"].items():
+        roteiro = roteiro_ia.aplicar_bloco(roteiro, chave, valor)
+    reparo, t_reparo = rodar(
+        f"completar o corte ({len(roteiro_ia.blocos_a_refazer(roteiro))} blocos)",
+        lambda ao_bloco: roteiro_ia.completar(
+            modelo, CONTEXTO, roteiro, concorrencia=args.concorrencia, ao_bloco=ao_bloco
+        ),
+    )
+    print(
+        f"  {'':<34} {reparo['tokens'] / completo['tokens']:.0%} dos tokens e "
+        f"{t_reparo / t_completo:.0%} do tempo de refazer tudo"
+    )
+
+    chamadas = modelo.chamadas
+    rodar(
+        "plano + paralelo, cache quente",
+        lambda ao_bloco: roteiro_ia.gerar_em_paralelo(
+            modelo, CONTEXTO, concorrencia=args.concorrencia, ao_bloco=ao_bloco
+        ),
+    )
+    print(f"  {'':<34} {modelo.chamadas - chamadas} chamadas ao modelo")
+    rodar(
+        "plano + paralelo, ignorar_cache",
+        lambda ao_bloco: roteiro_ia.gerar_em_paralelo(
+            modelo, CONTEXTO, concorrencia=args.concorrencia, ao_bloco=ao_bloco, ignorar_cache=True
+        ),
+    )
+    cache = cache_llm.resumo()
+    print(
+        f"  cache: {cache['hits']}/{cache['hits'] + cache['misses']} acertos "
+        f"({cache['taxa_acerto']:.0%}), {cache['tokens_poupados']} tokens poupados, "
+        f"{cache['entradas']} respostas em {cache['bytes'] / 1024:.0f} KB"
+    )
+
+    texto = json.dumps(resposta_para(usuario), ensure_ascii=False)
+    # Defeitos típicos: vírgula antes de "]" e quebra de linha crua no parágrafo
+    defeituoso = texto.replace('"]', '",]').replace('["palavra ', '["palavra\n')
+    for nome, amostra in (("cortado em 60%", texto[: len(texto) * 6 // 10]), ("com defeitos", defeituoso)):
+        try:
+            json.loads(amostra)
+            estrito = "ok"
+        except ValueError:
+            estrito = "falha"
+        recuperados = [b for b in roteiro_ia.ler_tolerante(amostra) if b in roteiro_ia.BLOCOS]
+        print(f"  JSON {nome:<29} json.loads: {estrito} | ler_tolerante: {len(recuperados)}/8 blocos")
+
+    pedacos = [texto[i : i + 16] for i in range(0, len(texto), 16)]
+
+    def so_leitor():
+        leitor = roteiro_ia.LeitorJson()
+        for p in pedacos:
+            leitor.alimentar(p)
+
+    ms = medir(so_leitor, 5)
+    print(f"  LeitorJson: {ms:.1f} ms para {len(pedacos)} pedaços "
+          f"({ms * 1000 / len(pedacos):.1f} µs por pedaço)")
+
+
+if __name__ == "__main__":
+    main()
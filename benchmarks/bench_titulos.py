@@ -0,0 +1,77 @@
+"""
+Benchmark: características de títulos vetorizadas (`titulos.py`) vs. o laço
+em Python que a página 0 usava.
+
+Gera N títulos sintéticos (números, perguntas, emojis, gatilhos) com
+durações ISO-8601 e mede as duas abordagens.
+
+Uso:
+    python benchmarks/bench_titulos.py --titulos 100000
+"""
+
+import os
+import sys
+import random
+import argparse
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import titulos  # noqa: E402
+from bench_banco import medir  # noqa: E402
+
+PALAVRAS = ["como", "ganhar", "dinheiro", "segredo", "rápido", "história", "Roma",
+            "nunca", "fácil", "império", "milionário", "sempre", "guerra", "verdade"]
+EMOJIS = ["🔥", "💰", "🚀", "😱", "😮", "✅", "🇧🇷"]
+
+
+def gerar(n, semente=42):
+    rnd = random.Random(semente)
+    tit, dur = [], []
+    for _ in range(n):
+        partes = rnd.choices(PALAVRAS, k=rnd.randint(4, 12))
+        if rnd.random() < 0.3:
+            partes.insert(0, str(rnd.randint(1, 100)))
+        if rnd.random() < 0.2:
+            partes.append(rnd.choice(EMOJIS))
+        t = " ".join(partes) + ("?" if rnd.random() < 0.15 else "")
+        tit.append(t)
+        if rnd.random() < 0.3:
+            dur.append(f"PT{rnd.randint(5, 59)}S")
+        else:
+            dur.append(f"PT{rnd.randint(0, 2)}H{rnd.randint(0, 59)}M{rnd.randint(0, 59)}S")
+    return pd.Series(tit), pd.Series(dur)
+
+
+def laco_antigo(tits, durs):
+    lista = tits.tolist()
+    numeros = len([t for t in lista if any(ch.isdigit() for ch in t)])
+    perguntas = len([t for t in lista if "?" in t])
+    emojis = len([t for t in lista if any(c in t for c in ["🔥", "💰", "🚀", "😱", "😮"])])
+    gatilhos = sum(t.lower().count(w) for t in lista for w in titulos.GATILHOS_PADRAO)
+    shorts = [
+        ("S" in d and "M" not in d and "H" not in d) or "#shorts" in t.lower()
+        for t, d in zip(lista, durs.tolist())
+    ]
+    return numeros, perguntas, emojis, gatilhos, shorts
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--titulos", type=int, default=100_000)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    args = ap.parse_args()
+
+    tits, durs = gerar(args.titulos)
+    print(f"{args.titulos} títulos (mediana de {args.repeticoes}, ms)")
+    ms_laco = medir(lambda: laco_antigo(tits, durs), args.repeticoes)
+    print(f"  laço Python (página 0 antiga) : {ms_laco:8.1f}")
+    ms_vet = medir(lambda: titulos.resumo(titulos.extrair(tits, durs)), args.repeticoes)
+    print(f"  titulos.extrair + resumo      : {ms_vet:8.1f}")
+    ms_sem_dur = medir(lambda: titulos.resumo(titulos.extrair(tits)), args.repeticoes)
+    print(f"    só títulos (sem duração)    : {ms_sem_dur:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Cache em disco das respostas da YouTube Data API.
+
+As respostas de `channels.list`, `playlistItems.list` e `videos.list` ficam
+na tabela `respostas_api` do banco compartilhado, chaveadas pela URL da
+requisição (sem a API key), junto com o ETag devolvido pela API. Dentro do
+TTL do recurso a resposta sai direto do disco, sem chamada nenhuma; depois
+dele a requisição vai com `If-None-Match` e um 304 só renova a entrada.
+
+Sobrevive a reinícios e é compartilhado por todos os workers, ao contrário
+do `st.cache_data`.
+"""
+
+import os
+import time
+import hashlib
+import threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import banco
+import modelos
+
+TTL_S = {
+    "channels.list": int(os.environ.get("PIPELINE_CACHE_TTL_CANAIS", "86400")),
+    "playlistItems.list": int(os.environ.get("PIPELINE_CACHE_TTL_PLAYLISTS", "3600")),
+    "videos.list": int(os.environ.get("PIPELINE_CACHE_TTL_VIDEOS", "21600")),
+}
+
+# Origem de cada resposta devolvida por `executar`
+DO_CACHE = "hits"
+REVALIDADA = "revalidadas"
+DA_API = "misses"
+
+_trava = threading.Lock()
+estatisticas = {DO_CACHE: 0, REVALIDADA: 0, DA_API: 0}
+
+
+def _contar(origem: str) -> None:
+    with _trava:
+        estatisticas[origem] += 1
+
+
+def _chave(metodo: str, uri: str) -> str:
+    partes = urlsplit(uri)
+    params = sorted((k, v) for k, v in parse_qsl(partes.query) if k != "key")
+    return hashlib.sha256(
+        f"{metodo} {partes.path}?{urlencode(params)}".encode("utf-8")
+    ).hexdigest()
+
+
+def _nao_modificado(erro: Exception) -> bool:
+    # googleapiclient levanta HttpError para qualquer status >= 300
+    return getattr(getattr(erro, "resp", None), "status", None) == 304
+
+
+def executar(
+    requisicao, metodo: str, conn=None, antes_da_rede=None, ttl: float | None = None
+) -> tuple[dict, str]:
+    """
+    Executa uma requisição do googleapiclient passando pelo cache.
+    Devolve `(resposta, origem)`, com origem em DO_CACHE / REVALIDADA /
+    DA_API. Métodos sem TTL configurado vão direto à API.
+    `antes_da_rede()` é chamado só quando a requisição vai mesmo à rede
+    (ex.: para esperar a vez num limitador de taxa). `ttl` substitui o TTL
+    do recurso nesta chamada (0 = sempre revalidar).
+    """
+    if not TTL_S.get(metodo):
+        if antes_da_rede:
+            antes_da_rede()
+        return requisicao.execute(), DA_API
+    if ttl is None:
+        ttl = TTL_S[metodo]
+
+    conn = conn or banco.conectar()
+    chave = _chave(metodo, requisicao.uri)
+    linha = conn.execute(
+        "SELECT etag, corpo, gravado_em FROM respostas_api WHERE chave = ?",
+        (chave,),
+    ).fetchone()
+    agora = time.time()
+
+    if linha and agora - linha["gravado_em"] < ttl:
+        _contar(DO_CACHE)
+        return modelos.loads(linha["corpo"]), DO_CACHE
+
+    if linha and linha["etag"]:
+        requisicao.headers["If-None-Match"] = linha["etag"]
+    if antes_da_rede:
+        antes_da_rede()
+    try:
+        resposta = requisicao.execute()
+    except Exception as e:
+        if linha and _nao_modificado(e):
+            with conn:
+                conn.execute(
+                    "UPDATE respostas_api SET gravado_em = ? WHERE chave = ?",
+                    (agora, chave),
+                )
+            _contar(REVALIDADA)
+            return modelos.loads(linha["corpo"]), REVALIDADA
+        raise
+
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO respostas_api (chave, metodo, etag, corpo, gravado_em) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (chave, metodo, resposta.get("etag"), modelos.dumps(resposta), agora),
+        )
+    _contar(DA_API)
+    return resposta, DA_API
+
+
+def resumo(conn=None) -> dict:
+    """Contadores do processo + tamanho do cache em disco."""
+    conn = conn or banco.conectar()
+    linha = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(LENGTH(corpo)), 0) FROM respostas_api"
+    ).fetchone()
+    with _trava:
+        contadores = dict(estatisticas)
+    return {**contadores, "entradas": linha[0], "bytes": linha[1]}
+
+
+def limpar(conn=None) -> int:
+    conn = conn or banco.conectar()
+    with conn:
+        return conn.execute("DELETE FROM respostas_api").rowcount
@@ -0,0 +1,131 @@
+"""
+Cache em disco das respostas do LLM (roteiros da Groq).
+
+A chave é o sha256 de tudo o que determina a resposta: modelo,
+temperatura, max_tokens, prompt de sistema e prompt do usuário já
+renderizado (canal, nicho, persona, tom, restrições, objetivo, título,
+briefing...). Pedir de novo o mesmo roteiro sai do disco, sem tokens nem
+espera; mudar qualquer campo muda a chave.
+
+As entradas ficam em `respostas_llm` no banco compartilhado, expiram em
+`TTL_S` e, quando o total passa de `MAX_BYTES`, as menos usadas
+recentemente saem primeiro. Só respostas completas (finish_reason "stop")
+são gravadas.
+"""
+
+import os
+import time
+import hashlib
+import threading
+
+import banco
+import modelos
+
+TTL_S = int(os.environ.get("PIPELINE_LLM_CACHE_TTL_S", str(30 * 86400)))
+MAX_BYTES = int(float(os.environ.get("PIPELINE_LLM_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+_trava = threading.Lock()
+estatisticas = {"hits": 0, "misses": 0, "ignoradas": 0, "tokens_poupados": 0}
+
+
+def _contar(campo: str, n: int = 1) -> None:
+    with _trava:
+        estatisticas[campo] += n
+
+
+def chave(modelo: str, temperatura: float, max_tokens: int, sistema: str, usuario: str) -> str:
+    partes = [modelo, repr(float(temperatura)), str(int(max_tokens)), sistema, usuario]
+    # Separador que não aparece em texto: "a|b" + "c" != "a" + "b|c"
+    return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+
+def obter(chave_resposta: str, conn=None) -> dict | None:
+    """{"texto", "tokens", "fim"} da resposta gravada, ou None (miss/expirada)."""
+    conn = conn or banco.conectar()
+    agora = time.time()
+    linha = conn.execute(
+        "SELECT corpo, tokens, gravado_em FROM respostas_llm WHERE chave = ?",
+        (chave_resposta,),
+    ).fetchone()
+    if not linha or agora - linha["gravado_em"] > TTL_S:
+        _contar("misses")
+        return None
+    with conn:
+        conn.execute(
+            "UPDATE respostas_llm SET usado_em = ?, acertos = acertos + 1, "
+            "tokens_poupados = tokens_poupados + tokens WHERE chave = ?",
+            (agora, chave_resposta),
+        )
+    _contar("hits")
+    _contar("tokens_poupados", linha["tokens"])
+    return modelos.loads(linha["corpo"])
+
+
+def ignorar() -> None:
+    """Registra um pedido que pulou o cache de propósito (regenerar)."""
+    _contar("ignoradas")
+
+
+def gravar(chave_resposta: str, modelo: str, resposta: dict, conn=None) -> None:
+    conn = conn or banco.conectar()
+    corpo = modelos.dumps(resposta)
+    agora = time.time()
+    with conn:
+        # Regenerar substitui a resposta mas mantém o histórico de acertos
+        conn.execute(
+            """
+            INSERT INTO respostas_llm (chave, modelo, corpo, bytes, tokens, gravado_em, usado_em)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(chave) DO UPDATE SET
+                corpo = excluded.corpo, bytes = excluded.bytes, tokens = excluded.tokens,
+                gravado_em = excluded.gravado_em, usado_em = excluded.usado_em
+            """,
+            (chave_resposta, modelo, corpo, len(corpo), int(resposta.get("tokens") or 0), agora, agora),
+        )
+        _despejar(conn, agora)
+
+
+def _despejar(conn, agora: float) -> None:
+    # Expiradas e, acima de MAX_BYTES, as usadas há mais tempo
+    conn.execute("DELETE FROM respostas_llm WHERE gravado_em < ?", (agora - TTL_S,))
+    conn.execute(
+        """
+        DELETE FROM respostas_llm WHERE chave IN (
+            SELECT chave FROM (
+                SELECT chave, SUM(bytes) OVER (ORDER BY usado_em DESC, chave) AS acumulado
+                FROM respostas_llm
+            ) WHERE acumulado > ?
+        )
+        """,
+        (MAX_BYTES,),
+    )
+
+
+def resumo(conn=None) -> dict:
+    """
+    Contadores do processo (hits, misses, ignoradas, tokens_poupados,
+    taxa_acerto) + o que está em disco, com os acertos e tokens poupados
+    acumulados pelas entradas ainda guardadas.
+    """
+    conn = conn or banco.conectar()
+    linha = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(bytes), 0), COALESCE(SUM(acertos), 0), "
+        "COALESCE(SUM(tokens_poupados), 0) FROM respostas_llm"
+    ).fetchone()
+    with _trava:
+        contadores = dict(estatisticas)
+    consultas = contadores["hits"] + contadores["misses"]
+    return {
+        **contadores,
+        "taxa_acerto": contadores["hits"] / consultas if consultas else 0.0,
+        "entradas": linha[0],
+        "bytes": linha[1],
+        "acertos_total": linha[2],
+        "tokens_poupados_total": linha[3],
+    }
+
+
+def limpar(conn=None) -> int:
+    conn = conn or banco.conectar()
+    with conn:
+        return conn.execute("DELETE FROM respostas_llm").rowcount
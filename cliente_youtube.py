@@ -0,0 +1,73 @@
+"""
+Construção do cliente da YouTube Data API, num lugar só.
+
+Configuração por variáveis de ambiente:
+- `PIPELINE_YOUTUBE_ENDPOINT`: URL base alternativa, normalmente o replay
+  local de `youtube_replay.py`. Nesse modo a API key não é usada (pode
+  faltar nos secrets) e nada sai da máquina.
+- `PIPELINE_YOUTUBE_GRAVAR`: pasta onde gravar as respostas reais, para
+  servi-las depois em replay.
+
+O googleapiclient (~150 ms de import) só é carregado no primeiro cliente:
+páginas que não falam com o YouTube não pagam por ele.
+"""
+
+import os
+import json
+import functools
+
+ENDPOINT = os.environ.get("PIPELINE_YOUTUBE_ENDPOINT", "")
+PASTA_GRAVACAO = os.environ.get("PIPELINE_YOUTUBE_GRAVAR", "")
+
+
+def em_replay() -> bool:
+    return bool(ENDPOINT)
+
+
+def chave(segredos=None) -> str | None:
+    """
+    YOUTUBE_API_KEY dos secrets (`st.secrets` ou qualquer mapeamento) ou
+    do ambiente; None se faltar. Em replay a chave não é necessária e
+    também volta None: quem chama só trata a falta fora do replay.
+    """
+    if em_replay():
+        return None
+    try:
+        valor = segredos.get("YOUTUBE_API_KEY") if segredos is not None else None
+    except FileNotFoundError:  # st.secrets sem secrets.toml
+        valor = None
+    return valor or os.environ.get("YOUTUBE_API_KEY") or None
+
+
+@functools.lru_cache(maxsize=1)
+def _documento_discovery() -> dict:
+    """
+    Discovery do youtube v3 empacotado no googleapiclient, lido e
+    decodificado uma vez por processo (são ~400 KB de JSON; cada cliente
+    por thread reaproveita o mesmo dict).
+    """
+    from googleapiclient import discovery_cache
+
+    return json.loads(discovery_cache.get_static_doc("youtube", "v3"))
+
+
+def criar_cliente(api_key: str | None = None, endpoint: str | None = None, pasta_gravacao: str | None = None):
+    """
+    Um cliente novo (não é thread-safe: use um por thread). O documento de
+    discovery vem do que o googleapiclient já traz empacotado, sem rede.
+    """
+    import googleapiclient.discovery
+
+    endpoint = ENDPOINT if endpoint is None else endpoint
+    pasta_gravacao = PASTA_GRAVACAO if pasta_gravacao is None else pasta_gravacao
+    http = None
+    if pasta_gravacao:
+        import youtube_replay
+
+        http = youtube_replay.HttpGravador(pasta_gravacao)
+    return googleapiclient.discovery.build_from_document(
+        _documento_discovery(),
+        developerKey=api_key or "replay",
+        http=http,
+        client_options={"api_endpoint": endpoint} if endpoint else None,
+    )
@@ -0,0 +1,340 @@
+"""
+Coletor de lixo dos arquivos da pipeline, com cota de disco.
+
+A cada rodada (em segundo plano ou sob demanda):
+1. apaga blobs do armazém sem nenhuma referência (e sem uso há mais de
+   `CARENCIA_S`) e temporários antigos
+   de `armazem.PASTA_TMP` deixados por gerações interrompidas (arquivos
+   fora da tabela de blobs no resto do armazém não são tocados: depois de
+   uma reconstrução pelo diário essa tabela volta vazia);
+2. só com `legados=True` (ou PIPELINE_COLETOR_LEGADOS=1): varre os lugares
+   antigos (/tmp e `imagens_video/`) atrás de .mp3/.wav/.png/.mp4 que
+   nenhum `artefatos` referencia mais. Em /tmp ficam arquivos de outros
+   programas, então isso nunca roda sem alguém pedir;
+3. se o armazém ainda passar da cota, despeja arquivos referenciados em
+   ordem LRU, primeiro intermediários (imagens, áudio), por último vídeos
+   finais, mas só os que a etapa seguinte já usou (imagens e áudio de
+   vídeos montados, vídeos já publicados). O artefato que apontava para o
+   arquivo é limpo e a etapa dele volta a pendente.
+
+Com `dry_run=True` nada é apagado; o relatório diz o que seria feito.
+"""
+
+import os
+import time
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+import banco
+import armazem
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+QUOTA_BYTES = int(float(os.environ.get("PIPELINE_QUOTA_MB", "5120")) * 1024 * 1024)
+INTERVALO_S = int(os.environ.get("PIPELINE_COLETOR_INTERVALO", "600"))
+# Temporários mais novos que isto podem ser de uma geração em andamento
+CARENCIA_S = int(os.environ.get("PIPELINE_COLETOR_CARENCIA", "3600"))
+
+VARRER_LEGADOS = os.environ.get("PIPELINE_COLETOR_LEGADOS") == "1"
+
+TIPOS_FINAIS = {"video"}
+EXTENSOES_LEGADAS = (".mp3", ".wav", ".png", ".mp4")
+PASTA_IMAGENS_LEGADA = "imagens_video"
+
+
+def _novo_relatorio(dry_run: bool) -> dict:
+    return {
+        "dry_run": dry_run,
+        "quota_bytes": QUOTA_BYTES,
+        "uso_bytes": 0,
+        "uso_final_bytes": 0,
+        "bytes_liberados": 0,
+        "itens": [],
+        "executado_em": datetime.now().isoformat(),
+    }
+
+
+def _anotar(relatorio, caminho, tamanho, motivo, tipo=None):
+    relatorio["itens"].append(
+        {"caminho": caminho, "bytes": tamanho, "motivo": motivo, "tipo": tipo}
+    )
+    relatorio["bytes_liberados"] += tamanho
+
+
+def _remover(caminho, dry_run):
+    if not dry_run and os.path.exists(caminho):
+        os.remove(caminho)
+
+
+def _antigo(caminho, limite_ts) -> bool:
+    try:
+        return os.path.getmtime(caminho) < limite_ts
+    except OSError:
+        return False
+
+
+# -------------------------------------------------------------------
+# Referências conhecidas
+# -------------------------------------------------------------------
+def caminhos_referenciados(conn) -> set[str]:
+    """Todos os caminhos de arquivo citados em `artefatos` (normalizados)."""
+    refs = set()
+
+    def visitar(valor):
+        if isinstance(valor, dict):
+            for chave, v in valor.items():
+                if chave in ("path", "audio_path", "video_path") and isinstance(v, str):
+                    refs.add(os.path.abspath(v))
+                else:
+                    visitar(v)
+        elif isinstance(valor, list):
+            for v in valor:
+                visitar(v)
+
+    for r in conn.execute(
+        "SELECT chave, valor FROM artefatos "
+        "WHERE chave IN ('audio_path', 'video_path', 'imagens_roteiro') "
+        "AND valor IS NOT NULL"
+    ):
+        visitar({r["chave"]: banco._loads(r["valor"])})
+    return refs
+
+
+# -------------------------------------------------------------------
+# Etapas da coleta
+# -------------------------------------------------------------------
+def _coletar_orfaos(conn, relatorio, dry_run):
+    # Blob usado há pouco pode ser de um `guardar_*` que ainda vai ligá-lo
+    ocioso_antes = (datetime.now() - timedelta(seconds=CARENCIA_S)).isoformat()
+    for r in conn.execute(
+        "SELECT b.hash, b.ext, b.tamanho, b.tipo FROM blobs b "
+        "WHERE b.acessado_em < ? "
+        "AND NOT EXISTS (SELECT 1 FROM blob_refs r WHERE r.hash = b.hash)",
+        (ocioso_antes,),
+    ).fetchall():
+        caminho = armazem.caminho_blob(conn, r["hash"], r["ext"])
+        if dry_run or armazem.apagar_orfao(conn, r["hash"], ocioso_antes):
+            _anotar(relatorio, caminho, r["tamanho"], "orfao", r["tipo"])
+
+
+def _coletar_temporarios(conn, relatorio, dry_run):
+    limite = time.time() - CARENCIA_S
+    pasta_tmp = os.path.join(conn.pasta_artefatos, armazem.PASTA_TMP)
+    if not os.path.isdir(pasta_tmp):
+        return
+    for nome in os.listdir(pasta_tmp):
+        caminho = os.path.join(pasta_tmp, nome)
+        if os.path.isfile(caminho) and _antigo(caminho, limite):
+            _anotar(relatorio, caminho, os.path.getsize(caminho), "temporario")
+            _remover(caminho, dry_run)
+
+
+def _coletar_legados(conn, relatorio, dry_run):
+    limite = time.time() - CARENCIA_S
+    refs = caminhos_referenciados(conn)
+    candidatos = []
+    tmp = tempfile.gettempdir()
+    if os.path.isdir(tmp):
+        candidatos += [
+            os.path.join(tmp, n)
+            for n in os.listdir(tmp)
+            if n.startswith("tmp") and n.lower().endswith(EXTENSOES_LEGADAS)
+        ]
+    if os.path.isdir(PASTA_IMAGENS_LEGADA):
+        candidatos += [
+            os.path.join(PASTA_IMAGENS_LEGADA, n)
+            for n in os.listdir(PASTA_IMAGENS_LEGADA)
+            if n.lower().endswith(EXTENSOES_LEGADAS)
+        ]
+    for caminho in candidatos:
+        if not os.path.isfile(caminho) or os.path.abspath(caminho) in refs:
+            continue
+        if _antigo(caminho, limite):
+            _anotar(relatorio, caminho, os.path.getsize(caminho), "legado")
+            _remover(caminho, dry_run)
+
+
+def uso_armazem(conn=None) -> int:
+    conn = conn or banco.conectar()
+    return conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM blobs").fetchone()[0]
+
+
+# Papel no armazém -> (artefato, etapa que ele conclui, etapa seguinte que
+# ainda precisa do arquivo enquanto não estiver concluída)
+def _dependencia(papel: str) -> tuple[str, str, str] | None:
+    if papel == "audio_path":
+        return "audio_path", "3_audio", "4_video"
+    if papel == "video_path":
+        return "video_path", "4_video", "5_publicacao"
+    if papel.startswith("imagens_roteiro/"):
+        return "imagens_roteiro", "2_thumbnail", "4_video"
+    return None
+
+
+def _despejavel(conn, refs) -> bool:
+    """Só se toda referência tem papel conhecido e a etapa seguinte concluída."""
+    for ref in refs:
+        dep = _dependencia(ref["papel"])
+        if dep is None:
+            return False
+        concluida = conn.execute(
+            "SELECT concluido FROM status WHERE video_id = ? AND etapa = ?",
+            (ref["video_id"], dep[2]),
+        ).fetchone()
+        if not (concluida and concluida["concluido"]):
+            return False
+    return True
+
+
+def _soltar_referencia(conn, video_id: str, papel: str) -> None:
+    """Limpa o artefato que apontava para o arquivo despejado e reabre a etapa."""
+    chave, etapa, _ = _dependencia(papel)
+    if chave != "imagens_roteiro":
+        banco.atualizar_video(video_id, artefatos={chave: None}, status={etapa: False}, conn=conn)
+        return
+    _, bloco, idx = papel.split("/")
+
+    def sem_imagem(imagens):
+        imagens = imagens or {}
+        lista = imagens.get(bloco) or []
+        if int(idx) < len(lista):
+            lista[int(idx)] = None
+        return imagens
+
+    banco.alterar_artefato(video_id, "imagens_roteiro", sem_imagem, status={etapa: False}, conn=conn)
+
+
+def _despejar_por_cota(conn, relatorio, dry_run, quota):
+    uso = uso_armazem(conn) - sum(
+        i["bytes"] for i in relatorio["itens"] if i["motivo"] == "orfao"
+    )
+    if uso <= quota:
+        return
+    finais = ",".join(f"'{t}'" for t in TIPOS_FINAIS)
+    # Intermediários antes de finais; dentro de cada grupo, o menos usado primeiro
+    rows = conn.execute(
+        f"SELECT hash, ext, tamanho, tipo FROM blobs "
+        f"WHERE EXISTS (SELECT 1 FROM blob_refs r WHERE r.hash = blobs.hash) "
+        f"ORDER BY (COALESCE(tipo, '') IN ({finais})), acessado_em"
+    ).fetchall()
+    for r in rows:
+        if uso <= quota:
+            break
+        refs = conn.execute(
+            "SELECT video_id, papel FROM blob_refs WHERE hash = ?", (r["hash"],)
+        ).fetchall()
+        if not _despejavel(conn, refs):
+            continue
+        caminho = armazem.caminho_blob(conn, r["hash"], r["ext"])
+        _anotar(relatorio, caminho, r["tamanho"], "quota", r["tipo"])
+        uso -= r["tamanho"]
+        if not dry_run:
+            for ref in refs:
+                _soltar_referencia(conn, ref["video_id"], ref["papel"])
+            with conn:
+                conn.execute("DELETE FROM blob_refs WHERE hash = ?", (r["hash"],))
+            # Se alguém ligou o mesmo conteúdo nesse meio tempo, o arquivo fica
+            armazem.apagar_orfao(conn, r["hash"])
+
+
+# -------------------------------------------------------------------
+# API
+# -------------------------------------------------------------------
+def coletar(
+    dry_run: bool = False,
+    quota: int | None = None,
+    legados: bool | None = None,
+    conn=None,
+) -> dict:
+    """
+    Executa (ou simula) uma rodada completa e devolve o relatório. A varredura
+    de /tmp e `imagens_video/` só roda com `legados=True` (padrão:
+    PIPELINE_COLETOR_LEGADOS).
+    """
+    conn = conn or banco.conectar()
+    quota = QUOTA_BYTES if quota is None else quota
+    legados = VARRER_LEGADOS if legados is None else legados
+    relatorio = _novo_relatorio(dry_run)
+    relatorio["quota_bytes"] = quota
+    relatorio["uso_bytes"] = uso_armazem(conn)
+
+    trava = None
+    if not dry_run:
+        trava = _tentar_travar(conn)
+        if trava is False:
+            relatorio["ignorado"] = "Outra coleta está em andamento."
+            relatorio["uso_final_bytes"] = relatorio["uso_bytes"]
+            return relatorio
+    try:
+        _coletar_orfaos(conn, relatorio, dry_run)
+        _coletar_temporarios(conn, relatorio, dry_run)
+        if legados:
+            _coletar_legados(conn, relatorio, dry_run)
+        _despejar_por_cota(conn, relatorio, dry_run, quota)
+    finally:
+        if trava:
+            trava.close()
+
+    liberado_armazem = sum(
+        i["bytes"] for i in relatorio["itens"] if i["motivo"] in ("orfao", "quota")
+    )
+    relatorio["uso_final_bytes"] = relatorio["uso_bytes"] - liberado_armazem
+    return relatorio
+
+
+def _tentar_travar(conn):
+    """Trava não bloqueante entre processos; False se outro já está coletando."""
+    if not fcntl:
+        return None
+    os.makedirs(conn.pasta_artefatos, exist_ok=True)
+    trava = open(os.path.join(conn.pasta_artefatos, "coletor.lock"), "a")
+    try:
+        fcntl.flock(trava, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        trava.close()
+        return False
+    return trava
+
+
+# -------------------------------------------------------------------
+# Execução em segundo plano (uma thread por processo)
+# -------------------------------------------------------------------
+_thread = None
+_thread_lock = threading.Lock()
+ultimo_relatorio = None
+
+
+def _laco(intervalo):
+    global ultimo_relatorio
+    while True:
+        try:
+            ultimo_relatorio = coletar()
+        except Exception as e:  # o coletor nunca pode derrubar o app
+            ultimo_relatorio = {"erro": str(e), "executado_em": datetime.now().isoformat()}
+        time.sleep(intervalo)
+
+
+def iniciar_em_segundo_plano(intervalo: int | None = None) -> None:
+    """Inicia o coletor periódico deste processo (chamadas repetidas são ignoradas)."""
+    global _thread
+    with _thread_lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _thread = threading.Thread(
+            target=_laco,
+            args=(intervalo or INTERVALO_S,),
+            name="coletor-artefatos",
+            daemon=True,
+        )
+        _thread.start()
+
+
+def proxima_execucao_estimada() -> str | None:
+    if not ultimo_relatorio or "executado_em" not in ultimo_relatorio:
+        return None
+    inicio = datetime.fromisoformat(ultimo_relatorio["executado_em"])
+    return (inicio + timedelta(seconds=INTERVALO_S)).isoformat()
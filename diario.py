@@ -0,0 +1,299 @@
+"""
+Diário (journal) append-only das mudanças da pipeline.
+
+Cada gravação em `banco.py` (canal criado/editado, vídeo criado, etapa ou
+artefato alterado) vira uma linha JSON em `dados/diario/eventos.jsonl`.
+De tempos em tempos o diário é compactado: o estado completo vai para
+`snapshot.json` e o arquivo de eventos fica só com o que veio depois, de
+modo que restaurar o banco = ler o snapshot + reaplicar só a cauda. A
+compactação roda numa thread à parte, e o replay dela não segura a trava
+de quem grava.
+
+O replay também registra quando cada etapa foi concluída, para que a
+reconstrução do banco devolva a `status` os instantes de conclusão (de
+onde sai o lead time por etapa, ver `banco.lead_times`).
+
+Em memória, canais e vídeos são registros de `modelos.py`; no snapshot eles
+vão como listas posicionais (`para_lista`). Snapshots antigos, com dicts,
+são migrados na leitura.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import modelos
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+# Compacta quando o arquivo de eventos passa deste tamanho
+LIMITE_EVENTOS_BYTES = int(os.environ.get("PIPELINE_DIARIO_LIMITE", 4 * 1024 * 1024))
+
+ARQ_EVENTOS = "eventos.jsonl"
+ARQ_SNAPSHOT = "snapshot.json"
+ARQ_TRAVA = "diario.lock"
+ARQ_TRAVA_COMPACTACAO = "compactacao.lock"
+
+# Formato do snapshot (ausente = dicts aninhados, anterior aos registros)
+VERSAO_SNAPSHOT = 2
+
+
+def _agora():
+    return datetime.now().isoformat()
+
+
+@contextmanager
+def _travado(pasta: str, arquivo: str = ARQ_TRAVA):
+    """Trava exclusiva entre processos (flock) durante append/troca de arquivos."""
+    os.makedirs(pasta, exist_ok=True)
+    with open(os.path.join(pasta, arquivo), "a") as trava:
+        if fcntl:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(trava, fcntl.LOCK_UN)
+
+
+def existe(pasta: str) -> bool:
+    return os.path.exists(os.path.join(pasta, ARQ_SNAPSHOT)) or os.path.exists(
+        os.path.join(pasta, ARQ_EVENTOS)
+    )
+
+
+# -------------------------------------------------------------------
+# Escrita
+# -------------------------------------------------------------------
+def registrar(pasta: str, evento: dict) -> None:
+    """Acrescenta um evento ao diário (e agenda a compactação se ele ficou grande)."""
+    linha = modelos.dumps({**evento, "ts": evento.get("ts") or _agora()}) + b"\n"
+    caminho = os.path.join(pasta, ARQ_EVENTOS)
+    with _travado(pasta):
+        with open(caminho, "ab") as f:
+            f.write(linha)
+            tamanho = f.tell()
+    if tamanho > LIMITE_EVENTOS_BYTES:
+        _agendar_compactacao(pasta)
+
+
+def registrar_varios(pasta: str, eventos) -> int:
+    """
+    Acrescenta vários eventos sob uma única trava (cargas em lote). Não
+    compacta: numa carga grande isso regravaria o snapshot a cada lote;
+    quem chama decide quando compactar (uma vez, no fim).
+    """
+    ts = _agora()
+    caminho = os.path.join(pasta, ARQ_EVENTOS)
+    n = 0
+    with _travado(pasta):
+        with open(caminho, "ab") as f:
+            for evento in eventos:
+                f.write(modelos.dumps({**evento, "ts": evento.get("ts") or ts}) + b"\n")
+                n += 1
+    return n
+
+
+def compactar(pasta: str) -> dict:
+    """
+    Grava um snapshot com o estado atual e tira do arquivo de eventos o que
+    ele já cobre. O replay roda só sob a trava de compactação; a do diário
+    é tomada no fim, para copiar a cauda chegada nesse meio tempo e trocar
+    os arquivos, então `registrar` não espera pela compactação.
+    """
+    with _travado(pasta, ARQ_TRAVA_COMPACTACAO):
+        estado, ate = _ler(pasta)
+        snap_tmp = os.path.join(pasta, ARQ_SNAPSHOT + ".tmp")
+        with open(snap_tmp, "wb") as f:
+            f.write(modelos.dumps(_para_snapshot(estado)))
+            f.flush()
+            os.fsync(f.fileno())
+        caminho = os.path.join(pasta, ARQ_EVENTOS)
+        eventos_tmp = caminho + ".tmp"
+        with _travado(pasta):
+            cauda = b""
+            if os.path.exists(caminho):
+                with open(caminho, "rb") as f:
+                    f.seek(ate)
+                    cauda = f.read()
+            with open(eventos_tmp, "wb") as f:
+                f.write(cauda)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(snap_tmp, os.path.join(pasta, ARQ_SNAPSHOT))
+            # Se o processo cair aqui, os eventos antigos são reaplicados
+            # sobre o snapshot novo; como eles só atribuem valores, o
+            # resultado é o mesmo.
+            os.replace(eventos_tmp, caminho)
+    for linha in cauda.splitlines(keepends=True):
+        if linha.endswith(b"\n") and linha.strip():
+            aplicar(estado, modelos.loads(linha))
+    return estado
+
+
+_compactando = set()
+_compactando_lock = threading.Lock()
+
+
+def _agendar_compactacao(pasta: str) -> None:
+    """Compacta numa thread daemon, uma por pasta e processo."""
+    with _compactando_lock:
+        if pasta in _compactando:
+            return
+        _compactando.add(pasta)
+    threading.Thread(
+        target=_compactar_em_segundo_plano, args=(pasta,), name="diario-compactacao", daemon=True
+    ).start()
+
+
+def _compactar_em_segundo_plano(pasta: str) -> None:
+    try:
+        compactar(pasta)
+    except OSError:
+        pass  # a próxima gravação acima do limite tenta de novo
+    finally:
+        with _compactando_lock:
+            _compactando.discard(pasta)
+
+
+# -------------------------------------------------------------------
+# Replay
+# -------------------------------------------------------------------
+def estado_vazio() -> dict:
+    return {"canais": {}, "videos": {}, "historico": {}}
+
+
+def _para_snapshot(estado: dict) -> dict:
+    return {
+        "versao": VERSAO_SNAPSHOT,
+        "canais": {cid: c.para_lista() for cid, c in estado["canais"].items()},
+        "videos": {vid: v.para_lista() for vid, v in estado["videos"].items()},
+        "historico": estado["historico"],
+    }
+
+
+def _de_snapshot(dados: dict) -> dict:
+    if dados.get("versao") == VERSAO_SNAPSHOT:
+        return {
+            "canais": {cid: modelos.Canal.de_lista(c) for cid, c in dados["canais"].items()},
+            "videos": {vid: modelos.Video.de_lista(v) for vid, v in dados["videos"].items()},
+            "historico": dados["historico"],
+        }
+    # Snapshot antigo: dicts aninhados
+    return {
+        "canais": {cid: modelos.Canal.de_dict(cid, c) for cid, c in dados["canais"].items()},
+        "videos": {vid: modelos.Video.de_dict(vid, v) for vid, v in dados["videos"].items()},
+        "historico": {
+            vid: {modelos.normalizar_etapa(e): ts for e, ts in hist.items()}
+            for vid, hist in dados.get("historico", {}).items()
+        },
+    }
+
+
+def aplicar(estado: dict, evento: dict) -> None:
+    """Aplica um evento ao estado em memória (idempotente)."""
+    tipo = evento.get("tipo")
+    if tipo == "canal":
+        cid = evento["canal_id"]
+        canal = estado["canais"].get(cid)
+        if canal is None:
+            canal = estado["canais"][cid] = modelos.Canal(cid)
+        canal.atualizar(evento.get("campos") or {})
+    elif tipo == "video":
+        vid = evento["video_id"]
+        video = estado["videos"].get(vid)
+        if video is None:
+            video = estado["videos"][vid] = modelos.Video(vid)
+        if evento.get("canal_id"):
+            video.canal_id = evento["canal_id"]
+        status = modelos.normalizar_status(evento.get("status"))
+        video.atualizar(evento.get("campos") or {})
+        video.status = modelos.aplicar_status(video.status, status)
+        video.artefatos.update(evento.get("artefatos") or {})
+        video.ultima_atualizacao = evento["ts"]
+
+        hist = estado["historico"].setdefault(vid, {})
+        for etapa, concluido in status.items():
+            if concluido:
+                hist.setdefault(etapa, evento["ts"])
+            else:
+                hist.pop(etapa, None)
+
+
+def _ler(pasta: str, desde: int = 0, estado: dict | None = None):
+    """Lê snapshot (se `estado` não vier) e reaplica eventos a partir do byte `desde`."""
+    if estado is None:
+        estado = estado_vazio()
+        snap = os.path.join(pasta, ARQ_SNAPSHOT)
+        if os.path.exists(snap):
+            with open(snap, "rb") as f:
+                estado = _de_snapshot(modelos.loads(f.read()))
+    caminho = os.path.join(pasta, ARQ_EVENTOS)
+    if not os.path.exists(caminho):
+        return estado, 0
+    with open(caminho, "rb") as f:
+        f.seek(desde)
+        for linha in f:
+            if not linha.endswith(b"\n"):
+                # Linha incompleta (escrita interrompida): para aqui
+                return estado, desde
+            desde += len(linha)
+            if linha.strip():
+                aplicar(estado, modelos.loads(linha))
+    return estado, desde
+
+
+def restaurar(pasta: str) -> dict:
+    """Estado completo: snapshot + cauda do diário."""
+    with _travado(pasta):
+        return _ler(pasta)[0]
+
+
+def reconstruir_banco(conn, estado: dict) -> None:
+    """Regrava um banco SQLite vazio a partir do estado restaurado."""
+    with conn:
+        for cid, canal in estado["canais"].items():
+            conn.execute(
+                "INSERT OR REPLACE INTO canais (canal_id, nome, config, criado_em) "
+                "VALUES (?, ?, ?, ?)",
+                (cid, canal.nome or "", modelos.dumps_texto(canal.config), canal.criado_em),
+            )
+        for vid, video in estado["videos"].items():
+            if video.canal_id not in estado["canais"]:
+                continue
+            conn.execute(
+                "INSERT OR REPLACE INTO videos (video_id, canal_id, titulo, descricao, "
+                "tipo, criado_em, ultima_atualizacao, fase_desde) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, julianday(COALESCE(?7, ?6)))",
+                (
+                    vid,
+                    video.canal_id,
+                    video.titulo or "",
+                    video.descricao or "",
+                    video.tipo,
+                    video.criado_em,
+                    video.ultima_atualizacao,
+                ),
+            )
+            ts = video.ultima_atualizacao
+            hist = estado["historico"].get(vid, {})
+            conn.executemany(
+                "INSERT OR REPLACE INTO status (video_id, etapa, concluido, atualizado_em) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (vid, e, int(ok), (ok and hist.get(e)) or ts)
+                    for e, ok in modelos.bits_para_status(video.status).items()
+                ],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO artefatos (video_id, chave, valor, atualizado_em) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (vid, k, modelos.dumps_texto(val), ts)
+                    for k, val in video.artefatos.items()
+                ],
+            )
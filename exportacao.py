@@ -0,0 +1,348 @@
+"""
+Exportação e importação do banco da pipeline em formato colunar.
+
+Gera duas tabelas, `canais` e `videos`, em Parquet (padrão) ou Arrow IPC.
+A tabela de vídeos tem os mesmos campos do `montar_df_videos` do dashboard:
+título, status de cada etapa, URL e dados de publicação e métricas manuais.
+O `publicacao_info` original também vai inteiro, em JSON, para a
+reimportação não perder nada.
+
+Tudo é lido e escrito em lotes (`fetchmany` → RecordBatch e
+`iter_batches` → `executemany`), então a memória fica limitada ao tamanho
+do lote, não ao tamanho do catálogo.
+"""
+
+import os
+import time
+
+import banco
+import diario
+import modelos
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # opcional: só a exportação/importação depende dele
+    pa = None
+
+TAMANHO_LOTE = 50_000
+FORMATOS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Campos de publicacao_info que viram colunas próprias
+CAMPOS_PUBLICACAO = [
+    ("privacy", "string"),
+    ("published_at", "string"),
+    ("manual_views", "float64"),
+    ("manual_ctr", "float64"),
+    ("manual_watch_time", "float64"),
+]
+
+
+def _exigir_pyarrow():
+    if pa is None:
+        raise RuntimeError(
+            "Exportação colunar requer o pacote `pyarrow` (pip install pyarrow)."
+        )
+
+
+def _esquema_canais():
+    return pa.schema(
+        [
+            ("canal_id", pa.string()),
+            ("nome", pa.string()),
+            ("criado_em", pa.string()),
+            ("config_json", pa.string()),
+        ]
+    )
+
+
+def _esquema_videos():
+    campos = [
+        ("video_id", pa.string()),
+        ("canal_id", pa.string()),
+        ("titulo", pa.string()),
+        ("descricao", pa.string()),
+        ("tipo", pa.string()),
+        ("criado_em", pa.string()),
+        ("ultima_atualizacao", pa.string()),
+        ("etapa_max", pa.int8()),
+        ("publicado_em", pa.string()),
+    ]
+    campos += [(f"status_{e}", pa.bool_()) for e in banco.ETAPAS]
+    campos.append(("youtube_url", pa.string()))
+    campos += [(nome, pa.type_for_alias(tipo)) for nome, tipo in CAMPOS_PUBLICACAO]
+    campos.append(("publicacao_info_json", pa.string()))
+    return pa.schema(campos)
+
+
+# -------------------------------------------------------------------
+# Escrita de arquivos (Parquet ou Arrow IPC, lote a lote)
+# -------------------------------------------------------------------
+class _Escritor:
+    def __init__(self, caminho, esquema, formato):
+        self.formato = formato
+        if formato == "parquet":
+            self._w = pq.ParquetWriter(caminho, esquema, compression="zstd")
+        else:
+            self._arq = pa.OSFile(caminho, "wb")
+            self._w = pa.ipc.new_file(self._arq, esquema)
+
+    def escrever(self, lote):
+        self._w.write_batch(lote)
+
+    def fechar(self):
+        self._w.close()
+        if self.formato != "parquet":
+            self._arq.close()
+
+
+def _lotes_arquivo(caminho, tamanho_lote):
+    if caminho.endswith(FORMATOS["parquet"]):
+        yield from pq.ParquetFile(caminho).iter_batches(batch_size=tamanho_lote)
+    else:
+        with pa.memory_map(caminho, "r") as origem:
+            leitor = pa.ipc.open_file(origem)
+            for i in range(leitor.num_record_batches):
+                yield leitor.get_batch(i)
+
+
+def _caminho(pasta, tabela, formato):
+    return os.path.join(pasta, tabela + FORMATOS[formato])
+
+
+# -------------------------------------------------------------------
+# Exportação
+# -------------------------------------------------------------------
+_BITS_ETAPAS = " ".join(f"WHEN '{e}' THEN {1 << i}" for i, e in enumerate(banco.ETAPAS))
+
+# Linhas em tupla (sem sqlite3.Row), status já como bitmask e artefatos por
+# LEFT JOIN na chave primária: é o caminho mais barato para 1M+ linhas
+_SQL_VIDEOS = (
+    "SELECT v.video_id, v.canal_id, v.titulo, v.descricao, v.tipo, v.criado_em, "
+    "v.ultima_atualizacao, v.etapa_max, v.publicado_em, "
+    f"(SELECT SUM(CASE s.etapa {_BITS_ETAPAS} END) FROM status s "
+    " WHERE s.video_id = v.video_id AND s.concluido), "
+    "u.valor, p.valor "
+    "FROM videos v "
+    "LEFT JOIN artefatos u ON u.video_id = v.video_id AND u.chave = 'youtube_url' "
+    "LEFT JOIN artefatos p ON p.video_id = v.video_id AND p.chave = 'publicacao_info' "
+    "ORDER BY v.rowid"
+)
+_CAMPOS_SIMPLES = (
+    "video_id", "canal_id", "titulo", "descricao", "tipo",
+    "criado_em", "ultima_atualizacao", "etapa_max", "publicado_em",
+)
+
+
+def _numero(valor):
+    try:
+        return float(valor) if valor is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _lote_videos(rows, esquema):
+    colunas = dict(zip(_CAMPOS_SIMPLES, (list(c) for c in zip(*(r[:9] for r in rows)))))
+    bits = [r[9] or 0 for r in rows]
+    for i, e in enumerate(banco.ETAPAS):
+        colunas[f"status_{e}"] = [bool(b >> i & 1) for b in bits]
+    colunas["youtube_url"] = [banco._loads(r[10]) for r in rows]
+    infos = [(banco._loads(r[11]) or {}) if r[11] else {} for r in rows]
+    for nome, tipo in CAMPOS_PUBLICACAO:
+        valores = [info.get(nome) for info in infos]
+        colunas[nome] = [_numero(v) for v in valores] if tipo == "float64" else valores
+    colunas["publicacao_info_json"] = [r[11] for r in rows]
+    return pa.RecordBatch.from_pydict(colunas, schema=esquema)
+
+
+def exportar(
+    pasta_destino: str,
+    formato: str = "parquet",
+    tamanho_lote: int = TAMANHO_LOTE,
+    conn=None,
+) -> dict:
+    """
+    Exporta canais e vídeos para `pasta_destino` (`canais.parquet` e
+    `videos.parquet`, ou `.arrow`). Devolve contagens, caminhos e duração.
+    """
+    _exigir_pyarrow()
+    conn = conn or banco.conectar()
+    os.makedirs(pasta_destino, exist_ok=True)
+    inicio = time.perf_counter()
+
+    esquema = _esquema_canais()
+    caminho_canais = _caminho(pasta_destino, "canais", formato)
+    escritor = _Escritor(caminho_canais, esquema, formato)
+    n_canais = 0
+    try:
+        cur = conn.execute("SELECT canal_id, nome, criado_em, config FROM canais")
+        while rows := cur.fetchmany(tamanho_lote):
+            escritor.escrever(
+                pa.RecordBatch.from_pydict(
+                    {
+                        "canal_id": [r["canal_id"] for r in rows],
+                        "nome": [r["nome"] for r in rows],
+                        "criado_em": [r["criado_em"] for r in rows],
+                        "config_json": [r["config"] for r in rows],
+                    },
+                    schema=esquema,
+                )
+            )
+            n_canais += len(rows)
+    finally:
+        escritor.fechar()
+
+    esquema = _esquema_videos()
+    caminho_videos = _caminho(pasta_destino, "videos", formato)
+    escritor = _Escritor(caminho_videos, esquema, formato)
+    n_videos = 0
+    try:
+        cur = conn.cursor()
+        cur.row_factory = None
+        cur.execute(_SQL_VIDEOS)
+        while rows := cur.fetchmany(tamanho_lote):
+            escritor.escrever(_lote_videos(rows, esquema))
+            n_videos += len(rows)
+    finally:
+        escritor.fechar()
+
+    return {
+        "canais": n_canais,
+        "videos": n_videos,
+        "arquivos": [caminho_canais, caminho_videos],
+        "segundos": time.perf_counter() - inicio,
+    }
+
+
+# -------------------------------------------------------------------
+# Importação (carga em lote no SQLite + diário)
+# -------------------------------------------------------------------
+def _encontrar(pasta, tabela):
+    for ext in FORMATOS.values():
+        caminho = os.path.join(pasta, tabela + ext)
+        if os.path.exists(caminho):
+            return caminho
+    raise FileNotFoundError(f"{tabela}.parquet/.arrow não encontrado em {pasta}")
+
+
+def importar(pasta_origem: str, tamanho_lote: int = TAMANHO_LOTE, conn=None) -> dict:
+    """
+    Carrega no banco os arquivos gerados por `exportar`. Canais e vídeos já
+    existentes são sobrescritos (upsert); cada lote é uma transação e vira
+    um bloco de eventos no diário, compactado uma única vez no fim.
+    """
+    _exigir_pyarrow()
+    conn = conn or banco.conectar()
+    inicio = time.perf_counter()
+    n_canais = n_videos = 0
+
+    for lote in _lotes_arquivo(_encontrar(pasta_origem, "canais"), tamanho_lote):
+        dados = lote.to_pydict()
+        linhas = list(
+            zip(dados["canal_id"], dados["nome"], dados["config_json"], dados["criado_em"])
+        )
+        with conn:
+            conn.executemany(
+                "INSERT INTO canais (canal_id, nome, config, criado_em) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(canal_id) DO UPDATE SET nome = excluded.nome, "
+                "config = excluded.config, criado_em = excluded.criado_em",
+                linhas,
+            )
+            # No diário antes do commit, como em `banco._registrar`
+            diario.registrar_varios(
+                conn.pasta_diario,
+                (
+                    {
+                        "tipo": "canal",
+                        "canal_id": cid,
+                        "campos": {**(banco._loads(cfg) or {}), "nome": nome, "criado_em": criado},
+                    }
+                    for cid, nome, cfg, criado in linhas
+                ),
+            )
+        n_canais += len(linhas)
+
+    for lote in _lotes_arquivo(_encontrar(pasta_origem, "videos"), tamanho_lote):
+        n_videos += _importar_lote_videos(conn, lote.to_pylist())
+
+    # Índices e KPIs derivados: recalculados uma vez no fim da carga
+    with conn:
+        banco._atualizar_indices(conn)
+        banco._recalcular_kpis(conn)
+    diario.compactar(conn.pasta_diario)
+
+    return {
+        "canais": n_canais,
+        "videos": n_videos,
+        "segundos": time.perf_counter() - inicio,
+    }
+
+
+def _importar_lote_videos(conn, linhas: list[dict]) -> int:
+    videos, status, artefatos, eventos = [], [], [], []
+    for v in linhas:
+        vid = v["video_id"]
+        ts = v["ultima_atualizacao"]
+        videos.append(
+            (vid, v["canal_id"], v["titulo"] or "", v["descricao"] or "", v["tipo"],
+             v["criado_em"], ts)
+        )
+        st = {e: bool(v[f"status_{e}"]) for e in banco.ETAPAS}
+        status += [(vid, e, int(ok), ts) for e, ok in st.items()]
+        info = (
+            modelos.loads(v["publicacao_info_json"]) if v["publicacao_info_json"] else None
+        )
+        arts = {"youtube_url": v["youtube_url"], "publicacao_info": info}
+        artefatos += [(vid, k, banco._dumps(val), ts) for k, val in arts.items()]
+        eventos.append(
+            {
+                "ts": ts,
+                "tipo": "video",
+                "video_id": vid,
+                "canal_id": v["canal_id"],
+                "campos": {
+                    "titulo": v["titulo"] or "",
+                    "descricao": v["descricao"] or "",
+                    "tipo": v["tipo"],
+                    "criado_em": v["criado_em"],
+                },
+                "status": st,
+                "artefatos": arts,
+            }
+        )
+    with conn:
+        # Upsert (e não REPLACE) para os triggers de busca e KPIs verem um UPDATE
+        conn.executemany(
+            "INSERT INTO videos (video_id, canal_id, titulo, descricao, tipo, criado_em, "
+            "ultima_atualizacao, fase_desde) VALUES (?, ?, ?, ?, ?, ?, ?, julianday(?7)) "
+            "ON CONFLICT(video_id) DO UPDATE SET canal_id = excluded.canal_id, "
+            "titulo = excluded.titulo, descricao = excluded.descricao, tipo = excluded.tipo, "
+            "criado_em = excluded.criado_em, ultima_atualizacao = excluded.ultima_atualizacao",
+            videos,
+        )
+        conn.executemany(
+            "INSERT INTO status (video_id, etapa, concluido, atualizado_em) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(video_id, etapa) DO UPDATE SET concluido = excluded.concluido, "
+            "atualizado_em = excluded.atualizado_em",
+            status,
+        )
+        conn.executemany(
+            "INSERT INTO artefatos (video_id, chave, valor, atualizado_em, versao) "
+            "VALUES (?, ?, ?, ?, 1) ON CONFLICT(video_id, chave) DO UPDATE SET "
+            "valor = excluded.valor, atualizado_em = excluded.atualizado_em, "
+            "versao = versao + 1",
+            artefatos,
+        )
+        diario.registrar_varios(conn.pasta_diario, eventos)
+    return len(linhas)
+
+
+def ler_videos(caminho: str, colunas: list[str] | None = None):
+    """DataFrame (pandas) de um `videos.parquet`/`.arrow` exportado, para análise."""
+    _exigir_pyarrow()
+    if caminho.endswith(FORMATOS["parquet"]):
+        return pq.read_table(caminho, columns=colunas).to_pandas()
+    with pa.memory_map(caminho, "r") as origem:
+        tabela = pa.ipc.open_file(origem).read_all()
+    return (tabela.select(colunas) if colunas else tabela).to_pandas()
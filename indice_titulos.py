@@ -0,0 +1,245 @@
+"""
+Índice invertido de n-gramas dos títulos de vídeos analisados.
+
+Cada título vira um conjunto de unigramas (sem stopwords) e bigramas, com
+números normalizados para `#` ("7 segredos" e "10 segredos" são o mesmo
+padrão `# segredos`). As postings ficam em `ngramas`, ordenadas por
+(nicho, n-grama, views): "títulos com 'segredo' por views" é uma leitura de
+intervalo do índice, e a mediana de views de um n-grama é um OFFSET nesse
+intervalo. `ngramas_stats` guarda quantidade e mediana por n-grama e só é
+recalculada para os n-gramas dos vídeos que entraram ou mudaram.
+
+A indexação é incremental: reindexar o mesmo vídeo com o mesmo título e as
+mesmas views não faz nada.
+"""
+
+import re
+import unicodedata
+
+import banco
+
+N_MAX = 2
+MIN_SUPORTE = 3  # n-gramas em menos vídeos que isso não entram no ranking
+
+STOPWORDS = frozenset(
+    """
+    a o e é de da do das dos em no na nos nas um uma uns umas para pra por com
+    sem que se não ao aos à às ou mas mais como seu sua seus suas eu você voce
+    ele ela eles elas isso isto esse essa este esta the of and to in on for is
+    """.split()
+)
+
+_RE_TOKEN = re.compile(r"[^\W_]+")
+_RE_NUMERO = re.compile(r"^\d+([.,]\d+)*$")
+
+
+def chave_nicho(nicho: str | None) -> str:
+    """Nicho digitado pelo usuário -> chave ("História " == "historia")."""
+    sem_acento = unicodedata.normalize("NFKD", (nicho or "").strip().lower())
+    return "".join(c for c in sem_acento if not unicodedata.combining(c))
+
+
+def tokens(titulo: str) -> list[str]:
+    return ["#" if _RE_NUMERO.match(t) else t for t in _RE_TOKEN.findall((titulo or "").lower())]
+
+
+def _informativo(token: str) -> bool:
+    return token not in STOPWORDS and token != "#"
+
+
+def ngramas(titulo: str, n_max: int = N_MAX) -> set[str]:
+    """Unigramas sem stopwords + n-gramas de 2..n_max tokens consecutivos."""
+    toks = tokens(titulo)
+    grams = {t for t in toks if _informativo(t)}
+    for n in range(2, n_max + 1):
+        for i in range(len(toks) - n + 1):
+            janela = toks[i : i + n]
+            # Bigrama só de stopwords/números ("de um", "# de") não diz nada
+            if any(_informativo(t) for t in janela):
+                grams.add(" ".join(janela))
+    return grams
+
+
+# -------------------------------------------------------------------
+# Indexação incremental
+# -------------------------------------------------------------------
+def _recalcular_stats(conn, tocados: set[tuple[str, str]]) -> None:
+    for nicho, ngrama in tocados:
+        qtd = conn.execute(
+            "SELECT COUNT(*) FROM ngramas WHERE nicho = ? AND ngrama = ?", (nicho, ngrama)
+        ).fetchone()[0]
+        if not qtd:
+            conn.execute(
+                "DELETE FROM ngramas_stats WHERE nicho = ? AND ngrama = ?", (nicho, ngrama)
+            )
+            continue
+        mediana = conn.execute(
+            "SELECT views FROM ngramas WHERE nicho = ? AND ngrama = ? "
+            "ORDER BY views LIMIT 1 OFFSET ?",
+            (nicho, ngrama, (qtd - 1) // 2),
+        ).fetchone()[0]
+        conn.execute(
+            "INSERT OR REPLACE INTO ngramas_stats (nicho, ngrama, qtd, mediana) VALUES (?, ?, ?, ?)",
+            (nicho, ngrama, qtd, mediana),
+        )
+
+
+def _desindexar(conn, doc, tocados: set) -> None:
+    grams = ngramas(doc["titulo"])
+    conn.executemany(
+        "DELETE FROM ngramas WHERE nicho = ? AND ngrama = ? AND views = ? AND video_id = ?",
+        ((doc["nicho"], g, doc["views"], doc["video_id"]) for g in grams),
+    )
+    tocados.update((doc["nicho"], g) for g in grams)
+
+
+def indexar(videos, nicho: str = "", conn=None) -> dict:
+    """
+    Indexa (ou reindexa) vídeos: iterável de dicts com `video_id`, `titulo`,
+    `views` e, opcionalmente, `channel_id`. Um vídeo já indexado com outro
+    título, views ou nicho sai das postings antigas antes de entrar nas
+    novas. Devolve {"indexados", "inalterados", "ngramas_recalculados"}.
+    """
+    conn = conn or banco.conectar()
+    nicho = chave_nicho(nicho)
+    tocados = set()
+    indexados = inalterados = 0
+    with conn:
+        for v in videos:
+            video_id, titulo, views = v["video_id"], v["titulo"] or "", int(v["views"] or 0)
+            doc = conn.execute(
+                "SELECT video_id, nicho, titulo, views FROM ngramas_docs WHERE video_id = ?",
+                (video_id,),
+            ).fetchone()
+            if doc and (doc["nicho"], doc["titulo"], doc["views"]) == (nicho, titulo, views):
+                inalterados += 1
+                continue
+            if doc:
+                _desindexar(conn, doc, tocados)
+            grams = ngramas(titulo)
+            conn.executemany(
+                "INSERT OR IGNORE INTO ngramas (nicho, ngrama, views, video_id) VALUES (?, ?, ?, ?)",
+                ((nicho, g, views, video_id) for g in grams),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO ngramas_docs (video_id, nicho, channel_id, titulo, views) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (video_id, nicho, v.get("channel_id") or "", titulo, views),
+            )
+            tocados.update((nicho, g) for g in grams)
+            indexados += 1
+        _recalcular_stats(conn, tocados)
+    return {
+        "indexados": indexados,
+        "inalterados": inalterados,
+        "ngramas_recalculados": len(tocados),
+    }
+
+
+# -------------------------------------------------------------------
+# Consultas
+# -------------------------------------------------------------------
+def nichos(conn=None) -> list[str]:
+    conn = conn or banco.conectar()
+    # DISTINCT por saltos na chave primária (um seek por nicho, sem varrer)
+    return [
+        r[0]
+        for r in conn.execute(
+            """
+            WITH RECURSIVE n(nicho) AS (
+                SELECT MIN(nicho) FROM ngramas_stats
+                UNION ALL
+                SELECT (SELECT MIN(nicho) FROM ngramas_stats WHERE nicho > n.nicho)
+                FROM n WHERE n.nicho IS NOT NULL
+            )
+            SELECT nicho FROM n WHERE nicho IS NOT NULL
+            """
+        )
+    ]
+
+
+def top_ngramas(
+    nicho: str = "", limite: int = 20, min_videos: int = MIN_SUPORTE, tamanho: int | None = None, conn=None
+) -> list[dict]:
+    """
+    N-gramas do nicho com maior mediana de views, entre os que aparecem em
+    pelo menos `min_videos` vídeos. `tamanho` filtra por número de palavras
+    (1 = unigramas, 2 = bigramas).
+    """
+    conn = conn or banco.conectar()
+    nicho = chave_nicho(nicho)
+    filtro_tamanho = ""
+    params = [nicho, max(min_videos, MIN_SUPORTE)]
+    if tamanho is not None:
+        # n-grama de k palavras tem k-1 espaços
+        filtro_tamanho = "AND length(ngrama) - length(replace(ngrama, ' ', '')) = ?"
+        params.append(tamanho - 1)
+    linhas = conn.execute(
+        f"""
+        SELECT ngrama, qtd, mediana FROM ngramas_stats INDEXED BY idx_ngramas_stats_mediana
+        WHERE nicho = ? AND qtd >= 3 AND qtd >= ? {filtro_tamanho}
+        ORDER BY mediana DESC LIMIT ?
+        """,
+        (*params, limite),
+    ).fetchall()
+    return [dict(l) for l in linhas]
+
+
+def _chave_indexada(toks: list[str]) -> str | None:
+    """N-grama indexado que toda ocorrência de `toks` contém; None se não há."""
+    if len(toks) == 1:
+        return toks[0] if _informativo(toks[0]) else None
+    for i in range(len(toks) - 1):
+        if _informativo(toks[i]) or _informativo(toks[i + 1]):
+            return " ".join(toks[i : i + 2])
+    return None
+
+
+def _contem(toks_titulo: list[str], toks: list[str]) -> bool:
+    """`toks` aparece como sequência de tokens (não como pedaço de palavra)."""
+    k = len(toks)
+    return any(toks_titulo[i : i + k] == toks for i in range(len(toks_titulo) - k + 1))
+
+
+def buscar(termo: str, nicho: str | None = None, limite: int = 20, conn=None) -> list[dict]:
+    """
+    Títulos que contêm `termo` (uma palavra ou uma expressão), do mais visto
+    para o menos visto. Sem `nicho`, procura em todos.
+
+    Usa a posting de um n-grama do termo e confere a expressão inteira
+    token a token. Termos só de stopwords/números ("como", "7", "de um")
+    não têm posting: nesse caso varre os títulos do nicho.
+    """
+    conn = conn or banco.conectar()
+    toks = tokens(termo)
+    if not toks:
+        return []
+    chave = _chave_indexada(toks)
+    lista_nichos = [chave_nicho(nicho)] if nicho is not None else nichos(conn)
+
+    resultado = []
+    for n in lista_nichos:
+        if chave is not None:
+            linhas = conn.execute(
+                "SELECT d.video_id, d.titulo, d.views, d.channel_id, d.nicho "
+                "FROM ngramas g JOIN ngramas_docs d ON d.video_id = g.video_id "
+                "WHERE g.nicho = ? AND g.ngrama = ? ORDER BY g.views DESC",
+                (n, chave),
+            )
+        else:
+            linhas = conn.execute(
+                "SELECT video_id, titulo, views, channel_id, nicho FROM ngramas_docs "
+                "WHERE nicho = ? ORDER BY views DESC",
+                (n,),
+            )
+        achados = 0
+        for linha in linhas:
+            # A posting de um unigrama já é a resposta; o resto é conferido
+            if (len(toks) > 1 or chave is None) and not _contem(tokens(linha["titulo"]), toks):
+                continue
+            resultado.append(dict(linha))
+            achados += 1
+            if achados >= limite:
+                break
+    resultado.sort(key=lambda d: d["views"], reverse=True)
+    return resultado[:limite]
@@ -0,0 +1,194 @@
+"""
+Registros compactos de canal e vídeo e o codec usado para gravá-los.
+
+`Canal` e `Video` são dataclasses com `__slots__` (sem `__dict__` por
+instância) e o status das etapas de um vídeo é um inteiro com um bit por
+etapa, em vez de um dict {etapa: bool}. É o formato do estado em memória
+do diário e do snapshot em disco.
+
+`de_dict` aceita os dicts antigos (inclusive chaves de etapa que já
+apareceram com outro nome, como `2_thumbnails`) e `para_dict` devolve o
+formato que as páginas usam.
+
+O codec usa `orjson` quando instalado e cai para `json` da biblioteca
+padrão; a saída é JSON nos dois casos, então arquivos antigos continuam
+legíveis.
+"""
+
+import json
+from dataclasses import dataclass, field
+
+try:
+    import orjson
+except ImportError:  # opcional: só acelera (de)serialização
+    orjson = None
+
+ETAPAS = [
+    "0_canal",
+    "1_roteiro",
+    "2_thumbnail",
+    "3_audio",
+    "4_video",
+    "5_publicacao",
+    "6_dashboard",
+]
+
+# Nomes de etapa que já foram gravados com grafia diferente
+ALIASES_ETAPA = {"2_thumbnails": "2_thumbnail"}
+
+_BITS = {e: 1 << i for i, e in enumerate(ETAPAS)}
+
+_CAMPOS_FIXOS_CANAL = ("canal_id", "nome", "criado_em", "videos")
+_CAMPOS_VIDEO = ("titulo", "descricao", "tipo", "criado_em", "ultima_atualizacao")
+
+
+# -------------------------------------------------------------------
+# Status das etapas
+# -------------------------------------------------------------------
+def normalizar_etapa(etapa: str) -> str:
+    return ALIASES_ETAPA.get(etapa, etapa)
+
+
+def normalizar_status(status: dict | None) -> dict:
+    """Renomeia etapas antigas; se duas grafias vierem juntas, vale o True."""
+    normal = {}
+    for etapa, concluido in (status or {}).items():
+        etapa = normalizar_etapa(etapa)
+        normal[etapa] = bool(concluido) or normal.get(etapa, False)
+    return normal
+
+
+def aplicar_status(bits: int, status: dict | None) -> int:
+    """Liga/desliga no bitmask as etapas de um dict {etapa: bool}."""
+    for etapa, concluido in normalizar_status(status).items():
+        bit = _BITS.get(etapa)
+        if bit is None:
+            continue
+        bits = bits | bit if concluido else bits & ~bit
+    return bits
+
+
+def status_para_bits(status: dict | None) -> int:
+    return aplicar_status(0, status)
+
+
+def bits_para_status(bits: int) -> dict:
+    return {e: bool(bits & b) for e, b in _BITS.items()}
+
+
+# -------------------------------------------------------------------
+# Registros
+# -------------------------------------------------------------------
+@dataclass(slots=True)
+class Canal:
+    canal_id: str
+    nome: str = ""
+    criado_em: str | None = None
+    config: dict = field(default_factory=dict)
+
+    def atualizar(self, campos: dict) -> None:
+        for chave, valor in campos.items():
+            if chave == "nome":
+                self.nome = valor
+            elif chave == "criado_em":
+                self.criado_em = valor
+            elif chave not in _CAMPOS_FIXOS_CANAL:
+                self.config[chave] = valor
+
+    @classmethod
+    def de_dict(cls, canal_id: str, dados: dict) -> "Canal":
+        canal = cls(canal_id)
+        canal.atualizar(dados)
+        return canal
+
+    def para_dict(self) -> dict:
+        return {**self.config, "nome": self.nome, "criado_em": self.criado_em}
+
+    def para_lista(self) -> list:
+        return [self.canal_id, self.nome, self.criado_em, self.config]
+
+    @classmethod
+    def de_lista(cls, valores: list) -> "Canal":
+        return cls(*valores)
+
+
+@dataclass(slots=True)
+class Video:
+    video_id: str
+    canal_id: str | None = None
+    titulo: str = ""
+    descricao: str = ""
+    tipo: str | None = None
+    criado_em: str | None = None
+    ultima_atualizacao: str | None = None
+    status: int = 0
+    artefatos: dict = field(default_factory=dict)
+
+    def concluido(self, etapa: str) -> bool:
+        return bool(self.status & _BITS.get(normalizar_etapa(etapa), 0))
+
+    def atualizar(self, campos: dict) -> None:
+        for chave in _CAMPOS_VIDEO:
+            if chave in campos:
+                setattr(self, chave, campos[chave])
+
+    @classmethod
+    def de_dict(cls, video_id: str, dados: dict) -> "Video":
+        video = cls(video_id, canal_id=dados.get("canal_id"))
+        video.atualizar(dados)
+        video.status = status_para_bits(dados.get("status"))
+        video.artefatos = dict(dados.get("artefatos") or {})
+        return video
+
+    def para_dict(self) -> dict:
+        return {
+            "video_id": self.video_id,
+            "canal_id": self.canal_id,
+            "titulo": self.titulo,
+            "descricao": self.descricao,
+            "tipo": self.tipo,
+            "criado_em": self.criado_em,
+            "ultima_atualizacao": self.ultima_atualizacao,
+            "status": bits_para_status(self.status),
+            "artefatos": self.artefatos,
+        }
+
+    def para_lista(self) -> list:
+        return [
+            self.video_id,
+            self.canal_id,
+            self.titulo,
+            self.descricao,
+            self.tipo,
+            self.criado_em,
+            self.ultima_atualizacao,
+            self.status,
+            self.artefatos,
+        ]
+
+    @classmethod
+    def de_lista(cls, valores: list) -> "Video":
+        return cls(*valores)
+
+
+# -------------------------------------------------------------------
+# Codec
+# -------------------------------------------------------------------
+def dumps(valor) -> bytes:
+    """Serializa para JSON em UTF-8 (orjson se disponível)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(valor, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # tipo que o orjson não conhece: deixa o json tentar
+    return json.dumps(valor, ensure_ascii=False).encode("utf-8")
+
+
+def dumps_texto(valor) -> str:
+    return dumps(valor).decode("utf-8")
+
+
+def loads(dados: bytes | str):
+    if orjson is not None:
+        return orjson.loads(dados)
+    return json.loads(dados)
@@ -1,194 +1,112 @@
+import functools
+
 import streamlit as st
-import googleapiclient.discovery
 import pandas as pd
 import numpy as np
-from urllib.parse import urlparse
 from datetime import datetime
 
+import banco
+import cache_api
+import cliente_youtube
+import indice_titulos
+import rastreador
+import resolvedor
+import sincronizador
+import titulos
+
 st.set_page_config(page_title="0 – Laboratório de Canais", layout="wide")
 st.title("🔬 Laboratório de Canais (Modelagem + Análise)")
 
 # -------------------------------------------------------------------
-# Integra com o "banco" do app principal
+# Integra com o banco compartilhado do app principal
 # -------------------------------------------------------------------
-def criar_db_vazio():
-    return {"canais": {}}
-
-if "db" not in st.session_state:
-    st.session_state.db = criar_db_vazio()
-
-db = st.session_state.db
-
 if "canal_atual_id" not in st.session_state:
     st.session_state.canal_atual_id = None
 
 # -------------------------------------------------------------------
 # YouTube API (para análise opcional)
 # -------------------------------------------------------------------
+def chave_youtube() -> str | None:
+    chave = cliente_youtube.chave(st.secrets)
+    if not chave and not cliente_youtube.em_replay():
+        st.error("YOUTUBE_API_KEY não encontrado em st.secrets ou variáveis de ambiente.")
+        st.stop()
+    return chave
+
+def fabrica_clientes_youtube():
+    # Para os pools de threads (um cliente por thread); a chave é lida aqui,
+    # na thread da página
+    return functools.partial(cliente_youtube.criar_cliente, chave_youtube())
+
 @st.cache_resource
 def get_youtube_service():
-    youtube = googleapiclient.discovery.build(
-        "youtube", "v3", developerKey=st.secrets["YOUTUBE_API_KEY"]
-    )
-    return youtube
-
-youtube = get_youtube_service()
-
-def extrair_channel_id(url: str):
-    """Extrai/resolve um channelId a partir de vários formatos de URL, usando forHandle quando possível."""
-    url = url.strip()
-    if not url:
-        return None
-
-    parsed = urlparse(url)
-    path = parsed.path.strip("/")
-
-    # /channel/UCxxxx
-    if path.startswith("channel/"):
-        return path.split("/")[1]
-
-    # Handle @nome ou /@nome – usar channels().list(forHandle=...) para ser exato
-    if path.startswith("@"):
-        handle = path[1:]
-        try:
-            ch_req = youtube.channels().list(
-                part="id",
-                forHandle=handle,
-            )
-            ch_res = ch_req.execute()
-            items = ch_res.get("items", [])
-            if items:
-                return items[0]["id"]
-
-            # Fallback: search
-            req = youtube.search().list(
-                part="snippet",
-                q=handle,
-                type="channel",
-                maxResults=1,
-            )
-            res = req.execute()
-            items = res.get("items", [])
-            if items:
-                return items[0]["snippet"]["channelId"]
-        except Exception:
-            return None
-
-    # /user/username ou /c/customname
-    parts = path.split("/")
-    if parts and parts[0] in ["user", "c"]:
-        username = parts[1] if len(parts) > 1 else ""
-        if username:
-            try:
-                req = youtube.search().list(
-                    part="snippet",
-                    q=username,
-                    type="channel",
-                    maxResults=1,
-                )
-                res = req.execute()
-                items = res.get("items", [])
-                if items:
-                    return items[0]["snippet"]["channelId"]
-            except Exception:
-                return None
-
-    # Fallback: busca geral
-    try:
-        req = youtube.search().list(
-            part="snippet",
-            q=url,
-            type="channel",
-            maxResults=1,
-        )
-        res = req.execute()
-        items = res.get("items", [])
-        if items:
-            return items[0]["snippet"]["channelId"]
-    except Exception:
+    # Criado na primeira chamada à API, não ao abrir a página
+    return cliente_youtube.criar_cliente(chave_youtube())
+
+def analisar_canal_youtube(channel_id: str, limite: int | None = None):
+    """
+    Analisa canal via YouTube Data API: varre a playlist de uploads (todo o
+    catálogo ou os `limite` mais recentes) e ordena por views. As respostas
+    vêm do cache em disco (`cache_api`) quando ainda estão no TTL. None se
+    o canal não existe; falhas da API levantam `rastreador.ErroYoutube`.
+    """
+    analise = rastreador.analisar_canal(get_youtube_service(), channel_id, limite=limite)
+    if not analise:
         return None
 
-    return None
-
-@st.cache_data(ttl=3600)
-def analisar_canal_youtube(channel_id: str, top_n: int = 50):
-    """Analisa canal via YouTube Data API: top vídeos, padrões de título etc."""
-    try:
-        ch_req = youtube.channels().list(
-            part="snippet,statistics",
-            id=channel_id,
-        )
-        ch_res = ch_req.execute()
-        items = ch_res.get("items", [])
-        if not items:
-            return None
-
-        canal_info = items[0]
-
-        search_req = youtube.search().list(
-            part="id,snippet",
-            channelId=channel_id,
-            maxResults=min(top_n, 50),
-            order="date",
-            type="video",
-        )
-        search_res = search_req.execute()
-        vids_raw = search_res.get("items", [])
-
-        videos = []
-        ids = [v["id"]["videoId"] for v in vids_raw]
-        stats_map = {}
-        if ids:
-            stats_req = youtube.videos().list(
-                part="statistics,contentDetails",
-                id=",".join(ids),
-            )
-            stats_res = stats_req.execute()
-            stats_map = {
-                it["id"]: it for it in stats_res.get("items", [])
-            }
-
-        for v in vids_raw:
-            vid = v["id"]["videoId"]
-            sn = v["snippet"]
-            stt_item = stats_map.get(vid, {})
-            stt = stt_item.get("statistics", {})
-            cont = stt_item.get("contentDetails", {})
-
-            dur = cont.get("duration", "")
-            # Shorts: duração <= ~60s OU #shorts no título (heurística)
-            is_short = False
-            if "S" in dur and "M" not in dur and "H" not in dur:
-                is_short = True
-            if "#shorts" in sn.get("title", "").lower():
-                is_short = True
-
-            videos.append(
+    analise["videos"] = montar_df_videos(analise["videos"])
+    return analise
+
+def montar_df_videos(videos: list[dict]) -> pd.DataFrame:
+    df = pd.DataFrame(videos)
+    if not df.empty:
+        # Duração e Shorts do lote inteiro de uma vez (vetorizado)
+        feats = titulos.extrair(df["titulo"], duracoes=df["duracao"])
+        df["duracao_s"], df["is_short"] = feats["duracao_s"], feats["is_short"]
+        df["publicado"] = pd.to_datetime(df["publicado"], errors="coerce")
+        df = df.sort_values("views", ascending=False)
+        df["ctr_simulado"] = np.random.uniform(5, 18, len(df))  # fictício
+    return df
+
+def analisar_lote_youtube(channel_ids: list[str], limite: int | None, quota_max: int):
+    """
+    Analisa vários canais em paralelo (um cliente por thread, limitador de
+    taxa/quota compartilhado) e junta tudo num único DataFrame com a coluna
+    `canal`, no mesmo formato de `analisar_canal_youtube`.
+    """
+    limitador = rastreador.LimitadorTaxa(rastreador.CHAMADAS_POR_SEGUNDO, quota_max=quota_max)
+    t0 = datetime.now()
+    analises, erros = rastreador.analisar_varios(
+        fabrica_clientes_youtube(), channel_ids, limite=limite, limitador=limitador
+    )
+    uso = rastreador.novo_uso()
+    linhas = []
+    for a in analises:
+        rastreador.somar_uso(uso, a["uso"])
+        linhas += [{**v, "canal": a["nome"], "channel_id": a["channel_id"]} for v in a["videos"]]
+
+    return {
+        "nome": f"{len(analises)} canais",
+        "subscribers": sum(a["subscribers"] for a in analises),
+        "total_videos": sum(a["total_videos"] for a in analises),
+        "videos": montar_df_videos(linhas),
+        "uso": uso,
+        "canais": pd.DataFrame(
+            [
                 {
-                    "video_id": vid,
-                    "titulo": sn.get("title", "")[:120],
-                    "publicado": sn.get("publishedAt", ""),
-                    "views": int(stt.get("viewCount", 0)),
-                    "likes": int(stt.get("likeCount", 0)),
-                    "comments": int(stt.get("commentCount", 0)),
-                    "is_short": is_short,
+                    "canal": a["nome"],
+                    "channel_id": a["channel_id"],
+                    "inscritos": a["subscribers"],
+                    "vídeos analisados": len(a["videos"]),
+                    "quota": a["uso"]["quota"],
+                    "segundos": round(a["segundos"], 1),
                 }
-            )
-
-        df = pd.DataFrame(videos)
-        if not df.empty:
-            df["publicado"] = pd.to_datetime(df["publicado"], errors="coerce")
-            df = df.sort_values("views", ascending=False)
-            df["ctr_simulado"] = np.random.uniform(5, 18, len(df))  # fictício
-
-        return {
-            "nome": canal_info["snippet"]["title"],
-            "subscribers": int(canal_info["statistics"].get("subscriberCount", 0)),
-            "total_videos": int(canal_info["statistics"].get("videoCount", 0)),
-            "videos": df,
-        }
-    except Exception:
-        return None
+                for a in analises
+            ]
+        ),
+        "erros": erros,
+        "segundos": (datetime.now() - t0).total_seconds(),
+    }
 
 # -------------------------------------------------------------------
 # Sidebar – escolher canal já criado no sistema
@@ -196,9 +114,10 @@ def analisar_canal_youtube(channel_id: str, top_n: int = 50):
 with st.sidebar:
     st.header("🎛 Seleção de Canal no Sistema")
 
-    canais_ids = list(db["canais"].keys())
+    canais = banco.listar_canais()
+    canais_ids = [c["canal_id"] for c in canais]
     if canais_ids:
-        canais_nomes = [db["canais"][cid]["nome"] for cid in canais_ids]
+        canais_nomes = [c["nome"] for c in canais]
         idx_sel = st.selectbox(
             "Canal atual",
             options=range(len(canais_ids)),
@@ -211,6 +130,35 @@ with st.sidebar:
     else:
         st.info("Nenhum canal cadastrado ainda (crie no app principal ou aqui).")
 
+    st.markdown("---")
+    st.header("🗄 Cache da YouTube API")
+    cache = cache_api.resumo()
+    st.caption(
+        f"{cache['entradas']} respostas em disco ({cache['bytes'] / 1024 / 1024:.1f} MB). "
+        f"Neste processo: {cache['hits']} hits, {cache['revalidadas']} revalidadas, "
+        f"{cache['misses']} misses."
+    )
+    if st.button("Limpar cache da API"):
+        st.success(f"{cache_api.limpar()} respostas removidas do cache.")
+
+    st.header("📊 Quota da YouTube API")
+    quota = rastreador.LIMITADOR.situacao()
+    st.progress(
+        min(1.0, quota["usada"] / quota["limite"]),
+        text=f"Hoje: {quota['usada']} de {quota['limite']} unidades",
+    )
+    if quota["esgotada"]:
+        st.error("A API respondeu quotaExceeded: novas chamadas só depois da meia-noite (Pacífico).")
+    gasto = rastreador.uso_por_contexto()
+    if gasto:
+        st.dataframe(
+            pd.DataFrame(gasto)[
+                ["pagina", "acao", "quota", "chamadas", "do_cache", "retentativas", "erros"]
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+
 # -------------------------------------------------------------------
 # Layout principal: duas abas
 # -------------------------------------------------------------------
@@ -223,9 +171,8 @@ with tab1:
     st.subheader("🧬 Configuração detalhada do canal")
 
     canal_id = st.session_state.canal_atual_id
-    if canal_id and canal_id in db["canais"]:
-        canal_data = db["canais"][canal_id]
-    else:
+    canal_data = banco.obter_canal(canal_id)
+    if not canal_data:
         canal_data = {
             "nome": "",
             "link_youtube": "",
@@ -239,7 +186,6 @@ with tab1:
             "preferencias_titulo": "",
             "diretrizes_gerais": "",
             "criado_em": datetime.now().isoformat(),
-            "videos": {},
         }
 
     with st.form("form_canal"):
@@ -312,13 +258,7 @@ with tab1:
         salvar = st.form_submit_button("💾 Salvar configurações do canal")
 
     if salvar:
-        if not canal_id or canal_id not in db["canais"]:
-            from uuid import uuid4
-            canal_id = str(uuid4())[:8]
-            st.session_state.canal_atual_id = canal_id
-
-        db["canais"][canal_id] = {
-            **db["canais"].get(canal_id, {}),
+        dados_canal = {
             "nome": nome.strip(),
             "link_youtube": link.strip(),
             "nicho": nicho.strip(),
@@ -330,9 +270,15 @@ with tab1:
             "palavras_proibidas": palavras_proibidas.strip(),
             "preferencias_titulo": preferencias_titulo.strip(),
             "diretrizes_gerais": diretrizes_gerais.strip(),
-            "criado_em": canal_data.get("criado_em", datetime.now().isoformat()),
-            "videos": canal_data.get("videos", {}),
         }
+        if canal_data.get("canal_id"):
+            banco.atualizar_canal(canal_id, dados_canal)
+        else:
+            dados_canal["criado_em"] = canal_data.get(
+                "criado_em", datetime.now().isoformat()
+            )
+            canal_id = banco.criar_canal(dados_canal)
+            st.session_state.canal_atual_id = canal_id
         st.success("Canal atualizado no sistema!")
         st.rerun()
 
@@ -348,30 +294,107 @@ with tab1:
 with tab2:
     st.subheader("📊 Análise de um canal real no YouTube")
 
+    # Vídeos analisados entram no índice de n-gramas do nicho do canal atual
+    nicho_atual = (banco.obter_canal(st.session_state.canal_atual_id) or {}).get("nicho", "")
+
     col_l1, col_l2 = st.columns([2, 1])
     with col_l1:
         link_analise = st.text_input(
             "Cole o link do canal no YouTube para analisar",
-            value=db["canais"]
-            .get(st.session_state.canal_atual_id, {})
-            .get("link_youtube", ""),
+            value=(banco.obter_canal(st.session_state.canal_atual_id) or {}).get(
+                "link_youtube", ""
+            ),
         )
     with col_l2:
-        top_n = st.slider("Quantidade de vídeos para analisar", 5, 50, 20)
+        opcoes_limite = {
+            "50 mais recentes": 50,
+            "200 mais recentes": 200,
+            "1.000 mais recentes": 1000,
+            "Catálogo inteiro": None,
+        }
+        rotulo_limite = st.selectbox(
+            "Vídeos a varrer",
+            list(opcoes_limite),
+            index=3,
+            help="A playlist de uploads custa 1 unidade de quota a cada 50 vídeos.",
+        )
+        limite = opcoes_limite[rotulo_limite]
+
+    with st.expander("📋 Resolver uma lista de canais (um link por linha)"):
+        links_lista = st.text_area(
+            "Links, @handles ou ids de canais concorrentes",
+            value="\n".join(st.session_state.get("links_concorrentes", [])),
+            height=150,
+        )
+        if st.button("🔗 Resolver lista"):
+            links = [l.strip() for l in links_lista.splitlines() if l.strip()]
+            with st.spinner(f"Resolvendo {len(links)} links..."), \
+                    rastreador.contexto("Laboratório", "resolver lista"):
+                resolvidos, uso_res, erros_res = resolvedor.resolver_varios(
+                    fabrica_clientes_youtube(), links
+                )
+            st.session_state.links_concorrentes = links
+            st.session_state.canais_resolvidos = resolvidos
+            for link, erro in erros_res.items():
+                st.warning(f"{link}: {erro}")
+            st.caption(
+                f"{rastreador.total_chamadas(uso_res)} chamadas à API "
+                f"({uso_res['quota']} unidades de quota); o resto veio do cache de resoluções."
+            )
+
+        resolvidos = st.session_state.get("canais_resolvidos")
+        if resolvidos:
+            st.dataframe(
+                pd.DataFrame(
+                    [
+                        {"link": l, "channel_id": c or "❌ não encontrado"}
+                        for l, c in resolvidos.items()
+                    ]
+                ),
+                use_container_width=True,
+            )
+
+            ids_lote = [c for c in dict.fromkeys(resolvidos.values()) if c]
+            quota_lote = st.number_input(
+                "Quota máxima para o lote (unidades)",
+                min_value=1,
+                value=5000,
+                step=500,
+            )
+            if st.button(f"⚡ Analisar os {len(ids_lote)} canais em paralelo"):
+                with st.spinner(f"Analisando {len(ids_lote)} canais em paralelo..."), \
+                        rastreador.contexto("Laboratório", "análise em lote"):
+                    analise = analisar_lote_youtube(ids_lote, limite, int(quota_lote))
+                st.session_state.analise_canal_youtube = analise
+                st.session_state.analise_channel_id = None
+                indice_titulos.indexar(analise["videos"].to_dict("records"), nicho_atual)
+                for ch, erro in analise["erros"].items():
+                    st.warning(f"{ch}: {erro}")
+                st.success(f"Lote analisado em {analise['segundos']:.1f}s.")
 
     if st.button("🔍 Analisar canal no YouTube"):
-        ch_id = extrair_channel_id(link_analise)
-        if not ch_id:
-            st.error("Não foi possível extrair o ID do canal. Verifique o link.")
+        ch_id = analise = None
+        try:
+            with st.spinner("Consultando YouTube Data API..."), \
+                    rastreador.contexto("Laboratório", "análise de canal"):
+                ch_id = resolvedor.resolver(get_youtube_service(), link_analise)
+                if ch_id:
+                    analise = analisar_canal_youtube(ch_id, limite=limite)
+        except rastreador.QuotaEsgotada as e:
+            st.error(f"Quota da YouTube API esgotada: {e}")
+        except rastreador.ErroYoutube as e:
+            st.error(f"A YouTube API falhou: {e}")
         else:
-            with st.spinner("Consultando YouTube Data API..."):
-                analise = analisar_canal_youtube(ch_id, top_n=top_n)
-                if not analise:
-                    st.error("Erro ao consultar dados do canal.")
-                else:
-                    st.session_state.analise_canal_youtube = analise
-                    st.session_state.analise_channel_id = ch_id
-                    st.success("Análise concluída!")
+            if not ch_id or not analise:
+                st.error("Canal não encontrado. Verifique o link.")
+            else:
+                st.session_state.analise_canal_youtube = analise
+                st.session_state.analise_channel_id = ch_id
+                indice_titulos.indexar(
+                    analise["videos"].assign(channel_id=ch_id).to_dict("records"),
+                    nicho_atual,
+                )
+                st.success("Análise concluída!")
 
     analise = st.session_state.get("analise_canal_youtube")
     if analise:
@@ -382,6 +405,25 @@ with tab2:
             f"👥 {analise['subscribers']:,} inscritos  |  "
             f"🎬 {analise['total_videos']} vídeos"
         )
+        uso = analise["uso"]
+        st.caption(
+            f"{len(df_v)} vídeos analisados com "
+            f"{rastreador.total_chamadas(uso)} chamadas à API "
+            f"({uso['quota']} unidades de quota: "
+            + ", ".join(f"{m} × {n}" for m, n in sorted(uso["chamadas"].items()))
+            + "). "
+            f"Cache: {uso['cache']['hits']} hits, "
+            f"{uso['cache']['revalidadas']} revalidadas (304), "
+            f"{uso['cache']['misses']} misses."
+            + (f" {uso['retentativas']} retentativas após 429/5xx." if uso.get("retentativas") else "")
+        )
+        if analise.get("canais") is not None:
+            st.dataframe(analise["canais"], use_container_width=True)
+
+        # Em lote, as tabelas mostram de que canal veio cada vídeo
+        colunas_top = ["titulo", "views", "likes", "comments", "ctr_simulado"]
+        if "canal" in df_v.columns:
+            colunas_top = ["canal"] + colunas_top
 
         if not df_v.empty:
             # Separar longos e shorts
@@ -399,9 +441,7 @@ with tab2:
                     "https://www.youtube.com/watch?v=" + top10_long["video_id"]
                 )
                 st.dataframe(
-                    top10_long[
-                        ["titulo", "views", "likes", "comments", "ctr_simulado"]
-                    ],
+                    top10_long[colunas_top],
                     use_container_width=True,
                 )
 
@@ -421,9 +461,7 @@ with tab2:
                     "https://www.youtube.com/watch?v=" + top10_short["video_id"]
                 )
                 st.dataframe(
-                    top10_short[
-                        ["titulo", "views", "likes", "comments", "ctr_simulado"]
-                    ],
+                    top10_short[colunas_top],
                     use_container_width=True,
                 )
 
@@ -435,26 +473,22 @@ with tab2:
             # Padrões de títulos (usando todos os vídeos analisados)
             st.subheader("🧠 Padrões de títulos (todos os vídeos analisados)")
 
-            titulos = df_v["titulo"].tolist()
-            n = len(titulos)
-            numeros = len([t for t in titulos if any(ch.isdigit() for ch in t)])
-            perguntas = len([t for t in titulos if "?" in t])
-            emojis = len(
-                [t for t in titulos if any(c in t for c in ["🔥", "💰", "🚀", "😱", "😮"])]
+            gatilhos_txt = st.text_input(
+                "Palavras-gatilho (separadas por vírgula)",
+                value=", ".join(titulos.GATILHOS_PADRAO),
             )
-            palavras_trigger = sum(
-                t.lower().count(word)
-                for t in titulos
-                for word in ["segredo", "milionário", "rápido", "fácil", "nunca", "sempre"]
+            padroes = titulos.resumo(
+                titulos.extrair(df_v["titulo"], gatilhos=gatilhos_txt.split(","))
             )
 
             c1, c2 = st.columns(2)
             with c1:
-                st.metric("Títulos com números", f"{numeros/n*100:.0f}%")
-                st.metric("Títulos em forma de pergunta", f"{perguntas/n*100:.0f}%")
+                st.metric("Títulos com números", f"{padroes['pct_numeros']:.0f}%")
+                st.metric("Títulos em forma de pergunta", f"{padroes['pct_perguntas']:.0f}%")
             with c2:
-                st.metric("Títulos com emoji", f"{emojis/n*100:.0f}%")
-                st.metric("Ocorrências de gatilhos", palavras_trigger)
+                st.metric("Títulos com emoji", f"{padroes['pct_emojis']:.0f}%")
+                st.metric("Ocorrências de gatilhos", padroes["gatilhos"])
+            st.caption(f"Tamanho médio do título: {padroes['comprimento_medio']:.0f} caracteres.")
 
             melhor_titulo = (
                 df_long.head(1)["titulo"].iloc[0]
@@ -472,18 +506,25 @@ with tab2:
                     st.success("Template salvo em session_state.titulo_template")
 
             with col_bt2:
-                if st.session_state.canal_atual_id in db["canais"]:
+                canal_cfg = banco.obter_canal(st.session_state.canal_atual_id)
+                if canal_cfg:
                     sugestao = (
-                        f"- {numeros/n*100:.0f}% dos top vídeos usam NÚMEROS no título.\n"
-                        f"- {perguntas/n*100:.0f}% usam PERGUNTAS fortes.\n"
-                        f"- {emojis/n*100:.0f}% usam EMOJIS.\n"
+                        f"- {padroes['pct_numeros']:.0f}% dos top vídeos usam NÚMEROS no título.\n"
+                        f"- {padroes['pct_perguntas']:.0f}% usam PERGUNTAS fortes.\n"
+                        f"- {padroes['pct_emojis']:.0f}% usam EMOJIS.\n"
                         "- Priorizar títulos curtos com benefício claro na frente.\n"
                     )
                     if st.button("✍️ Gravar essas diretrizes no canal atual"):
-                        canal_cfg = db["canais"][st.session_state.canal_atual_id]
-                        atual = canal_cfg.get("preferencias_titulo", "")
-                        novo = (atual + "\n\n" + sugestao).strip()
-                        canal_cfg["preferencias_titulo"] = novo
+                        # Acrescenta sobre o valor mais recente (outra sessão
+                        # pode ter editado as preferências nesse meio tempo)
+                        banco.alterar_canal(
+                            canal_cfg["canal_id"],
+                            lambda atual: {
+                                "preferencias_titulo": (
+                                    atual.get("preferencias_titulo", "") + "\n\n" + sugestao
+                                ).strip()
+                            },
+                        )
                         st.success(
                             "Diretrizes gravadas nas preferências de título do canal."
                         )
@@ -491,6 +532,113 @@ with tab2:
         else:
             st.info("Canal sem vídeos públicos para análise.")
 
+    # ---------- PADRÕES VENCEDORES (ÍNDICE DE N-GRAMAS) ----------
+    st.markdown("---")
+    st.subheader("🔎 Palavras e expressões que mais puxam views")
+    st.caption(
+        "Todos os vídeos já analisados (canal a canal ou em lote) entram num índice "
+        "de palavras e pares de palavras por nicho. A mediana de views mostra o que "
+        "funciona de forma consistente, não só no maior sucesso."
+    )
+    col_n1, col_n2, col_n3 = st.columns([2, 1, 1])
+    with col_n1:
+        nicho_idx = st.text_input("Nicho", value=nicho_atual, key="nicho_indice")
+    with col_n2:
+        tipo_ngrama = st.selectbox("Tipo", ["Palavras", "Pares de palavras", "Ambos"])
+    with col_n3:
+        min_videos = st.number_input(
+            "Mín. de vídeos", min_value=indice_titulos.MIN_SUPORTE, value=5
+        )
+
+    tamanho = {"Palavras": 1, "Pares de palavras": 2, "Ambos": None}[tipo_ngrama]
+    top_ng = indice_titulos.top_ngramas(
+        nicho_idx, limite=20, min_videos=int(min_videos), tamanho=tamanho
+    )
+    if not top_ng:
+        st.info("Nada indexado para este nicho ainda. Analise alguns canais acima.")
+    else:
+        st.dataframe(
+            pd.DataFrame(top_ng).rename(
+                columns={"ngrama": "expressão", "qtd": "vídeos", "mediana": "mediana de views"}
+            ),
+            use_container_width=True,
+        )
+
+        canal_cfg_idx = banco.obter_canal(st.session_state.canal_atual_id)
+        if canal_cfg_idx and st.button("✍️ Gravar essas expressões nas preferências de título"):
+            sugestao_ng = (
+                f"- Expressões com maior mediana de views no nicho '{nicho_idx}': "
+                + ", ".join(f"\"{t['ngrama']}\"" for t in top_ng[:10])
+                + "."
+            )
+            banco.alterar_canal(
+                canal_cfg_idx["canal_id"],
+                lambda atual: {
+                    "preferencias_titulo": (
+                        atual.get("preferencias_titulo", "") + "\n\n" + sugestao_ng
+                    ).strip()
+                },
+            )
+            st.success("Expressões gravadas nas preferências de título do canal.")
+
+    termo = st.text_input("Buscar títulos com a palavra/expressão", placeholder="segredo")
+    if termo:
+        achados = indice_titulos.buscar(termo, nicho_idx, limite=20)
+        if not achados:
+            st.info("Nenhum título indexado contém esse termo.")
+        else:
+            st.dataframe(
+                pd.DataFrame(achados)[["titulo", "views", "channel_id"]],
+                use_container_width=True,
+            )
+            if st.button("💡 Usar o mais visto como template (página 1)"):
+                st.session_state.titulo_template = achados[0]["titulo"]
+                st.success("Template salvo em session_state.titulo_template")
+
+    # ---------- SINCRONIZAÇÃO INCREMENTAL ----------
+    ch_sync = st.session_state.get("analise_channel_id")
+    if ch_sync:
+        st.markdown("---")
+        st.subheader("📈 Velocidade de views (sincronização incremental)")
+        st.caption(
+            "Cada sincronização busca só os uploads novos e um snapshot de views dos "
+            f"vídeos dos últimos {sincronizador.JANELA_DIAS} dias. Com duas ou mais "
+            "sincronizações aparece o ritmo recente (views/hora entre coletas)."
+        )
+        if st.button("🔄 Sincronizar canal agora"):
+            with st.spinner("Sincronizando..."), \
+                    rastreador.contexto("Laboratório", "sincronizar canal"):
+                try:
+                    res_sync = sincronizador.sincronizar_canal(get_youtube_service(), ch_sync)
+                except rastreador.ErroYoutube as e:
+                    res_sync = None
+                    st.error(f"Erro ao sincronizar: {e}")
+            if res_sync:
+                st.success(
+                    f"{res_sync['novos']} vídeos novos, {res_sync['atualizados']} com views "
+                    f"atualizadas; {rastreador.total_chamadas(res_sync['uso'])} chamadas "
+                    f"({res_sync['uso']['quota']} unidades) em {res_sync['segundos']:.1f}s."
+                )
+
+        velocidades = sincronizador.velocidade_views(ch_sync)
+        if velocidades:
+            df_vel = pd.DataFrame(velocidades)
+            st.dataframe(
+                df_vel[
+                    [
+                        "titulo",
+                        "publicado_em",
+                        "views",
+                        "views_por_hora",
+                        "views_por_hora_recente",
+                        "snapshots",
+                    ]
+                ],
+                use_container_width=True,
+            )
+        else:
+            st.info("Nenhum snapshot ainda para este canal. Clique em sincronizar.")
+
     st.markdown("---")
     st.caption(
         "Use esta aba para copiar estratégias de canais reais e alimentar as "
@@ -1,24 +1,20 @@
 import os
-import json
 import uuid
 from datetime import datetime
 
 import streamlit as st
-from groq import Groq  # IA principal para roteiro [web:169][web:181]
+
+import banco
+import cache_llm
+import roteiro_ia
+import telemetria_llm
 
 st.set_page_config(page_title="1 – Roteiro Viral", layout="wide")
 st.title("📝 1 – Gerador de Roteiro Longo para YouTube (Groq)")
 
 # -------------------------------------------------------------------
-# Integração com o "banco" (monitor)
+# Integração com o banco compartilhado (monitor)
 # -------------------------------------------------------------------
-def criar_db_vazio():
-    return {"canais": {}}
-
-if "db" not in st.session_state:
-    st.session_state.db = criar_db_vazio()
-db = st.session_state.db
-
 if "canal_atual_id" not in st.session_state:
     st.session_state.canal_atual_id = None
 if "video_atual_id" not in st.session_state:
@@ -27,18 +23,16 @@ if "video_atual_id" not in st.session_state:
 canal_id = st.session_state.canal_atual_id
 video_id = st.session_state.video_atual_id
 
-if not canal_id or canal_id not in db["canais"]:
+canal = banco.obter_canal(canal_id)
+if not canal:
     st.error("Nenhum canal selecionado. Vá ao app principal (monitor) e escolha um canal/vídeo.")
     st.stop()
 
-canal = db["canais"][canal_id]
-videos = canal["videos"]
-if not video_id or video_id not in videos:
+video = banco.obter_video(video_id)
+if not video or video["canal_id"] != canal_id:
     st.error("Nenhum vídeo selecionado. Vá ao monitor e escolha um vídeo para este canal.")
     st.stop()
 
-video = videos[video_id]
-
 # -------------------------------------------------------------------
 # Artefatos de roteiro
 # -------------------------------------------------------------------
@@ -46,31 +40,32 @@ if "artefatos" not in video:
     video["artefatos"] = {}
 
 if "roteiro" not in video["artefatos"] or video["artefatos"]["roteiro"] is None:
-    video["artefatos"]["roteiro"] = {
-        "id": str(uuid.uuid4())[:8],
-        "titulo_video": video.get("titulo", ""),
-        "hook": "",
-        "promessa": "",
-        "estrutura": "",
-        "roteiro": {},
-        "image_prompts": {},  # prompts por parágrafo
-        "tokens_uso": 0,
-        "modelo_usado": "",
-        "gerado_em": None,
-    }
+    video["artefatos"]["roteiro"] = roteiro_ia.roteiro_vazio(
+        str(uuid.uuid4())[:8], video.get("titulo", "")
+    )
 
 # -------------------------------------------------------------------
 # Cliente Groq
 # -------------------------------------------------------------------
+@st.cache_resource
+def _criar_groq(api_key: str):
+    # O SDK da Groq (~250 ms de import) só carrega quando um roteiro é gerado
+    from groq import Groq  # IA principal para roteiro [web:169][web:181]
+
+    return Groq(api_key=api_key)
+
 def get_groq_client():
-    api_key = st.secrets.get("GROQ_API_KEY") or os.environ.get("GROQ_API_KEY")
+    try:
+        api_key = st.secrets.get("GROQ_API_KEY")
+    except FileNotFoundError:  # sem secrets.toml
+        api_key = None
+    api_key = api_key or os.environ.get("GROQ_API_KEY")
     if not api_key:
         st.error("GROQ_API_KEY não encontrado em st.secrets ou variáveis de ambiente.")
         st.stop()
-    return Groq(api_key=api_key)
+    return _criar_groq(api_key)  # [web:169]
 
-groq_client = get_groq_client()  # [web:169]
-MODELO_GROQ = "llama-3.3-70b-versatile"  # [web:181]
+MODELO_GROQ = roteiro_ia.MODELO_PADRAO  # [web:181]
 
 # -------------------------------------------------------------------
 # Sidebar – parâmetros de roteiro
@@ -122,8 +117,58 @@ with st.sidebar:
         height=80,
     )
 
+    st.markdown("---")
+    st.header("⚡ Geração")
+
+    modo_geracao = st.radio(
+        "Modo",
+        ["Plano + blocos em paralelo", "Uma chamada só"],
+        index=0,
+        help=(
+            "Em paralelo: uma chamada curta planeja o roteiro e cada bloco é escrito "
+            "numa chamada própria, com orçamento de tokens suficiente para o tamanho pedido. "
+            f"Uma chamada só: tudo dentro de {roteiro_ia.MAX_TOKENS} tokens "
+            "(os últimos capítulos costumam sair cortados)."
+        ),
+    )
+    concorrencia = st.slider(
+        "Blocos gerados ao mesmo tempo",
+        1,
+        len(roteiro_ia.BLOCOS),
+        roteiro_ia.CONCORRENCIA,
+        disabled=modo_geracao == "Uma chamada só",
+        help="Limite de chamadas simultâneas à Groq (respeite o limite de requisições da sua conta).",
+    )
+    ignorar_cache = st.checkbox(
+        "Ignorar cache (gerar uma versão nova)",
+        value=False,
+        help=(
+            "Pedidos idênticos (mesmo modelo, campos e prompts) reaproveitam a resposta "
+            "guardada, sem gastar tokens. Marque para pedir um texto novo à Groq; "
+            "ele passa a ser o guardado."
+        ),
+    )
+    completar_auto = st.checkbox(
+        "Completar blocos faltando ou curtos",
+        value=True,
+        help=(
+            "Se a resposta vier cortada ou algum bloco sair com menos de "
+            f"{roteiro_ia.FRACAO_MINIMA:.0%} das palavras pedidas, pede de novo só esses blocos, "
+            "usando o plano e o resumo já gravados."
+        ),
+    )
+    cache = cache_llm.resumo()
+    st.caption(
+        f"Cache do LLM: {cache['entradas']} respostas ({cache['bytes'] / 1024 / 1024:.1f} MB) · "
+        f"{cache['hits']} acertos / {cache['hits'] + cache['misses']} consultas nesta sessão · "
+        f"{cache['tokens_poupados_total']} tokens poupados no total"
+    )
+    if st.button("🧹 Limpar cache do LLM", disabled=not cache["entradas"]):
+        cache_llm.limpar()
+        st.rerun()
+
 # -------------------------------------------------------------------
-# Função Groq – estrutura longa + prompts de imagem
+# Função Groq – estrutura longa + prompts de imagem (em streaming)
 # -------------------------------------------------------------------
 def chamar_modelo_roteiro_groq(
     titulo_video: str,
@@ -134,147 +179,59 @@ def chamar_modelo_roteiro_groq(
     restricoes: str,
     canal_nome: str,
     canal_nicho: str,
+    ao_bloco=None,
+    em_paralelo: bool = True,
+    concorrencia: int = roteiro_ia.CONCORRENCIA,
+    ignorar_cache: bool = False,
 ):
     """
     Gera roteiro longo com contagem aproximada de palavras por bloco
-    e prompts de imagem para cada parágrafo.
+    e prompts de imagem para cada parágrafo. Cada bloco sai em
+    `ao_bloco(chave, valor)` assim que o modelo termina de escrevê-lo.
     """
-
-    sistema = (
-        "Você é um roteirista profissional de vídeos longos para YouTube, "
-        "especialista em storytelling e retenção. Sempre responde em JSON válido."
+    contexto = dict(
+        titulo_video=titulo_video,
+        briefing=briefing,
+        objetivo=objetivo,
+        persona=persona,
+        tom=tom,
+        restricoes=restricoes,
+        canal_nome=canal_nome,
+        canal_nicho=canal_nicho,
     )
-
-    usuario = f"""
-Contexto do canal:
-- Nome do canal: {canal_nome}
-- Nicho do canal: {canal_nicho}
-- Persona do público: {persona}
-- Tom de voz da marca: {tom}
-- Palavras/temas proibidos (não use): {restricoes or "nenhuma informada"}
-
-Briefing do vídeo:
-- Tipo: {objetivo}
-- Título provisório do vídeo: {titulo_video}
-- Briefing adicional: {briefing or "nenhum briefing extra"}
-
-Tarefa:
-Crie um ROTEIRO COMPLETO em português brasileiro, em forma de história/narrativa, com a seguinte estrutura e tamanhos aproximados:
-
-1. Hook: 1 parágrafo com cerca de 300 palavras.
-2. Introdução com CTA: 3 parágrafos, cerca de 500 palavras no total.
-3. Capítulo 1: 5 parágrafos, cerca de 1500 palavras no total.
-4. Capítulo 2: 5 parágrafos, cerca de 1500 palavras no total.
-5. Capítulo 3: 5 parágrafos, cerca de 1500 palavras no total.
-6. Capítulo 4: 5 parágrafos, cerca de 1500 palavras no total.
-7. Capítulo 5: 5 parágrafos, cerca de 1500 palavras no total.
-8. Conclusão: desfecho da história com CTA, 3 parágrafos e cerca de 500 palavras no total.
-
-Importante:
-- Escreva todos os parágrafos como se fossem lidos em voz alta, com linguagem natural, envolvente e respeitosa.
-- Não use listas nem Markdown no texto dos parágrafos, apenas prosa contínua.
-- Adapte vocabulário e exemplos ao nicho do canal e à persona.
-
-Além do texto, para CADA parágrafo, gere um prompt de IMAGEM extremamente descritivo (em inglês), próprio para ser usado em modelos de geração de imagens como Pollinations (estilo cinematográfico, alta qualidade, 16:9).
-
-Formato OBRIGATÓRIO da resposta (JSON puro):
-
-{{
-  "hook": {{
-    "paragrafos": ["texto do parágrafo único do hook"],
-    "image_prompts": ["prompt em inglês para esse parágrafo"]
-  }},
-  "introducao": {{
-    "paragrafos": ["p1", "p2", "p3"],
-    "image_prompts": ["prompt p1", "prompt p2", "prompt p3"]
-  }},
-  "capitulo_1": {{
-    "paragrafos": ["p1", "p2", "p3", "p4", "p5"],
-    "image_prompts": ["...", "...", "...", "...", "..."]
-  }},
-  "capitulo_2": {{ ... mesmo formato de capitulo_1 ... }},
-  "capitulo_3": {{ ... }},
-  "capitulo_4": {{ ... }},
-  "capitulo_5": {{ ... }},
-  "conclusao": {{
-    "paragrafos": ["p1", "p2", "p3"],
-    "image_prompts": ["prompt p1", "prompt p2", "prompt p3"]
-  }},
-  "resumo": {{
-    "hook": "frase curta de resumo do gancho",
-    "promessa": "resumo do benefício do vídeo",
-    "estrutura": "descrição em 2-4 frases da jornada do vídeo"
-  }}
-}}
-
-Regras para os image_prompts:
-- Sempre em inglês (mesmo que o roteiro esteja em português).
-- Descrever a cena do parágrafo como um frame de filme 16:9.
-- Não colocar texto escrito na imagem (sem phrases on screen).
-- Incluir estilo (cinematic, ultra realistic, dramatic lighting, etc.).
-"""
-
-    resposta = groq_client.chat.completions.create(
-        model=MODELO_GROQ,
-        messages=[
-            {"role": "system", "content": sistema},
-            {"role": "user", "content": usuario},
-        ],
-        temperature=0.7,
-        max_tokens=8000,
+    if em_paralelo:
+        resultado = roteiro_ia.gerar_em_paralelo(
+            get_groq_client(),
+            contexto,
+            modelo=MODELO_GROQ,
+            concorrencia=concorrencia,
+            ao_bloco=ao_bloco,
+            ignorar_cache=ignorar_cache,
+        )
+    else:
+        resultado = roteiro_ia.gerar_em_fluxo(
+            get_groq_client(),
+            roteiro_ia.montar_prompt(**contexto),
+            modelo=MODELO_GROQ,
+            ao_bloco=ao_bloco,
+            ignorar_cache=ignorar_cache,
+        )
+    resultado["modelo"] = MODELO_GROQ
+    return resultado
+
+
+def completar_roteiro_groq(roteiro: dict, contexto: dict, ao_bloco=None, concorrencia: int = roteiro_ia.CONCORRENCIA):
+    """Reescreve só os blocos faltando ou curtos de `roteiro` (ver `roteiro_ia.completar`)."""
+    resultado = roteiro_ia.completar(
+        get_groq_client(),
+        contexto,
+        roteiro,
+        modelo=MODELO_GROQ,
+        concorrencia=concorrencia,
+        ao_bloco=ao_bloco,
     )
-
-    conteudo = resposta.choices[0].message.content
-    tokens_total = getattr(resposta.usage, "total_tokens", 0)
-
-    inicio = conteudo.find("{")
-    fim = conteudo.rfind("}")
-    if inicio == -1 or fim == -1:
-        raise ValueError("A resposta do modelo não contém JSON válido.")
-    json_str = conteudo[inicio : fim + 1]
-
-    data = json.loads(json_str)
-
-    resumo = data.get("resumo", {})
-    hook_resumo = resumo.get("hook", "").strip()
-    promessa = resumo.get("promessa", "").strip()
-    estrutura = resumo.get("estrutura", "").strip()
-
-    roteiro_completo = {}
-    image_prompts = {}
-
-    blocos = [
-        "hook",
-        "introducao",
-        "capitulo_1",
-        "capitulo_2",
-        "capitulo_3",
-        "capitulo_4",
-        "capitulo_5",
-        "conclusao",
-    ]
-
-    for bloco in blocos:
-        bloco_data = data.get(bloco, {}) or {}
-        paragrafos = bloco_data.get("paragrafos", []) or []
-        prompts = bloco_data.get("image_prompts", []) or []
-        # garante mesmo tamanho
-        if len(prompts) < len(paragrafos):
-            prompts += ["cinematic wide shot, detailed, 4k, 16:9"] * (
-                len(paragrafos) - len(prompts)
-            )
-        roteiro_completo[bloco] = paragrafos
-        image_prompts[bloco] = prompts
-
-    return {
-        "hook": hook_resumo,
-        "promessa": promessa,
-        "estrutura": estrutura,
-        "roteiro": roteiro_completo,
-        "image_prompts": image_prompts,
-        "tokens": tokens_total,
-        "modelo": MODELO_GROQ,
-    }
+    resultado["modelo"] = MODELO_GROQ
+    return resultado
 
 # -------------------------------------------------------------------
 # Área principal – título e briefing
@@ -305,65 +262,188 @@ briefing = st.text_area(
 # -------------------------------------------------------------------
 st.subheader("⚙️ Geração do roteiro com IA (Groq)")
 
-col_bt1, col_bt2 = st.columns(2)
+contexto_geracao = dict(
+    titulo_video=titulo_video.strip(),
+    briefing=briefing,
+    objetivo=objetivo,
+    persona=persona_custom,
+    tom=tom_custom,
+    restricoes=restricoes,
+    canal_nome=canal.get("nome", ""),
+    canal_nicho=canal.get("nicho", ""),
+)
+
+
+def acompanhar_blocos(roteiro_id: str, esperados: list[str], reiniciar: bool):
+    """
+    Barra de progresso + um expander por bloco. Devolve `(salvar_bloco,
+    recebidos)`; com `reiniciar`, o primeiro bloco recomeça o roteiro do zero.
+    """
+    inicio = datetime.now()
+    progresso = st.progress(0.0, text="Aguardando o primeiro bloco da Groq...")
+    vitrines = {chave: st.empty() for chave in ["resumo", "plano"] + esperados}
+    recebidos = []
+
+    def salvar_bloco(chave, valor):
+        # Grava cada bloco assim que fecha: um timeout depois disso não o perde
+        primeiro = reiniciar and not recebidos
+        recebidos.append(chave)
+
+        def aplicar(roteiro_atual):
+            if primeiro or not roteiro_atual:
+                roteiro_atual = roteiro_ia.roteiro_vazio(roteiro_id, titulo_video.strip())
+                roteiro_atual["modelo_usado"] = MODELO_GROQ
+            roteiro_atual = roteiro_ia.aplicar_bloco(roteiro_atual, chave, valor)
+            roteiro_atual["gerado_em"] = datetime.now().isoformat()
+            return roteiro_atual
+
+        video["artefatos"]["roteiro"] = banco.alterar_artefato(video_id, "roteiro", aplicar)
+
+        segundos = (datetime.now() - inicio).total_seconds()
+        prontos = len(set(recebidos) & set(esperados))
+        progresso.progress(
+            prontos / len(esperados),
+            text=f"{prontos} de {len(esperados)} blocos prontos ({segundos:.0f}s)",
+        )
+        if chave in roteiro_ia.BLOCOS:
+            paragrafos = video["artefatos"]["roteiro"]["roteiro"][chave]
+            with vitrines[chave].expander(
+                f"✅ {roteiro_ia.ROTULOS[chave]} – {len(paragrafos)} parágrafos, "
+                f"{sum(len(p.split()) for p in paragrafos)} palavras ({segundos:.0f}s)"
+            ):
+                for texto_par in paragrafos:
+                    st.write(texto_par)
+        elif chave == "resumo":
+            vitrines[chave].caption(f"Resumo pronto em {segundos:.0f}s.")
+        elif chave == "plano":
+            vitrines[chave].caption(
+                f"Plano pronto em {segundos:.0f}s; escrevendo os blocos em paralelo..."
+            )
+
+    return salvar_bloco, recebidos
+
+
+def completar_blocos(roteiro_id: str) -> dict | None:
+    """Pede de novo só os blocos faltando ou curtos; None se a chamada falhou."""
+    refazer = roteiro_ia.blocos_a_refazer(video["artefatos"]["roteiro"])
+    st.info("Completando: " + ", ".join(roteiro_ia.ROTULOS[b] for b in refazer))
+    salvar_bloco, _ = acompanhar_blocos(roteiro_id, refazer, reiniciar=False)
+    try:
+        with telemetria_llm.contexto(canal_id):
+            return completar_roteiro_groq(
+                video["artefatos"]["roteiro"],
+                contexto_geracao,
+                ao_bloco=salvar_bloco,
+                concorrencia=concorrencia,
+            )
+    except Exception as e:
+        st.error(f"Erro ao completar o roteiro na Groq: {e}")
+        return None
+
+
+def concluir_roteiro(roteiro_id: str, resultados: list[dict], somar_tokens: bool = False) -> None:
+    """Grava tokens, modelo e status da etapa; avisa o que ainda falta ou ficou curto."""
+    # Tokens do roteiro inteiro, tenham sido pagos agora ou no pedido guardado
+    tokens = sum(r.get("tokens", 0) + r.get("tokens_poupados", 0) for r in resultados)
+    faltando = roteiro_ia.blocos_faltando(video["artefatos"]["roteiro"])
+    curtos = roteiro_ia.blocos_curtos(video["artefatos"]["roteiro"])
+
+    def finalizar(roteiro_atual):
+        roteiro_atual = roteiro_atual or roteiro_ia.roteiro_vazio(roteiro_id)
+        roteiro_atual["tokens_uso"] = ((roteiro_atual.get("tokens_uso") or 0) if somar_tokens else 0) + tokens
+        roteiro_atual["modelo_usado"] = MODELO_GROQ
+        return roteiro_atual
+
+    video["artefatos"]["roteiro"] = banco.alterar_artefato(
+        video_id, "roteiro", finalizar, status={"1_roteiro": not faltando}
+    )
+    for resultado in resultados:
+        for bloco, erro in (resultado.get("erros") or {}).items():
+            if bloco in faltando or bloco in curtos:
+                st.error(f"{roteiro_ia.ROTULOS[bloco]}: {erro}")
+    if faltando:
+        cortado = any(r.get("fim") == "length" for r in resultados)
+        st.warning(
+            f"{len(roteiro_ia.BLOCOS) - len(faltando)} blocos salvos; faltaram: "
+            + ", ".join(roteiro_ia.ROTULOS[b] for b in faltando)
+            + (" (resposta cortada pelo limite de tokens)." if cortado else ".")
+        )
+    elif curtos:
+        st.warning(
+            "Roteiro salvo, mas estes blocos ficaram curtos: "
+            + ", ".join(roteiro_ia.ROTULOS[b] for b in curtos)
+            + ". Use \"🩹 Completar\" para reescrevê-los."
+        )
+    else:
+        st.success("Roteiro gerado com sucesso pela Groq e salvo para este vídeo.")
+        st.rerun()
+
+
+col_bt1, col_bt2, col_bt3 = st.columns(3)
 
 with col_bt1:
-    if st.button("🚀 Gerar / regenerar roteiro completo", type="primary"):
-        if not titulo_video.strip():
-            st.warning("Informe ao menos um título para o vídeo.")
-        else:
-            if video["artefatos"]["roteiro"].get("roteiro"):
-                st.info("Um roteiro já existe. O novo irá substituir o atual.")
-            with st.spinner("Gerando roteiro longo com a IA da Groq..."):
-                try:
-                    resultado = chamar_modelo_roteiro_groq(
-                        titulo_video=titulo_video.strip(),
-                        briefing=briefing,
-                        objetivo=objetivo,
-                        persona=persona_custom,
-                        tom=tom_custom,
-                        restricoes=restricoes,
-                        canal_nome=canal.get("nome", ""),
-                        canal_nicho=canal.get("nicho", ""),
-                    )
-
-                    video["artefatos"]["roteiro"] = {
-                        "id": video["artefatos"]["roteiro"].get(
-                            "id", str(uuid.uuid4())[:8]
-                        ),
-                        "titulo_video": titulo_video.strip(),
-                        "hook": resultado.get("hook", ""),
-                        "promessa": resultado.get("promessa", ""),
-                        "estrutura": resultado.get("estrutura", ""),
-                        "roteiro": resultado.get("roteiro", {}),
-                        "image_prompts": resultado.get("image_prompts", {}),
-                        "tokens_uso": resultado.get("tokens", 0),
-                        "modelo_usado": resultado.get("modelo", MODELO_GROQ),
-                        "gerado_em": datetime.now().isoformat(),
-                    }
-                    video["status"]["1_roteiro"] = True
-                    video["ultima_atualizacao"] = datetime.now().isoformat()
-                    st.success("Roteiro gerado com sucesso pela Groq e salvo para este vídeo.")
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Erro ao chamar a IA da Groq: {e}")
+    gerar = st.button("🚀 Gerar / regenerar roteiro completo", type="primary")
+
+with col_bt3:
+    completar = st.button(
+        "🩹 Completar blocos faltando/curtos",
+        help="Reescreve só os blocos que faltam ou ficaram curtos, sem refazer o roteiro inteiro.",
+    )
+
+if gerar:
+    if not titulo_video.strip():
+        st.warning("Informe ao menos um título para o vídeo.")
+    else:
+        if video["artefatos"]["roteiro"].get("roteiro"):
+            st.info("Um roteiro já existe. O novo irá substituir o atual a partir do primeiro bloco pronto.")
+        roteiro_id = video["artefatos"]["roteiro"].get("id", str(uuid.uuid4())[:8])
+        salvar_bloco, recebidos = acompanhar_blocos(roteiro_id, roteiro_ia.BLOCOS, reiniciar=True)
+
+        try:
+            with telemetria_llm.contexto(canal_id):
+                resultado = chamar_modelo_roteiro_groq(
+                    **contexto_geracao,
+                    ao_bloco=salvar_bloco,
+                    em_paralelo=modo_geracao != "Uma chamada só",
+                    concorrencia=concorrencia,
+                    ignorar_cache=ignorar_cache,
+                )
+        except Exception as e:
+            resultado = None
+            st.error(f"Erro ao chamar a IA da Groq: {e}")
+
+        if resultado is not None and not recebidos:
+            st.error("A resposta do modelo não contém JSON válido.")
+        elif recebidos:
+            resultados = [resultado or {}]
+            if completar_auto and roteiro_ia.blocos_a_refazer(video["artefatos"]["roteiro"]):
+                reparo = completar_blocos(roteiro_id)
+                if reparo is not None:
+                    resultados.append(reparo)
+            concluir_roteiro(roteiro_id, resultados)
+
+if completar:
+    roteiro_salvo = video["artefatos"]["roteiro"]
+    if not roteiro_salvo.get("roteiro"):
+        st.warning("Ainda não há roteiro para completar; use \"🚀 Gerar\".")
+    elif not roteiro_ia.blocos_a_refazer(roteiro_salvo):
+        st.info("Nenhum bloco faltando ou curto neste roteiro.")
+    else:
+        roteiro_id = roteiro_salvo.get("id", str(uuid.uuid4())[:8])
+        reparo = completar_blocos(roteiro_id)
+        if reparo is not None:
+            concluir_roteiro(roteiro_id, [reparo], somar_tokens=True)
 
 with col_bt2:
     if st.button("🗑 Limpar roteiro atual"):
-        video["artefatos"]["roteiro"] = {
-            "id": str(uuid.uuid4())[:8],
-            "titulo_video": titulo_video.strip(),
-            "hook": "",
-            "promessa": "",
-            "estrutura": "",
-            "roteiro": {},
-            "image_prompts": {},
-            "tokens_uso": 0,
-            "modelo_usado": "",
-            "gerado_em": None,
-        }
-        video["status"]["1_roteiro"] = False
-        video["ultima_atualizacao"] = datetime.now().isoformat()
+        video["artefatos"]["roteiro"] = roteiro_ia.roteiro_vazio(
+            str(uuid.uuid4())[:8], titulo_video.strip()
+        )
+        banco.atualizar_video(
+            video_id,
+            artefatos={"roteiro": video["artefatos"]["roteiro"]},
+            status={"1_roteiro": False},
+        )
         st.success("Roteiro limpo para este vídeo.")
         st.rerun()
 
@@ -412,26 +492,8 @@ if not roteiro_blocos:
         "para ver os capítulos e parágrafos."
     )
 else:
-    blocos_ordenados = [
-        "hook",
-        "introducao",
-        "capitulo_1",
-        "capitulo_2",
-        "capitulo_3",
-        "capitulo_4",
-        "capitulo_5",
-        "conclusao",
-    ]
-    labels = {
-        "hook": "Hook",
-        "introducao": "Introdução com CTA",
-        "capitulo_1": "Capítulo 1",
-        "capitulo_2": "Capítulo 2",
-        "capitulo_3": "Capítulo 3",
-        "capitulo_4": "Capítulo 4",
-        "capitulo_5": "Capítulo 5",
-        "conclusao": "Conclusão",
-    }
+    blocos_ordenados = roteiro_ia.BLOCOS
+    labels = roteiro_ia.ROTULOS
 
     tabs = st.tabs([labels.get(b, b) for b in blocos_ordenados])
 
@@ -466,13 +528,22 @@ else:
             image_prompts[bloco] = prompts
 
 if st.button("💾 Salvar alterações de texto e prompts"):
-    video["artefatos"]["roteiro"]["roteiro"] = roteiro_blocos
-    video["artefatos"]["roteiro"]["image_prompts"] = image_prompts
-    video["artefatos"]["roteiro"]["titulo_video"] = titulo_video.strip()
-    if not video["artefatos"]["roteiro"].get("gerado_em"):
-        video["artefatos"]["roteiro"]["gerado_em"] = datetime.now().isoformat()
-    video["status"]["1_roteiro"] = True
-    video["ultima_atualizacao"] = datetime.now().isoformat()
+    def aplicar_edicao(roteiro_atual):
+        # Só os campos editados aqui; o resto vem da versão mais recente
+        roteiro_atual = roteiro_atual or {}
+        roteiro_atual["roteiro"] = roteiro_blocos
+        roteiro_atual["image_prompts"] = image_prompts
+        roteiro_atual["titulo_video"] = titulo_video.strip()
+        if not roteiro_atual.get("gerado_em"):
+            roteiro_atual["gerado_em"] = datetime.now().isoformat()
+        return roteiro_atual
+
+    video["artefatos"]["roteiro"] = banco.alterar_artefato(
+        video_id,
+        "roteiro",
+        aplicar_edicao,
+        status={"1_roteiro": True},
+    )
     st.success("Roteiro e prompts de imagem atualizados para este vídeo.")
 
 st.markdown("---")
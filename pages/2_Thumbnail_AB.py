@@ -1,44 +1,40 @@
 import os
 import io
-import uuid
 from datetime import datetime
 
 import requests
 import streamlit as st
 
+import armazem
+import banco
+import coletor
+
 st.set_page_config(page_title="2 – Thumbnails e Imagens", layout="wide")
 st.title("🖼 2 – Gerador de Imagens do Vídeo (Pollinations)")
 
 # -------------------------------------------------------------------
-# Integra com o "banco"
+# Integra com o banco compartilhado
 # -------------------------------------------------------------------
-def criar_db_vazio():
-    return {"canais": {}}
-
-if "db" not in st.session_state:
-    st.session_state.db = criar_db_vazio()
-db = st.session_state.db
-
 if "canal_atual_id" not in st.session_state:
     st.session_state.canal_atual_id = None
 if "video_atual_id" not in st.session_state:
     st.session_state.video_atual_id = None
 
+coletor.iniciar_em_segundo_plano()
+
 canal_id = st.session_state.canal_atual_id
 video_id = st.session_state.video_atual_id
 
-if not canal_id or canal_id not in db["canais"]:
+canal = banco.obter_canal(canal_id)
+if not canal:
     st.error("Nenhum canal selecionado. Vá ao app principal (monitor) e escolha um canal/vídeo.")
     st.stop()
 
-canal = db["canais"][canal_id]
-videos = canal["videos"]
-if not video_id or video_id not in videos:
+video = banco.obter_video(video_id)
+if not video or video["canal_id"] != canal_id:
     st.error("Nenhum vídeo selecionado. Vá ao monitor e escolha um vídeo para este canal.")
     st.stop()
 
-video = videos[video_id]
-
 if "artefatos" not in video:
     video["artefatos"] = {}
 
@@ -173,6 +169,7 @@ with col_g1:
         else:
             with st.spinner("Gerando todas as imagens com Pollinations..."):
                 geradas = 0
+                novas = []  # (bloco, idx, entrada) geradas nesta rodada
                 for bloco in blocos_ordenados:
                     prompts = image_prompts.get(bloco, []) or []
                     if bloco not in imagens_roteiro:
@@ -200,12 +197,14 @@ with col_g1:
                             height=altura,
                         )
                         if conteudo:
-                            nome_arquivo = f"img_{video_id}_{bloco}_{idx}_{uuid.uuid4().hex[:6]}.png"
-                            pasta = "imagens_video"
-                            os.makedirs(pasta, exist_ok=True)
-                            caminho = os.path.join(pasta, nome_arquivo)
-                            with open(caminho, "wb") as f:
-                                f.write(conteudo)
+                            # Armazém por conteúdo: imagem repetida não ocupa disco extra
+                            caminho = armazem.guardar_bytes(
+                                conteudo,
+                                ".png",
+                                video_id,
+                                f"imagens_roteiro/{bloco}/{idx}",
+                                tipo="imagem",
+                            )
 
                             imagens_roteiro[bloco][idx] = {
                                 "prompt": prompt,
@@ -215,19 +214,39 @@ with col_g1:
                                 "height": altura,
                                 "gerado_em": datetime.now().isoformat(),
                             }
+                            novas.append((bloco, idx, imagens_roteiro[bloco][idx]))
                             geradas += 1
 
-                video["artefatos"]["imagens_roteiro"] = imagens_roteiro
-                video["status"]["2_thumbnails"] = True
-                video["ultima_atualizacao"] = datetime.now().isoformat()
+                def incluir_novas(atual):
+                    # Mescla só o que foi gerado aqui sobre a versão mais recente
+                    atual = atual or {}
+                    for bloco, idx, entrada in novas:
+                        lista = atual.setdefault(bloco, [])
+                        lista += [None] * (idx + 1 - len(lista))
+                        lista[idx] = entrada
+                    return atual
+
+                video["artefatos"]["imagens_roteiro"] = banco.alterar_artefato(
+                    video_id,
+                    "imagens_roteiro",
+                    incluir_novas,
+                    status={"2_thumbnail": True},
+                )
                 st.success(f"Imagens geradas/salvas: {geradas}")
 
 with col_g2:
     if st.button("🗑 Limpar todas as imagens geradas"):
         video["artefatos"]["imagens_roteiro"] = {}
-        video["status"]["2_thumbnails"] = False
-        video["ultima_atualizacao"] = datetime.now().isoformat()
-        st.success("Todas as imagens deste vídeo foram desvinculadas (arquivos no disco permanecem).")
+        banco.atualizar_video(
+            video_id,
+            artefatos={"imagens_roteiro": {}},
+            status={"2_thumbnail": False},
+        )
+        apagados = armazem.liberar(video_id, prefixo="imagens_roteiro/")
+        st.success(
+            "Todas as imagens deste vídeo foram desvinculadas "
+            f"({apagados} arquivo(s) sem outras referências removidos do disco)."
+        )
 
 # -------------------------------------------------------------------
 # Visualização das imagens salvas
@@ -240,6 +259,9 @@ imagens_roteiro = video["artefatos"].get("imagens_roteiro", {}) or {}
 if not imagens_roteiro:
     st.info("Nenhuma imagem gerada ainda. Use o botão acima para gerar todas.")
 else:
+    armazem.tocar(
+        [i["path"] for l in imagens_roteiro.values() for i in (l or []) if i and i.get("path")]
+    )
     for bloco in blocos_ordenados:
         lista = imagens_roteiro.get(bloco, []) or []
         if not lista:
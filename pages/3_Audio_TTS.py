@@ -1,45 +1,40 @@
 import streamlit as st
 import asyncio
-import edge_tts
 import subprocess
 import os
 from datetime import datetime
-import tempfile
 from shutil import which
 
+import armazem
+import banco
+import coletor
+
 st.set_page_config(page_title="3 – Áudio TTS", layout="wide")
 st.title("🎙 3 – Gerador de Áudio TTS para o Vídeo")
 
 # -------------------------------------------------------------------
-# Integra com o "banco" e seleção do monitor
+# Integra com o banco compartilhado e seleção do monitor
 # -------------------------------------------------------------------
-def criar_db_vazio():
-    return {"canais": {}}
-
-if "db" not in st.session_state:
-    st.session_state.db = criar_db_vazio()
-db = st.session_state.db
-
 if "canal_atual_id" not in st.session_state:
     st.session_state.canal_atual_id = None
 if "video_atual_id" not in st.session_state:
     st.session_state.video_atual_id = None
 
+coletor.iniciar_em_segundo_plano()
+
 canal_id = st.session_state.canal_atual_id
 video_id = st.session_state.video_atual_id
 
-if not canal_id or canal_id not in db["canais"]:
+canal = banco.obter_canal(canal_id)
+if not canal:
     st.error("Nenhum canal selecionado. Vá ao app principal (monitor) e escolha um canal/vídeo.")
     st.stop()
 
-canal = db["canais"][canal_id]
-videos = canal["videos"]
-if not video_id or video_id not in videos:
+video = banco.obter_video(video_id)
+if not video or video["canal_id"] != canal_id:
     st.error("Nenhum vídeo selecionado. Vá ao monitor e escolha um vídeo para este canal.")
     st.stop()
 
-video = videos[video_id]
-
 # Garante estrutura de artefatos
 if "artefatos" not in video:
     video["artefatos"] = {}
@@ -127,6 +122,7 @@ with st.sidebar:
             path = salvar_modelo_piper(uploaded_model)
             if path:
                 video["artefatos"]["piper_model_path"] = path
+                banco.atualizar_video(video_id, artefatos={"piper_model_path": path})
 
         modelo_salvo = video["artefatos"].get("piper_model_path")
         modelo_piper = st.text_input(
@@ -165,6 +161,8 @@ async def gerar_audio_edge_tts(texto: str, voz: str, output_path: str, rate: flo
 </speak>
 """.strip()
 
+    import edge_tts  # ~200 ms de import: só quando o áudio é gerado
+
     communicate = edge_tts.Communicate(ssml, voz)
     await communicate.save(output_path)
 
@@ -181,13 +179,14 @@ def run_tts_edge(texto: str, voz: str, rate: float) -> str | None:
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
 
-    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
-        output_path = tmp.name
+    # Temporário dentro do armazém; vira artefato em `guardar_arquivo`
+    output_path = armazem.novo_temporario(".mp3")
 
     try:
         loop.run_until_complete(gerar_audio_edge_tts(texto, voz, output_path, rate))
         return output_path
     except Exception as e:
+        armazem.descartar_temporario(output_path)
         st.error(f"Erro ao gerar áudio com Edge-TTS: {e}")
         return None
     finally:
@@ -217,8 +216,7 @@ def run_tts_piper(texto: str, modelo_onnx: str) -> str | None:
         )  # [web:223][web:226]
         return None
 
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-        output_path = tmp.name
+    output_path = armazem.novo_temporario(".wav")
 
     cmd = [
         "piper",
@@ -236,14 +234,17 @@ def run_tts_piper(texto: str, modelo_onnx: str) -> str | None:
             stderr=subprocess.PIPE,
         )
         if proc.returncode != 0:
+            armazem.descartar_temporario(output_path)
             st.error("Erro ao executar Piper TTS.")
             st.code(proc.stderr.decode("utf-8")[-2000:], language="bash")
             return None
         return output_path
     except FileNotFoundError:
+        armazem.descartar_temporario(output_path)
         st.error("Comando `piper` não encontrado (FileNotFoundError).")
         return None
     except Exception as e:
+        armazem.descartar_temporario(output_path)
         st.error(f"Erro ao gerar áudio com Piper TTS: {e}")
         return None
 
@@ -296,6 +297,9 @@ with col_g1:
                     audio_path = run_tts_piper(texto_limpo, voz_code)
 
                 if audio_path and os.path.exists(audio_path):
+                    audio_path = armazem.guardar_arquivo(
+                        audio_path, video_id, "audio_path", tipo="audio"
+                    )
                     video["artefatos"]["audio_path"] = audio_path
                     video["artefatos"]["audio_info"] = {
                         "motor": motor,
@@ -305,15 +309,25 @@ with col_g1:
                         "gerado_em": datetime.now().isoformat(),
                         "texto_usado": texto_limpo[:5000],
                     }
-                    video["status"]["3_audio"] = True
-                    video["ultima_atualizacao"] = datetime.now().isoformat()
+                    banco.atualizar_video(
+                        video_id,
+                        artefatos={
+                            "audio_path": audio_path,
+                            "audio_info": video["artefatos"]["audio_info"],
+                        },
+                        status={"3_audio": True},
+                    )
                     st.success("Áudio gerado e salvo no vídeo (etapa 3 concluída).")
 with col_g2:
     if st.button("🗑 Remover áudio deste vídeo"):
         video["artefatos"]["audio_path"] = None
         video["artefatos"]["audio_info"] = {}
-        video["status"]["3_audio"] = False
-        video["ultima_atualizacao"] = datetime.now().isoformat()
+        banco.atualizar_video(
+            video_id,
+            artefatos={"audio_path": None, "audio_info": {}},
+            status={"3_audio": False},
+        )
+        armazem.liberar(video_id, "audio_path")
         st.success("Áudio removido deste vídeo.")
 
 st.markdown("---")
@@ -326,6 +340,7 @@ st.subheader("🎧 Player do áudio gerado")
 audio_path_salvo = video["artefatos"].get("audio_path")
 
 if audio_path_salvo and os.path.exists(audio_path_salvo):
+    armazem.tocar(audio_path_salvo)
     st.audio(audio_path_salvo)
 
     col_d1, col_d2 = st.columns(2)
@@ -1,53 +1,54 @@
 import streamlit as st
 import subprocess
 import os
-import tempfile
+import sys
 from datetime import datetime
-from PIL import Image
 import io
 
+import armazem
+import banco
+import coletor
+
 st.set_page_config(page_title="4 – Vídeo Final", layout="wide")
 st.title("🎬 4 – Montagem do Vídeo Final (Imagem + Áudio)")
 
 # -------------------------------------------------------------------
-# Integra com o "banco" e seleção do monitor
+# Integra com o banco compartilhado e seleção do monitor
 # -------------------------------------------------------------------
-def criar_db_vazio():
-    return {"canais": {}}
-
-if "db" not in st.session_state:
-    st.session_state.db = criar_db_vazio()
-db = st.session_state.db
-
 if "canal_atual_id" not in st.session_state:
     st.session_state.canal_atual_id = None
 if "video_atual_id" not in st.session_state:
     st.session_state.video_atual_id = None
 
+coletor.iniciar_em_segundo_plano()
+
 canal_id = st.session_state.canal_atual_id
 video_id = st.session_state.video_atual_id
 
-if not canal_id or canal_id not in db["canais"]:
+canal = banco.obter_canal(canal_id)
+if not canal:
     st.error("Nenhum canal selecionado. Vá ao app principal (monitor) e escolha um canal/vídeo.")
     st.stop()
 
-canal = db["canais"][canal_id]
-videos = canal["videos"]
-if not video_id or video_id not in videos:
+video = banco.obter_video(video_id)
+if not video or video["canal_id"] != canal_id:
     st.error("Nenhum vídeo selecionado. Vá ao monitor e escolha um vídeo para este canal.")
     st.stop()
 
-video = videos[video_id]
-
 # Garante estrutura de artefatos
 if "video_path" not in video["artefatos"]:
     video["artefatos"]["video_path"] = None
 if "video_info" not in video["artefatos"]:
     video["artefatos"]["video_info"] = {}
 
-thumbs = video["artefatos"].get("thumbs", {})
+thumbs = video["artefatos"].get("thumbs") or {}
 audio_path = video["artefatos"].get("audio_path")
 
+def eh_imagem(obj) -> bool:
+    # Sem importar o Pillow: se ele nunca foi carregado, nada aqui é imagem
+    modulo = sys.modules.get("PIL.Image")
+    return modulo is not None and isinstance(obj, modulo.Image)
+
 # -------------------------------------------------------------------
 # Sidebar – contexto e opções de render
 # -------------------------------------------------------------------
@@ -63,11 +64,11 @@ with st.sidebar:
     opcoes_img = []
 
     # Thumbnails salvas
-    if isinstance(thumbs.get("img_a"), Image.Image):
+    if eh_imagem(thumbs.get("img_a")):
         opcoes_img.append("Thumbnail A")
-    if isinstance(thumbs.get("img_b"), Image.Image):
+    if eh_imagem(thumbs.get("img_b")):
         opcoes_img.append("Thumbnail B")
-    if isinstance(thumbs.get("img_c"), Image.Image):
+    if eh_imagem(thumbs.get("img_c")):
         opcoes_img.append("Thumbnail C")
 
     opcoes_img.append("Upload manual")
@@ -106,13 +107,15 @@ if escolha_img.startswith("Thumbnail"):
     chave = f"img_{qual.lower()}"
     img_fundo = thumbs.get(chave)
 
-    if isinstance(img_fundo, Image.Image):
+    if eh_imagem(img_fundo):
         st.image(img_fundo, caption=f"Usando {escolha_img} como fundo", width=400)
     else:
         st.warning(f"{escolha_img} não encontrada. Selecione outra opção ou gere thumbnails na etapa 2.")
 elif escolha_img == "Upload manual":
     file_img = st.file_uploader("Envie uma imagem (JPG/PNG)", type=["jpg", "jpeg", "png"])
     if file_img is not None:
+        from PIL import Image
+
         img_fundo = Image.open(file_img)
         st.image(img_fundo, caption="Imagem enviada", width=400)
 
@@ -122,6 +125,7 @@ elif escolha_img == "Upload manual":
 st.subheader("🎧 Áudio disponível")
 
 if audio_path and os.path.exists(audio_path):
+    armazem.tocar(audio_path)
     st.audio(audio_path, format="audio/mpeg")
     st.caption("Áudio carregado da etapa 3 (TTS).")
 else:
@@ -131,19 +135,17 @@ else:
 # -------------------------------------------------------------------
 # Função para salvar imagem temporária
 # -------------------------------------------------------------------
-def salvar_imagem_temp(imagem: Image.Image, resolucao_str: str) -> str | None:
-    import tempfile
-
-    if not isinstance(imagem, Image.Image):
+def salvar_imagem_temp(imagem, resolucao_str: str) -> str | None:
+    if not eh_imagem(imagem):
         return None
 
     w, h = [int(x) for x in resolucao_str.split("x")]
     img_resized = imagem.resize((w, h))
 
-    tmp = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-    img_resized.save(tmp, format="PNG")
-    tmp.close()
-    return tmp.name
+    # Temporário do armazém; é descartado logo após o render
+    tmp_path = armazem.novo_temporario(".png")
+    img_resized.save(tmp_path, format="PNG")
+    return tmp_path
 
 # -------------------------------------------------------------------
 # Função para chamar FFmpeg simples (imagem estática + áudio -> MP4)
@@ -157,11 +159,7 @@ def gerar_video_ffmpeg(img_path: str, audio_path: str, resolucao: str, fps: int)
            -c:a aac -b:a 192k -pix_fmt yuv420p -shortest -r 30 output.mp4
     """  # [web:43][web:45]
 
-    import tempfile
-
-    out = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
-    out_path = out.name
-    out.close()
+    out_path = armazem.novo_temporario(".mp4")
 
     cmd = [
         "ffmpeg",
@@ -196,11 +194,13 @@ def gerar_video_ffmpeg(img_path: str, audio_path: str, resolucao: str, fps: int)
             text=True,
         )
         if result.returncode != 0:
+            armazem.descartar_temporario(out_path)
             st.error("Erro ao executar FFmpeg.")
             st.code(result.stderr[-2000:], language="bash")
             return None
         return out_path
     except FileNotFoundError:
+        armazem.descartar_temporario(out_path)
         st.error(
             "FFmpeg não encontrado no ambiente.\n"
             "Certifique-se de que o binário 'ffmpeg' está instalado e no PATH."
@@ -212,7 +212,7 @@ def gerar_video_ffmpeg(img_path: str, audio_path: str, resolucao: str, fps: int)
 # -------------------------------------------------------------------
 st.subheader("🎬 Gerar vídeo final")
 
-if not isinstance(img_fundo, Image.Image):
+if not eh_imagem(img_fundo):
     st.warning("Escolha ou envie uma imagem de fundo antes de gerar o vídeo.")
 else:
     col_g1, col_g2 = st.columns(2)
@@ -226,7 +226,11 @@ else:
                     video_path = gerar_video_ffmpeg(
                         img_temp, audio_path, resolucao.split()[0], fps
                     )
+                    armazem.descartar_temporario(img_temp)
                     if video_path and os.path.exists(video_path):
+                        video_path = armazem.guardar_arquivo(
+                            video_path, video_id, "video_path", tipo="video"
+                        )
                         video["artefatos"]["video_path"] = video_path
                         video["artefatos"]["video_info"] = {
                             "resolucao": resolucao.split()[0],
@@ -235,15 +239,25 @@ else:
                             "audio_origem": audio_path,
                             "gerado_em": datetime.now().isoformat(),
                         }
-                        video["status"]["4_video"] = True
-                        video["ultima_atualizacao"] = datetime.now().isoformat()
+                        banco.atualizar_video(
+                            video_id,
+                            artefatos={
+                                "video_path": video_path,
+                                "video_info": video["artefatos"]["video_info"],
+                            },
+                            status={"4_video": True},
+                        )
                         st.success("Vídeo gerado e etapa 4 marcada como concluída.")
     with col_g2:
         if st.button("🗑 Remover vídeo gerado"):
             video["artefatos"]["video_path"] = None
             video["artefatos"]["video_info"] = {}
-            video["status"]["4_video"] = False
-            video["ultima_atualizacao"] = datetime.now().isoformat()
+            banco.atualizar_video(
+                video_id,
+                artefatos={"video_path": None, "video_info": {}},
+                status={"4_video": False},
+            )
+            armazem.liberar(video_id, "video_path")
             st.success("Vídeo removido deste vídeo.")
 
 st.markdown("---")
@@ -255,6 +269,7 @@ st.subheader("📺 Preview do vídeo gerado")
 
 video_path_salvo = video["artefatos"].get("video_path")
 if video_path_salvo and os.path.exists(video_path_salvo):
+    armazem.tocar(video_path_salvo)
     st.video(video_path_salvo)
 
     col_d1, col_d2 = st.columns(2)
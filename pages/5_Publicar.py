@@ -2,19 +2,15 @@ import streamlit as st
 from datetime import datetime
 import os
 
+import armazem
+import banco
+
 st.set_page_config(page_title="5 – Publicar / Upload", layout="wide")
 st.title("📤 5 – Publicação do Vídeo (YouTube manual / API futura)")
 
 # -------------------------------------------------------------------
-# Integra com o "banco" e seleção do monitor
+# Integra com o banco compartilhado e seleção do monitor
 # -------------------------------------------------------------------
-def criar_db_vazio():
-    return {"canais": {}}
-
-if "db" not in st.session_state:
-    st.session_state.db = criar_db_vazio()
-db = st.session_state.db
-
 if "canal_atual_id" not in st.session_state:
     st.session_state.canal_atual_id = None
 if "video_atual_id" not in st.session_state:
@@ -23,18 +19,16 @@ if "video_atual_id" not in st.session_state:
 canal_id = st.session_state.canal_atual_id
 video_id = st.session_state.video_atual_id
 
-if not canal_id or canal_id not in db["canais"]:
+canal = banco.obter_canal(canal_id)
+if not canal:
     st.error("Nenhum canal selecionado. Vá ao app principal (monitor) e escolha um canal/vídeo.")
     st.stop()
 
-canal = db["canais"][canal_id]
-videos = canal["videos"]
-if not video_id or video_id not in videos:
+video = banco.obter_video(video_id)
+if not video or video["canal_id"] != canal_id:
     st.error("Nenhum vídeo selecionado. Vá ao monitor e escolha um vídeo para este canal.")
     st.stop()
 
-video = videos[video_id]
-
 # Garante campos de artefatos
 if "youtube_url" not in video["artefatos"]:
     video["artefatos"]["youtube_url"] = None
@@ -101,6 +95,7 @@ st.markdown(
 st.subheader("📥 Vídeo final para upload")
 
 if video_path and os.path.exists(video_path):
+    armazem.tocar(video_path)
     st.video(video_path)
 
     col_v1, col_v2 = st.columns(2)
@@ -176,16 +171,25 @@ with col_p1:
                 "registrado_em": datetime.now().isoformat(),
                 "modo": "manual",
             }
-            video["status"]["5_publicacao"] = True
-            video["ultima_atualizacao"] = datetime.now().isoformat()
+            banco.atualizar_video(
+                video_id,
+                artefatos={
+                    "youtube_url": video["artefatos"]["youtube_url"],
+                    "publicacao_info": video["artefatos"]["publicacao_info"],
+                },
+                status={"5_publicacao": True},
+            )
             st.success("Publicação registrada e etapa 5 marcada como concluída.")
 
 with col_p2:
     if st.button("🗑 Limpar informação de publicação"):
         video["artefatos"]["youtube_url"] = None
         video["artefatos"]["publicacao_info"] = {}
-        video["status"]["5_publicacao"] = False
-        video["ultima_atualizacao"] = datetime.now().isoformat()
+        banco.atualizar_video(
+            video_id,
+            artefatos={"youtube_url": None, "publicacao_info": {}},
+            status={"5_publicacao": False},
+        )
         st.success("Informações de publicação removidas deste vídeo.")
 
 st.markdown("---")
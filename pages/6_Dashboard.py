@@ -1,20 +1,18 @@
+import math
+import time
 import streamlit as st
 import pandas as pd
 from datetime import datetime
 
+import banco
+import telemetria_llm
+
 st.set_page_config(page_title="6 – Dashboard de Resultados", layout="wide")
 st.title("📊 6 – Dashboard de Resultados dos Vídeos")
 
 # -------------------------------------------------------------------
-# Integra com o "banco" e seleção do monitor
+# Integra com o banco compartilhado e seleção do monitor
 # -------------------------------------------------------------------
-def criar_db_vazio():
-    return {"canais": {}}
-
-if "db" not in st.session_state:
-    st.session_state.db = criar_db_vazio()
-db = st.session_state.db
-
 if "canal_atual_id" not in st.session_state:
     st.session_state.canal_atual_id = None
 if "video_atual_id" not in st.session_state:
@@ -22,12 +20,15 @@ if "video_atual_id" not in st.session_state:
 
 canal_id = st.session_state.canal_atual_id
 
-if not canal_id or canal_id not in db["canais"]:
+canal = banco.obter_canal(canal_id)
+if not canal:
     st.error("Nenhum canal selecionado. Vá ao app principal (monitor) e escolha um canal.")
     st.stop()
 
-canal = db["canais"][canal_id]
-videos = canal["videos"]
+# Vídeos são lidos página a página; totais vêm dos KPIs materializados
+TAMANHO_PAGINA = 50
+indicadores = banco.kpis(canal_id)
+total_videos = indicadores["total"]
 
 # -------------------------------------------------------------------
 # Sidebar – seleção de vídeo e modo de visualização
@@ -42,37 +43,59 @@ with st.sidebar:
 
     modo = st.radio(
         "O que deseja ver?",
-        ["Resumo de todos os vídeos", "Detalhe de um vídeo"],
+        ["Resumo de todos os vídeos", "Detalhe de um vídeo", "Telemetria do LLM"],
         index=0,
     )
 
     video_id = None
-    if modo == "Detalhe de um vídeo" and videos:
-        vids_ids = list(videos.keys())
-        vids_titulos = [videos[vid]["titulo"] for vid in vids_ids]
-        idx_video = st.selectbox(
-            "Vídeo",
-            options=range(len(vids_ids)),
-            format_func=lambda i: vids_titulos[i],
-            index=0,
+    if modo == "Detalhe de um vídeo" and total_videos:
+        busca_detalhe = st.text_input(
+            "Buscar vídeo", placeholder="Trecho do título", key="busca_video_detalhe"
         )
-        video_id = vids_ids[idx_video]
-        st.session_state.video_atual_id = video_id
+        vids = banco.listar_videos(canal_id, limite=TAMANHO_PAGINA, busca=busca_detalhe)
+        if vids:
+            vids_ids = [v["video_id"] for v in vids]
+            vids_titulos = [v["titulo"] for v in vids]
+            idx_video = st.selectbox(
+                "Vídeo",
+                options=range(len(vids_ids)),
+                format_func=lambda i: vids_titulos[i],
+                index=0
+                if st.session_state.video_atual_id not in vids_ids
+                else vids_ids.index(st.session_state.video_atual_id),
+            )
+            video_id = vids_ids[idx_video]
+            st.session_state.video_atual_id = video_id
+        else:
+            st.caption("Nenhum vídeo encontrado para essa busca.")
+
+    if modo == "Telemetria do LLM":
+        dias_telemetria = st.selectbox("Período", [1, 7, 30, 90], index=1, format_func=lambda d: f"Últimos {d} dias")
+        todos_canais = st.checkbox("Todos os canais", value=False)
 
 # -------------------------------------------------------------------
 # Helper – montar DataFrame com informações de publicação
 # -------------------------------------------------------------------
-def montar_df_videos(canal_obj):
+def montar_df_videos(canal_id, busca="", pagina=1, publicado=None):
+    """DataFrame de uma página de vídeos do canal (não do canal inteiro)."""
     linhas = []
-    for vid, v in canal_obj["videos"].items():
-        pub_info = v["artefatos"].get("publicacao_info", {}) if v.get("artefatos") else {}
-        url = v["artefatos"].get("youtube_url") if v.get("artefatos") else None
+    for v in banco.listar_videos(
+        canal_id,
+        artefatos=("youtube_url", "publicacao_info"),
+        limite=TAMANHO_PAGINA,
+        offset=(pagina - 1) * TAMANHO_PAGINA,
+        busca=busca,
+        publicado=publicado,
+    ):
+        vid = v["video_id"]
+        pub_info = v["artefatos"].get("publicacao_info") or {}
+        url = v["artefatos"].get("youtube_url")
 
         linhas.append(
             {
                 "video_id": vid,
                 "Título": v.get("titulo", ""),
-                "Publicado?": "Sim" if v["status"].get("5_publicacao") else "Não",
+                "Publicado?": "Sim" if v["publicado_em"] else "Não",
                 "URL YouTube": url or "",
                 "Privacidade": pub_info.get("privacy", "-"),
                 "Data publicação": pub_info.get("published_at", "")[:16],
@@ -93,25 +116,51 @@ def montar_df_videos(canal_obj):
 if modo == "Resumo de todos os vídeos":
     st.subheader("📚 Visão geral dos vídeos do canal")
 
-    df = montar_df_videos(canal)
-    if df.empty:
+    if not total_videos:
         st.info("Ainda não há vídeos cadastrados para este canal.")
         st.stop()
 
-    # KPIs simples
-    total_videos = len(df)
-    publicados = (df["Publicado?"] == "Sim").sum()
+    # KPIs simples (pré-calculados a cada escrita de status)
+    publicados = indicadores["concluidos"]
     nao_pub = total_videos - publicados
 
-    col_k1, col_k2, col_k3 = st.columns(3)
+    col_k1, col_k2, col_k3, col_k4 = st.columns(4)
     with col_k1:
         st.metric("Vídeos no sistema", total_videos)
     with col_k2:
         st.metric("Vídeos publicados", publicados)
     with col_k3:
         st.metric("A publicar", nao_pub)
+    with col_k4:
+        st.metric("Publicados nesta semana", len(banco.publicados_na_semana(canal_id)))
 
     st.markdown("### 📋 Tabela de vídeos")
+    col_t1, col_t3, col_t2 = st.columns([3, 1, 1])
+    with col_t1:
+        busca_tabela = st.text_input(
+            "Filtrar vídeos pelo título",
+            placeholder="Trecho do título",
+            key="busca_video_dashboard",
+        )
+    with col_t3:
+        filtro_pub = st.selectbox("Publicado?", ["Todos", "Sim", "Não"])
+    publicado = {"Todos": None, "Sim": True, "Não": False}[filtro_pub]
+    total_filtrado = (
+        banco.contar_videos(canal_id, busca=busca_tabela, publicado=publicado)
+        if busca_tabela or publicado is not None
+        else total_videos
+    )
+    n_paginas = max(1, math.ceil(total_filtrado / TAMANHO_PAGINA))
+    with col_t2:
+        pagina = st.number_input(
+            f"Página (de {n_paginas})", min_value=1, max_value=n_paginas, value=1
+        )
+
+    df = montar_df_videos(canal_id, busca_tabela, int(pagina), publicado)
+    if df.empty:
+        st.info("Nenhum vídeo encontrado para esse filtro.")
+        st.stop()
+
     st.dataframe(
         df[["Título", "Publicado?", "Privacidade", "Data publicação", "URL YouTube"]],
         use_container_width=True,
@@ -138,8 +187,8 @@ if modo == "Resumo de todos os vídeos":
             format_func=lambda i: vids_titulos[i],
         )
         vid_sel = vids_ids[idx_ed]
-        v_obj = canal["videos"][vid_sel]
-        pub_info = v_obj["artefatos"].get("publicacao_info", {})
+        v_obj = banco.obter_video(vid_sel)
+        pub_info = v_obj["artefatos"].get("publicacao_info") or {}
 
     with col_f2:
         views_manual = st.number_input(
@@ -162,17 +211,17 @@ if modo == "Resumo de todos os vídeos":
         )
 
     if st.button("💾 Salvar métricas manuais"):
-        if "publicacao_info" not in v_obj["artefatos"]:
-            v_obj["artefatos"]["publicacao_info"] = {}
-        v_obj["artefatos"]["publicacao_info"].update(
-            {
-                "manual_views": views_manual,
-                "manual_ctr": ctr_manual,
-                "manual_watch_time": wt_manual,
-                "manual_atualizado_em": datetime.now().isoformat(),
-            }
+        metricas = {
+            "manual_views": views_manual,
+            "manual_ctr": ctr_manual,
+            "manual_watch_time": wt_manual,
+            "manual_atualizado_em": datetime.now().isoformat(),
+        }
+        v_obj["artefatos"]["publicacao_info"] = banco.alterar_artefato(
+            vid_sel,
+            "publicacao_info",
+            lambda info: {**(info or {}), **metricas},
         )
-        v_obj["ultima_atualizacao"] = datetime.now().isoformat()
         st.success("Métricas manuais salvas para este vídeo.")
         st.experimental_rerun()
 
@@ -186,13 +235,13 @@ if modo == "Resumo de todos os vídeos":
 # -------------------------------------------------------------------
 # Modo 2 – Detalhe de um vídeo
 # -------------------------------------------------------------------
-else:
-    if not video_id or video_id not in videos:
+elif modo == "Detalhe de um vídeo":
+    v = banco.obter_video(video_id)
+    if not v or v["canal_id"] != canal_id:
         st.warning("Selecione um vídeo na barra lateral.")
         st.stop()
 
-    v = videos[video_id]
-    pub_info = v["artefatos"].get("publicacao_info", {})
+    pub_info = v["artefatos"].get("publicacao_info") or {}
     youtube_url = v["artefatos"].get("youtube_url")
 
     st.subheader("🎬 Detalhes do vídeo")
@@ -264,3 +313,96 @@ else:
         "Por enquanto, este dashboard é baseado em dados manuais e no status interno do pipeline. "
         "Posteriormente, pode ser integrado à YouTube Analytics API para buscar métricas em tempo real."
     )
+
+# -------------------------------------------------------------------
+# Modo 3 – Telemetria das chamadas ao LLM (latência, tokens, custo)
+# -------------------------------------------------------------------
+else:
+    import plotly.express as px  # só este modo desenha com plotly
+
+    st.subheader("🤖 Telemetria das chamadas ao LLM")
+
+    linhas = telemetria_llm.serie(
+        None if todos_canais else canal_id, desde=time.time() - dias_telemetria * 86400
+    )
+    if not linhas:
+        st.info("Nenhuma chamada ao LLM registrada nesse período.")
+        st.stop()
+
+    df = pd.DataFrame(linhas)
+    df["quando"] = pd.to_datetime(df["em"], unit="s")
+    df["dia"] = df["quando"].dt.date
+    nomes_canais = {c["canal_id"]: c["nome"] for c in banco.listar_canais()}
+    df["canal"] = df["canal_id"].map(nomes_canais).fillna("—")
+    # Respostas do cache não dizem nada sobre a API; entram só na contagem
+    api = df[df["cache"] == 0]
+
+    col_k1, col_k2, col_k3, col_k4, col_k5 = st.columns(5)
+    with col_k1:
+        st.metric("Chamadas", len(df), help=f"{int(df['cache'].sum())} respondidas pelo cache")
+    with col_k2:
+        st.metric("1º token (p50)", f"{api['ttft_ms'].median() / 1000:.1f}s" if api["ttft_ms"].notna().any() else "-")
+    with col_k3:
+        st.metric("Latência (p95)", f"{api['total_ms'].quantile(0.95) / 1000:.1f}s" if len(api) else "-")
+    with col_k4:
+        st.metric(
+            "Erros", f"{api['erro'].notna().mean():.0%}" if len(api) else "-",
+            help=f"{int((api['tentativas'] > 1).sum())} chamadas precisaram de retentativa",
+        )
+    with col_k5:
+        st.metric("Custo estimado", f"US$ {df['custo_usd'].sum():.2f}")
+
+    cor = "canal" if todos_canais else "modelo"
+
+    col_g1, col_g2 = st.columns(2)
+    with col_g1:
+        fig = px.scatter(
+            api, x="quando", y="ttft_ms", color=cor, symbol="modelo" if todos_canais else None,
+            hover_data=["etapa", "fila_ms"], title="Tempo até o primeiro token (ms)",
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    with col_g2:
+        fig = px.scatter(
+            api, x="quando", y="total_ms", color=cor, symbol="modelo" if todos_canais else None,
+            hover_data=["etapa", "tokens_resposta", "fim", "tentativas"], title="Latência total (ms)",
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    col_g3, col_g4 = st.columns(2)
+    with col_g3:
+        fig = px.box(api, x="modelo", y="tokens_s", color=cor if todos_canais else None,
+                     title="Velocidade de geração (tokens/s)")
+        st.plotly_chart(fig, use_container_width=True)
+    with col_g4:
+        fig = px.box(api, x="modelo", y="fila_ms", color=cor if todos_canais else None,
+                     title="Espera na fila do pool (ms)")
+        st.plotly_chart(fig, use_container_width=True)
+
+    col_g5, col_g6 = st.columns(2)
+    with col_g5:
+        por_dia = (
+            df.groupby(["dia", cor], as_index=False)[["tokens_prompt", "tokens_resposta", "custo_usd"]].sum()
+        )
+        fig = px.bar(por_dia, x="dia", y="custo_usd", color=cor,
+                     hover_data=["tokens_prompt", "tokens_resposta"], title="Custo estimado por dia (US$)")
+        st.plotly_chart(fig, use_container_width=True)
+    with col_g6:
+        erros = api[api["erro"].notna()]
+        if erros.empty:
+            st.caption("Nenhum erro nas chamadas do período.")
+        else:
+            fig = px.histogram(erros, x="dia", color="erro", title="Erros por dia e classe")
+            st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown("### 🧾 Últimas chamadas")
+    st.dataframe(
+        df.sort_values("em", ascending=False).head(200)[
+            ["quando", "canal", "modelo", "etapa", "fila_ms", "ttft_ms", "total_ms",
+             "tokens_prompt", "tokens_resposta", "tokens_s", "fim", "cache", "erro", "tentativas", "custo_usd"]
+        ],
+        use_container_width=True,
+    )
+    st.caption(
+        "Custo calculado com a tabela de preços em `telemetria_llm.PRECOS_USD_POR_MILHAO` "
+        "(modelos fora dela ficam sem custo)."
+    )
@@ -0,0 +1,513 @@
+"""
+Varredura do catálogo de um canal do YouTube com pouca quota.
+
+Em vez de `search.list` (100 unidades por chamada e no máximo 50
+resultados), percorre a playlist de uploads do canal com
+`playlistItems.list` (1 unidade por página de 50), seguindo o
+`nextPageToken` até o fim do catálogo, e busca estatísticas/duração com
+`videos.list` em lotes de 50 ids (1 unidade por lote). Um canal de 5.000
+vídeos sai por ~201 unidades.
+
+Cada função recebe o cliente (`googleapiclient.discovery.build(...)`) e um
+dicionário de uso, que acumula o número de chamadas e a quota gasta por
+método. As respostas passam pelo cache em disco de `cache_api`; chamadas
+servidas por ele não contam quota.
+
+Toda chamada à rede passa também pelo `LIMITADOR` do processo (taxa por
+segundo + quota diária, que zera à meia-noite do Pacífico, como a do
+Google). 429/5xx são repetidos com backoff exponencial e jitter;
+`quotaExceeded` para tudo na hora, com `QuotaEsgotada`. Os demais erros da
+API sobem como `ErroYoutube`, nunca como "canal não encontrado". O gasto
+fica contabilizado por (página, ação), ver `contexto` e `uso_por_contexto`.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import random
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import cache_api
+
+CUSTO_QUOTA = {
+    "channels.list": 1,
+    "playlistItems.list": 1,
+    "videos.list": 1,
+    "search.list": 100,
+}
+TAMANHO_PAGINA = 50  # máximo aceito por playlistItems.list e videos.list
+THREADS = int(os.environ.get("PIPELINE_RASTREADOR_THREADS", "8"))
+CHAMADAS_POR_SEGUNDO = float(os.environ.get("PIPELINE_YOUTUBE_RPS", "50"))
+QUOTA_DIARIA = int(os.environ.get("PIPELINE_YOUTUBE_QUOTA_DIARIA", "10000"))
+TENTATIVAS = int(os.environ.get("PIPELINE_YOUTUBE_TENTATIVAS", "5"))
+ESPERA_BASE_S = float(os.environ.get("PIPELINE_YOUTUBE_ESPERA_BASE_S", "0.5"))
+ESPERA_MAX_S = 30.0
+
+STATUS_TRANSITORIOS = {429, 500, 502, 503, 504}
+MOTIVOS_TAXA = {"rateLimitExceeded", "userRateLimitExceeded"}  # às vezes vêm como 403
+MOTIVOS_QUOTA = {"quotaExceeded", "dailyLimitExceeded"}
+
+try:
+    _FUSO_QUOTA = ZoneInfo("America/Los_Angeles")
+except ZoneInfoNotFoundError:  # Windows sem o pacote tzdata
+    _FUSO_QUOTA = timezone(timedelta(hours=-8))
+
+
+def novo_uso() -> dict:
+    return {
+        "chamadas": {},
+        "quota": 0,
+        "retentativas": 0,
+        "cache": {cache_api.DO_CACHE: 0, cache_api.REVALIDADA: 0, cache_api.DA_API: 0},
+    }
+
+
+class ErroYoutube(RuntimeError):
+    """A YouTube API respondeu com erro (já depois das retentativas)."""
+
+    def __init__(self, mensagem: str, status: int | None = None, motivo: str = ""):
+        super().__init__(mensagem)
+        self.status = status
+        self.motivo = motivo
+
+
+class QuotaEsgotada(ErroYoutube):
+    """A quota (do dia ou do orçamento de um limitador) acabou."""
+
+
+def _dia_quota():
+    return datetime.now(_FUSO_QUOTA).date()
+
+
+class LimitadorTaxa:
+    """
+    Balde de fichas compartilhado entre threads: no máximo `por_segundo`
+    chamadas por segundo (com rajadas de até `rajada`) e, se `quota_max`
+    for dado, no máximo essa soma de unidades de quota. Com `diario=True`
+    a quota usada zera na virada do dia da quota do YouTube.
+    """
+
+    def __init__(
+        self,
+        por_segundo: float,
+        rajada: int | None = None,
+        quota_max: int | None = None,
+        diario: bool = False,
+    ):
+        self.por_segundo = por_segundo
+        self.rajada = rajada or max(1, int(por_segundo))
+        self.quota_max = quota_max
+        self.quota_usada = 0
+        self.esgotada = False
+        self.diario = diario
+        self._dia = _dia_quota() if diario else None
+        self._fichas = float(self.rajada)
+        self._ultimo = time.monotonic()
+        self._trava = threading.Lock()
+
+    def _virar_dia(self) -> None:
+        if self.diario and _dia_quota() != self._dia:
+            self._dia = _dia_quota()
+            self.quota_usada = 0
+            self.esgotada = False
+
+    def esgotar(self) -> None:
+        """A API disse `quotaExceeded`: recusa tudo até a virada do dia."""
+        with self._trava:
+            self.esgotada = True
+
+    def situacao(self) -> dict:
+        with self._trava:
+            self._virar_dia()
+            return {
+                "usada": self.quota_usada,
+                "limite": self.quota_max,
+                "esgotada": self.esgotada,
+            }
+
+    def adquirir(self, custo: int = 1) -> None:
+        with self._trava:
+            self._virar_dia()
+            if self.esgotada:
+                raise QuotaEsgotada(
+                    "a YouTube API já respondeu quotaExceeded hoje; "
+                    "a quota volta à meia-noite (horário do Pacífico)",
+                    403,
+                    "quotaExceeded",
+                )
+            if self.quota_max is not None and self.quota_usada + custo > self.quota_max:
+                raise QuotaEsgotada(
+                    f"orçamento de {self.quota_max} unidades de quota esgotado"
+                )
+            self.quota_usada += custo
+            agora = time.monotonic()
+            self._fichas = min(self.rajada, self._fichas + (agora - self._ultimo) * self.por_segundo)
+            self._ultimo = agora
+            self._fichas -= 1
+            espera = -self._fichas / self.por_segundo if self._fichas < 0 else 0
+        # Dorme fora da trava: a ficha já está reservada (saldo negativo)
+        if espera:
+            time.sleep(espera)
+
+
+# Um só para o processo inteiro (todas as páginas e threads)
+LIMITADOR = LimitadorTaxa(CHAMADAS_POR_SEGUNDO, quota_max=QUOTA_DIARIA, diario=True)
+
+
+# -------------------------------------------------------------------
+# Contabilidade por página/ação
+# -------------------------------------------------------------------
+_contexto = contextvars.ContextVar("rastreador_contexto", default=("—", "—"))
+_uso_contextos: dict[tuple[str, str], dict] = {}
+_trava_contextos = threading.Lock()
+
+
+@contextmanager
+def contexto(pagina: str, acao: str):
+    """As chamadas feitas dentro do bloco contam para (pagina, acao)."""
+    token = _contexto.set((pagina, acao))
+    try:
+        yield
+    finally:
+        _contexto.reset(token)
+
+
+def com_contexto(funcao):
+    """
+    `funcao` rodando no contexto de quem chamou, para threads de um pool
+    (que não herdam o `contexto` atual). Uma cópia por chamada: o mesmo
+    Context não pode estar ativo em duas threads.
+    """
+    atual = contextvars.copy_context()
+    return lambda *args, **kwargs: atual.copy().run(funcao, *args, **kwargs)
+
+
+def _registrar(metodo: str, quota: int = 0, chamada: bool = False, cache: bool = False,
+               retentativa: bool = False, erro: bool = False) -> None:
+    pagina, acao = _contexto.get()
+    with _trava_contextos:
+        reg = _uso_contextos.setdefault(
+            (pagina, acao),
+            {"pagina": pagina, "acao": acao, "chamadas": 0, "quota": 0,
+             "do_cache": 0, "retentativas": 0, "erros": 0, "metodos": {}},
+        )
+        reg["quota"] += quota
+        reg["chamadas"] += chamada
+        reg["do_cache"] += cache
+        reg["retentativas"] += retentativa
+        reg["erros"] += erro
+        if chamada:
+            reg["metodos"][metodo] = reg["metodos"].get(metodo, 0) + 1
+
+
+def uso_por_contexto() -> list[dict]:
+    """Gasto deste processo por (página, ação), da que mais gastou quota para a que menos."""
+    with _trava_contextos:
+        linhas = [{**r, "metodos": dict(r["metodos"])} for r in _uso_contextos.values()]
+    return sorted(linhas, key=lambda r: r["quota"], reverse=True)
+
+
+# -------------------------------------------------------------------
+# Execução com limitador, retentativas e classificação de erros
+# -------------------------------------------------------------------
+def _detalhe_erro(erro: Exception) -> tuple[int | None, str, str]:
+    """`(status, motivo, mensagem)` de um HttpError do googleapiclient."""
+    status = getattr(getattr(erro, "resp", None), "status", None)
+    motivo, mensagem = "", str(erro)
+    try:
+        corpo = json.loads(getattr(erro, "content", b""))["error"]
+        mensagem = corpo.get("message") or mensagem
+        motivo = (corpo.get("errors") or [{}])[0].get("reason", "")
+    except (ValueError, TypeError, KeyError, IndexError, AttributeError):
+        pass
+    return (int(status) if status else None), motivo, mensagem
+
+
+def _erro_de_rede(erro: Exception) -> bool:
+    """Falha de transporte (DNS, conexão, timeout), sem resposta da API."""
+    if isinstance(erro, (OSError, TimeoutError, socket.timeout)):
+        return True
+    # Os erros do httplib2 (ex.: ServerNotFoundError) não são OSError. Se o
+    # módulo nem foi carregado, nenhum erro dele pode ter acontecido.
+    httplib2 = sys.modules.get("httplib2")
+    return httplib2 is not None and isinstance(erro, httplib2.HttpLib2Error)
+
+
+def executar(
+    requisicao,
+    metodo: str,
+    uso: dict | None = None,
+    limitador: LimitadorTaxa | None = None,
+    ttl: float | None = None,
+) -> dict:
+    """
+    Executa a requisição (via cache) sob o `LIMITADOR` do processo e, se
+    dado, também sob `limitador` (ex.: o orçamento de um lote). Erros
+    transitórios (429/5xx, rateLimitExceeded, falha de rede) são repetidos
+    até `TENTATIVAS` vezes com backoff exponencial e jitter completo.
+    Levanta `QuotaEsgotada` na hora com quotaExceeded e `ErroYoutube` para
+    o resto; uma resposta vazia (canal inexistente) não é erro.
+    """
+    custo = CUSTO_QUOTA.get(metodo, 1)
+
+    def antes():
+        if limitador is not None:
+            limitador.adquirir(custo)
+        LIMITADOR.adquirir(custo)
+
+    for tentativa in range(TENTATIVAS):
+        try:
+            resposta, origem = cache_api.executar(requisicao, metodo, antes_da_rede=antes, ttl=ttl)
+            break
+        except QuotaEsgotada:
+            _registrar(metodo, erro=True)
+            raise
+        except Exception as e:
+            status, motivo, mensagem = _detalhe_erro(e)
+            if status is None and not _erro_de_rede(e):
+                raise  # não veio da API nem da rede: bug, não mascara
+            # Requisição recusada também gasta quota
+            _registrar(metodo, quota=custo, chamada=True, erro=True)
+            if uso is not None:
+                uso["chamadas"][metodo] = uso["chamadas"].get(metodo, 0) + 1
+                uso["quota"] += custo
+            if motivo in MOTIVOS_QUOTA:
+                LIMITADOR.esgotar()
+                raise QuotaEsgotada(
+                    f"quota diária da YouTube API esgotada ({mensagem})", status, motivo
+                ) from e
+            transitorio = status in STATUS_TRANSITORIOS or motivo in MOTIVOS_TAXA or status is None
+            if not transitorio:
+                raise ErroYoutube(f"{metodo}: HTTP {status} {motivo} – {mensagem}", status, motivo) from e
+            if tentativa == TENTATIVAS - 1:
+                raise ErroYoutube(
+                    f"{metodo}: HTTP {status or 'sem resposta'} {motivo} após {TENTATIVAS} "
+                    f"tentativas – {mensagem}",
+                    status,
+                    motivo,
+                ) from e
+            _registrar(metodo, retentativa=True)
+            if uso is not None:
+                uso["retentativas"] += 1
+            time.sleep(random.uniform(0, min(ESPERA_MAX_S, ESPERA_BASE_S * 2**tentativa)))
+
+    do_cache = origem == cache_api.DO_CACHE
+    # Um 304 também é uma chamada (e conta quota); só poupa a resposta
+    _registrar(metodo, quota=0 if do_cache else custo, chamada=not do_cache, cache=do_cache)
+    if uso is not None:
+        uso["cache"][origem] += 1
+        if not do_cache:
+            uso["chamadas"][metodo] = uso["chamadas"].get(metodo, 0) + 1
+            uso["quota"] += custo
+    return resposta
+
+
+def total_chamadas(uso: dict) -> int:
+    return sum(uso["chamadas"].values())
+
+
+def somar_uso(total: dict, parcial: dict) -> dict:
+    """Acumula `parcial` em `total` (ex.: uso de várias threads)."""
+    for metodo, n in parcial["chamadas"].items():
+        total["chamadas"][metodo] = total["chamadas"].get(metodo, 0) + n
+    total["quota"] += parcial["quota"]
+    total["retentativas"] += parcial.get("retentativas", 0)
+    for origem, n in parcial["cache"].items():
+        total["cache"][origem] += n
+    return total
+
+
+# -------------------------------------------------------------------
+# Canal e playlist de uploads
+# -------------------------------------------------------------------
+def obter_canal(youtube, channel_id: str, uso: dict | None = None, limitador=None) -> dict | None:
+    res = executar(
+        youtube.channels().list(
+            part="snippet,statistics,contentDetails",
+            id=channel_id,
+        ),
+        "channels.list",
+        uso,
+        limitador,
+    )
+    items = res.get("items", [])
+    return items[0] if items else None
+
+
+def playlist_uploads(canal_info: dict) -> str:
+    """Id da playlist de uploads ("UU..." para um canal "UC...")."""
+    relacionadas = canal_info.get("contentDetails", {}).get("relatedPlaylists", {})
+    if relacionadas.get("uploads"):
+        return relacionadas["uploads"]
+    return "UU" + canal_info["id"][2:]
+
+
+def listar_uploads(
+    youtube,
+    playlist_id: str,
+    limite: int | None = None,
+    uso: dict | None = None,
+    limitador=None,
+    ttl: float | None = None,
+):
+    """
+    Gera `(video_id, publicado_em)` da playlist de uploads, do mais novo para
+    o mais antigo, página a página, até `limite` vídeos (None = catálogo todo).
+    """
+    token = None
+    vistos = 0
+    while True:
+        res = executar(
+            youtube.playlistItems().list(
+                part="contentDetails",
+                playlistId=playlist_id,
+                maxResults=TAMANHO_PAGINA,
+                pageToken=token,
+            ),
+            "playlistItems.list",
+            uso,
+            limitador,
+            ttl,
+        )
+        for item in res.get("items", []):
+            cd = item.get("contentDetails", {})
+            if not cd.get("videoId"):
+                continue
+            yield cd["videoId"], cd.get("videoPublishedAt", "")
+            vistos += 1
+            if limite is not None and vistos >= limite:
+                return
+        token = res.get("nextPageToken")
+        if not token:
+            return
+
+
+def detalhes_videos(
+    youtube, ids: list[str], uso: dict | None = None, limitador=None, ttl: float | None = None
+) -> dict:
+    """
+    `videos.list` em lotes de 50 ids; devolve {video_id: item}. `ttl=0`
+    força estatísticas frescas (revalida no lugar de usar o cache).
+    """
+    detalhes = {}
+    for i in range(0, len(ids), TAMANHO_PAGINA):
+        lote = ids[i : i + TAMANHO_PAGINA]
+        res = executar(
+            youtube.videos().list(
+                part="snippet,statistics,contentDetails",
+                id=",".join(lote),
+                maxResults=TAMANHO_PAGINA,
+            ),
+            "videos.list",
+            uso,
+            limitador,
+            ttl,
+        )
+        for item in res.get("items", []):
+            detalhes[item["id"]] = item
+    return detalhes
+
+
+# -------------------------------------------------------------------
+# Análise completa
+# -------------------------------------------------------------------
+def _linha_video(video_id: str, publicado_em: str, item: dict) -> dict:
+    """Campos crus de um vídeo; `duracao_s`/`is_short` saem de `titulos.extrair`, por lote."""
+    sn = item.get("snippet", {})
+    stt = item.get("statistics", {})
+    dur = item.get("contentDetails", {}).get("duration", "")
+    titulo = sn.get("title", "")
+
+    return {
+        "video_id": video_id,
+        "titulo": titulo[:120],
+        "publicado": sn.get("publishedAt") or publicado_em,
+        "duracao": dur,
+        "views": int(stt.get("viewCount", 0)),
+        "likes": int(stt.get("likeCount", 0)),
+        "comments": int(stt.get("commentCount", 0)),
+    }
+
+
+def analisar_canal(
+    youtube, channel_id: str, limite: int | None = None, limitador: LimitadorTaxa | None = None
+) -> dict | None:
+    """
+    Varre o catálogo do canal (ou os `limite` uploads mais recentes) e
+    devolve {"channel_id", "nome", "subscribers", "total_videos", "videos":
+    [dict], "uso": {"chamadas", "quota", "cache"}, "segundos"}. Vídeos
+    removidos/privados entre a listagem e o `videos.list` ficam de fora.
+    """
+    t0 = time.perf_counter()
+    uso = novo_uso()
+    canal_info = obter_canal(youtube, channel_id, uso, limitador)
+    if not canal_info:
+        return None
+
+    uploads = list(
+        listar_uploads(youtube, playlist_uploads(canal_info), limite, uso, limitador)
+    )
+    detalhes = detalhes_videos(youtube, [vid for vid, _ in uploads], uso, limitador)
+    videos = [
+        _linha_video(vid, publicado_em, detalhes[vid])
+        for vid, publicado_em in uploads
+        if vid in detalhes
+    ]
+
+    return {
+        "channel_id": channel_id,
+        "nome": canal_info["snippet"]["title"],
+        "subscribers": int(canal_info["statistics"].get("subscriberCount", 0)),
+        "total_videos": int(canal_info["statistics"].get("videoCount", 0)),
+        "videos": videos,
+        "uso": uso,
+        "segundos": time.perf_counter() - t0,
+    }
+
+
+def analisar_varios(
+    criar_cliente,
+    channel_ids: list[str],
+    limite: int | None = None,
+    threads: int = THREADS,
+    limitador: LimitadorTaxa | None = None,
+) -> tuple[list[dict], dict]:
+    """
+    Analisa vários canais em paralelo, um cliente por thread
+    (`criar_cliente()`), todos sob o `LIMITADOR` do processo e, se dado,
+    sob um `limitador` próprio do lote (ex.: orçamento de quota). O
+    tempo total fica perto do canal mais lento, não da soma.
+    Devolve `(analises, erros)`: análises na ordem de `channel_ids` (sem os
+    que falharam) e {channel_id: mensagem} para os que falharam.
+    """
+    ids = list(dict.fromkeys(c for c in channel_ids if c))
+    local = threading.local()
+
+    def analisar_um(channel_id):
+        if not hasattr(local, "cliente"):
+            local.cliente = criar_cliente()
+        try:
+            analise = analisar_canal(local.cliente, channel_id, limite, limitador)
+        except ErroYoutube as e:
+            return channel_id, None, str(e)
+        if not analise:
+            return channel_id, None, "canal não encontrado"
+        return channel_id, analise, None
+
+    analises, erros = [], {}
+    if not ids:
+        return analises, erros
+    with ThreadPoolExecutor(max_workers=max(1, min(threads, len(ids)))) as pool:
+        for channel_id, analise, erro in pool.map(com_contexto(analisar_um), ids):
+            if erro:
+                erros[channel_id] = erro
+            else:
+                analises.append(analise)
+    return analises, erros
@@ -0,0 +1,205 @@
+"""
+Resolução de links de canal do YouTube para channelId.
+
+Aceita `/channel/UC...`, `@handle` (com ou sem URL), `/user/<nome>`,
+`/c/<nome>` e, em último caso, texto livre. A ordem de tentativas vai da
+mais barata para a mais cara: id na própria URL (0 unidades),
+`channels.list` com `forHandle`/`forUsername` (1 unidade) e só então
+`search.list` (100 unidades).
+
+Cada resolução fica na tabela `resolucoes_canal`, inclusive as que não
+acharam canal nenhum (entrada negativa). Positivas valem
+`TTL_POSITIVO_S`, negativas `TTL_NEGATIVO_S`: um link quebrado colado de
+novo não gasta outra busca de 100 unidades. Erros de rede/API não são
+gravados.
+"""
+
+import os
+import time
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+import banco
+import rastreador
+
+TTL_POSITIVO_S = int(os.environ.get("PIPELINE_RESOLVEDOR_TTL", str(30 * 86400)))
+TTL_NEGATIVO_S = int(os.environ.get("PIPELINE_RESOLVEDOR_TTL_NEGATIVO", "86400"))
+THREADS = int(os.environ.get("PIPELINE_RESOLVEDOR_THREADS", "8"))
+
+
+def normalizar(link: str) -> tuple[str, str] | None:
+    """
+    `(tipo, valor)` a partir do que o usuário colou: tipo em "channel",
+    "handle", "user", "c" ou "busca". None para texto vazio.
+    """
+    link = (link or "").strip()
+    if not link:
+        return None
+    if link.startswith("@"):
+        return "handle", link[1:].split("/")[0].lower()
+    if link.startswith("UC") and len(link) == 24 and "/" not in link:
+        return "channel", link
+
+    parsed = urlparse(link if "://" in link else "https://" + link)
+    partes = [p for p in parsed.path.split("/") if p]
+    if parsed.netloc.endswith("youtube.com") and partes:
+        if partes[0] == "channel" and len(partes) > 1:
+            return "channel", partes[1]
+        if partes[0].startswith("@"):
+            return "handle", partes[0][1:].lower()
+        if partes[0] in ("user", "c") and len(partes) > 1:
+            return partes[0], partes[1].lower()
+    return "busca", link.lower()
+
+
+def _chave(tipo: str, valor: str) -> str:
+    return f"{tipo}:{valor}"
+
+
+# -------------------------------------------------------------------
+# Cache de resoluções (positivas e negativas)
+# -------------------------------------------------------------------
+def _do_cache(conn, chave: str) -> tuple[bool, str | None]:
+    linha = conn.execute(
+        "SELECT channel_id, expira_em FROM resolucoes_canal WHERE entrada = ?",
+        (chave,),
+    ).fetchone()
+    if not linha or linha["expira_em"] < time.time():
+        return False, None
+    return True, linha["channel_id"]
+
+
+def _gravar(conn, chave: str, channel_id: str | None) -> None:
+    agora = time.time()
+    ttl = TTL_POSITIVO_S if channel_id else TTL_NEGATIVO_S
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO resolucoes_canal "
+            "(entrada, channel_id, resolvido_em, expira_em) VALUES (?, ?, ?, ?)",
+            (chave, channel_id, agora, agora + ttl),
+        )
+
+
+# -------------------------------------------------------------------
+# Consultas à API
+# -------------------------------------------------------------------
+def _por_canais(youtube, uso, **filtro) -> str | None:
+    res = rastreador.executar(
+        youtube.channels().list(part="id", **filtro), "channels.list", uso
+    )
+    items = res.get("items", [])
+    return items[0]["id"] if items else None
+
+
+def _por_busca(youtube, termo: str, uso) -> str | None:
+    res = rastreador.executar(
+        youtube.search().list(part="snippet", q=termo, type="channel", maxResults=1),
+        "search.list",
+        uso,
+    )
+    items = res.get("items", [])
+    return items[0]["snippet"]["channelId"] if items else None
+
+
+def _consultar(youtube, tipo: str, valor: str, uso) -> str | None:
+    if tipo == "channel":
+        return valor
+    if tipo == "handle":
+        return _por_canais(youtube, uso, forHandle=valor) or _por_busca(youtube, valor, uso)
+    if tipo == "user":
+        return _por_canais(youtube, uso, forUsername=valor) or _por_busca(youtube, valor, uso)
+    return _por_busca(youtube, valor, uso)
+
+
+def resolver(youtube, link: str, uso: dict | None = None, conn=None) -> str | None:
+    """
+    channelId do link, ou None se o canal não existir. Falhas da API
+    levantam `rastreador.ErroYoutube` (e não entram no cache negativo).
+    """
+    entrada = normalizar(link)
+    if not entrada:
+        return None
+    tipo, valor = entrada
+    if tipo == "channel":
+        return valor
+
+    conn = conn or banco.conectar()
+    chave = _chave(tipo, valor)
+    achou, channel_id = _do_cache(conn, chave)
+    if achou:
+        return channel_id
+    channel_id = _consultar(youtube, tipo, valor, uso)
+    _gravar(conn, chave, channel_id)
+    return channel_id
+
+
+def resolver_varios(
+    criar_cliente, links: list[str], threads: int = THREADS
+) -> tuple[dict, dict, dict]:
+    """
+    Resolve muitos links de uma vez. Links repetidos (mesma forma
+    normalizada) viram uma consulta só; o que já está no cache sai sem
+    chamada; o resto roda em paralelo, com um cliente por thread
+    (`criar_cliente()`: o cliente do googleapiclient não é thread-safe).
+    Devolve `({link: channelId | None}, uso, {link: mensagem})`: None é
+    "não existe"; links cuja consulta falhou ficam só em erros.
+    """
+    conn = banco.conectar()
+    uso = rastreador.novo_uso()
+    por_chave = {}
+    pendentes = {}
+    for link in links:
+        entrada = normalizar(link)
+        if not entrada:
+            continue
+        chave = _chave(*entrada)
+        if chave in por_chave or chave in pendentes:
+            continue
+        if entrada[0] == "channel":
+            por_chave[chave] = entrada[1]
+            continue
+        achou, channel_id = _do_cache(conn, chave)
+        if achou:
+            por_chave[chave] = channel_id
+        else:
+            pendentes[chave] = link
+
+    local = threading.local()
+    trava = threading.Lock()
+
+    def resolver_um(item):
+        chave, link = item
+        if not hasattr(local, "cliente"):
+            local.cliente = criar_cliente()
+        uso_thread = rastreador.novo_uso()
+        try:
+            channel_id, erro = resolver(local.cliente, link, uso_thread), None
+        except rastreador.ErroYoutube as e:
+            channel_id, erro = None, str(e)
+        with trava:
+            rastreador.somar_uso(uso, uso_thread)
+        return chave, channel_id, erro
+
+    erros_chave = {}
+    if pendentes:
+        with ThreadPoolExecutor(max_workers=max(1, min(threads, len(pendentes)))) as pool:
+            for chave, channel_id, erro in pool.map(
+                rastreador.com_contexto(resolver_um), pendentes.items()
+            ):
+                if erro:
+                    erros_chave[chave] = erro
+                else:
+                    por_chave[chave] = channel_id
+
+    resultado, erros = {}, {}
+    for link in links:
+        entrada = normalizar(link)
+        if not entrada:
+            continue
+        chave = _chave(*entrada)
+        if chave in erros_chave:
+            erros[link] = erros_chave[chave]
+        else:
+            resultado[link] = por_chave.get(chave)
+    return resultado, uso, erros
@@ -0,0 +1,684 @@
+"""
+Geração de roteiros longos com a Groq (página 1).
+
+O roteiro é um objeto JSON com um bloco por seção (`hook`, `introducao`,
+`capitulo_1..5`, `conclusao`) e um `resumo`. A resposta vem em streaming e
+passa por `LeitorJson`, que entrega cada par chave/valor do nível superior
+assim que o valor fecha: o hook aparece (e é gravado) enquanto o modelo
+ainda escreve o capítulo 1, e um timeout no meio não perde o que já chegou.
+
+Numa chamada só, os ~9.800 palavras pedidas não cabem em `MAX_TOKENS` e os
+últimos capítulos saem cortados. `gerar_em_paralelo` divide o trabalho:
+uma chamada curta de planejamento devolve o `resumo` e um plano por bloco,
+e os 8 blocos são escritos em chamadas simultâneas (até `CONCORRENCIA` ao
+mesmo tempo), cada uma com o seu orçamento de tokens e o mesmo contexto.
+
+Cada chamada passa antes pelo cache de `cache_llm`: o mesmo pedido (mesmo
+modelo, parâmetros e prompts) devolve a resposta gravada, reproduzida pelo
+mesmo `LeitorJson`, sem tokens nem espera. `ignorar_cache=True` força uma
+versão nova (e a grava no lugar da antiga). Toda chamada, do cache ou não,
+é medida por `telemetria_llm`.
+
+Uma resposta cortada ou com pequenos defeitos de JSON (vírgula sobrando,
+quebra de linha crua dentro de string) não perde os blocos inteiros:
+`LeitorJson` os recupera e `completar` reescreve só os blocos que faltaram
+ou ficaram curtos, a partir do plano e do resumo já gravados.
+
+O cliente é o `Groq(...)` do SDK oficial (ou qualquer objeto com a mesma
+interface `chat.completions.create`); este módulo não importa o SDK.
+"""
+
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import cache_llm
+import telemetria_llm
+
+MODELO_PADRAO = "llama-3.3-70b-versatile"
+TEMPERATURA = 0.7
+MAX_TOKENS = 8000
+MAX_TOKENS_PLANO = 1500
+CONCORRENCIA = int(os.environ.get("PIPELINE_GROQ_CONCORRENCIA", "4"))
+TOKENS_POR_PALAVRA = 2.0  # português no tokenizador do Llama, com folga
+TOKENS_POR_PROMPT_IMAGEM = 120
+FRACAO_MINIMA = 0.6  # bloco com menos que isso das palavras pedidas é "curto"
+
+BLOCOS = [
+    "hook",
+    "introducao",
+    "capitulo_1",
+    "capitulo_2",
+    "capitulo_3",
+    "capitulo_4",
+    "capitulo_5",
+    "conclusao",
+]
+ROTULOS = {
+    "hook": "Hook",
+    "introducao": "Introdução com CTA",
+    "capitulo_1": "Capítulo 1",
+    "capitulo_2": "Capítulo 2",
+    "capitulo_3": "Capítulo 3",
+    "capitulo_4": "Capítulo 4",
+    "capitulo_5": "Capítulo 5",
+    "conclusao": "Conclusão",
+}
+# bloco -> (parágrafos, palavras no total)
+ESPECIFICACAO = {
+    "hook": (1, 300),
+    "introducao": (3, 500),
+    "capitulo_1": (5, 1500),
+    "capitulo_2": (5, 1500),
+    "capitulo_3": (5, 1500),
+    "capitulo_4": (5, 1500),
+    "capitulo_5": (5, 1500),
+    "conclusao": (3, 500),
+}
+DESCRICAO_BLOCO = {
+    "hook": "Hook (gancho de abertura)",
+    "introducao": "Introdução com CTA",
+    "conclusao": "Conclusão: desfecho da história com CTA",
+}
+PROMPT_IMAGEM_PADRAO = "cinematic wide shot, detailed, 4k, 16:9"
+
+SISTEMA = (
+    "Você é um roteirista profissional de vídeos longos para YouTube, "
+    "especialista em storytelling e retenção. Sempre responde em JSON válido."
+)
+
+
+def roteiro_vazio(roteiro_id: str, titulo_video: str = "") -> dict:
+    return {
+        "id": roteiro_id,
+        "titulo_video": titulo_video,
+        "hook": "",
+        "promessa": "",
+        "estrutura": "",
+        "roteiro": {},
+        "image_prompts": {},  # prompts por parágrafo
+        "tokens_uso": 0,
+        "modelo_usado": "",
+        "gerado_em": None,
+    }
+
+
+# -------------------------------------------------------------------
+# Prompt
+# -------------------------------------------------------------------
+def _contexto(
+    titulo_video: str,
+    briefing: str,
+    objetivo: str,
+    persona: str,
+    tom: str,
+    restricoes: str,
+    canal_nome: str,
+    canal_nicho: str,
+) -> str:
+    return f"""
+Contexto do canal:
+- Nome do canal: {canal_nome}
+- Nicho do canal: {canal_nicho}
+- Persona do público: {persona}
+- Tom de voz da marca: {tom}
+- Palavras/temas proibidos (não use): {restricoes or "nenhuma informada"}
+
+Briefing do vídeo:
+- Tipo: {objetivo}
+- Título provisório do vídeo: {titulo_video}
+- Briefing adicional: {briefing or "nenhum briefing extra"}
+"""
+
+
+_REGRAS_TEXTO = """
+Importante:
+- Escreva todos os parágrafos como se fossem lidos em voz alta, com linguagem natural, envolvente e respeitosa.
+- Não use listas nem Markdown no texto dos parágrafos, apenas prosa contínua.
+- Adapte vocabulário e exemplos ao nicho do canal e à persona.
+"""
+
+_REGRAS_IMAGEM = """
+Regras para os image_prompts:
+- Sempre em inglês (mesmo que o roteiro esteja em português).
+- Descrever a cena do parágrafo como um frame de filme 16:9.
+- Não colocar texto escrito na imagem (sem phrases on screen).
+- Incluir estilo (cinematic, ultra realistic, dramatic lighting, etc.).
+"""
+
+
+def montar_prompt(**contexto) -> str:
+    """
+    Mensagem do usuário pedindo o roteiro completo em JSON (modo de uma
+    chamada só). `contexto`: titulo_video, briefing, objetivo, persona, tom,
+    restricoes, canal_nome e canal_nicho.
+    """
+    return _contexto(**contexto) + f"""
+Tarefa:
+Crie um ROTEIRO COMPLETO em português brasileiro, em forma de história/narrativa, com a seguinte estrutura e tamanhos aproximados:
+
+1. Hook: 1 parágrafo com cerca de 300 palavras.
+2. Introdução com CTA: 3 parágrafos, cerca de 500 palavras no total.
+3. Capítulo 1: 5 parágrafos, cerca de 1500 palavras no total.
+4. Capítulo 2: 5 parágrafos, cerca de 1500 palavras no total.
+5. Capítulo 3: 5 parágrafos, cerca de 1500 palavras no total.
+6. Capítulo 4: 5 parágrafos, cerca de 1500 palavras no total.
+7. Capítulo 5: 5 parágrafos, cerca de 1500 palavras no total.
+8. Conclusão: desfecho da história com CTA, 3 parágrafos e cerca de 500 palavras no total.
+{_REGRAS_TEXTO}
+Além do texto, para CADA parágrafo, gere um prompt de IMAGEM extremamente descritivo (em inglês), próprio para ser usado em modelos de geração de imagens como Pollinations (estilo cinematográfico, alta qualidade, 16:9).
+
+Formato OBRIGATÓRIO da resposta (JSON puro), com as chaves exatamente nesta ordem:
+
+{{
+  "resumo": {{
+    "hook": "frase curta de resumo do gancho",
+    "promessa": "resumo do benefício do vídeo",
+    "estrutura": "descrição em 2-4 frases da jornada do vídeo"
+  }},
+  "hook": {{
+    "paragrafos": ["texto do parágrafo único do hook"],
+    "image_prompts": ["prompt em inglês para esse parágrafo"]
+  }},
+  "introducao": {{
+    "paragrafos": ["p1", "p2", "p3"],
+    "image_prompts": ["prompt p1", "prompt p2", "prompt p3"]
+  }},
+  "capitulo_1": {{
+    "paragrafos": ["p1", "p2", "p3", "p4", "p5"],
+    "image_prompts": ["...", "...", "...", "...", "..."]
+  }},
+  "capitulo_2": {{ ... mesmo formato de capitulo_1 ... }},
+  "capitulo_3": {{ ... }},
+  "capitulo_4": {{ ... }},
+  "capitulo_5": {{ ... }},
+  "conclusao": {{
+    "paragrafos": ["p1", "p2", "p3"],
+    "image_prompts": ["prompt p1", "prompt p2", "prompt p3"]
+  }}
+}}
+{_REGRAS_IMAGEM}"""
+
+
+def _descricao(bloco: str) -> str:
+    return DESCRICAO_BLOCO.get(bloco, ROTULOS[bloco])
+
+
+def montar_prompt_plano(**contexto) -> str:
+    """Pede só o `resumo` e um plano curto de cada bloco (modo em paralelo)."""
+    estrutura = "\n".join(
+        f"- {b}: {_descricao(b)}, {n} parágrafo(s), cerca de {palavras} palavras"
+        for b, (n, palavras) in ESPECIFICACAO.items()
+    )
+    chaves = ",\n".join(f'    "{b}": "o que acontece neste bloco"' for b in BLOCOS)
+    return _contexto(**contexto) + f"""
+Tarefa:
+Planeje um roteiro longo em português brasileiro, em forma de história/narrativa, com estes blocos:
+{estrutura}
+
+NÃO escreva o roteiro ainda. Para cada bloco, descreva em 2 a 4 frases o que acontece nele
+(personagens, virada, emoção, gancho para o bloco seguinte), de modo que cada bloco possa ser
+escrito separadamente sem repetir os outros.
+
+Formato OBRIGATÓRIO da resposta (JSON puro), com as chaves exatamente nesta ordem:
+
+{{
+  "resumo": {{
+    "hook": "frase curta de resumo do gancho",
+    "promessa": "resumo do benefício do vídeo",
+    "estrutura": "descrição em 2-4 frases da jornada do vídeo"
+  }},
+  "plano": {{
+{chaves}
+  }}
+}}
+"""
+
+
+def montar_prompt_bloco(bloco: str, plano: dict, resumo: dict | None = None, **contexto) -> str:
+    """Pede um único bloco, com o contexto do canal, o resumo e o plano inteiro."""
+    n, palavras = ESPECIFICACAO[bloco]
+    linhas_plano = "\n".join(
+        f"- {_descricao(b)}{' (ESTE BLOCO)' if b == bloco else ''}: {plano.get(b, '')}"
+        for b in BLOCOS
+    )
+    resumo = resumo or {}
+    return _contexto(**contexto) + f"""
+Resumo do vídeo:
+- Gancho: {resumo.get("hook", "")}
+- Promessa: {resumo.get("promessa", "")}
+- Jornada: {resumo.get("estrutura", "")}
+
+Plano completo do roteiro (os outros blocos estão sendo escritos em paralelo):
+{linhas_plano}
+
+Tarefa:
+Escreva SOMENTE o bloco "{_descricao(bloco)}", em português brasileiro, seguindo o plano dele:
+{n} parágrafo(s), cerca de {palavras} palavras no total (cerca de {palavras // n} por parágrafo).
+Comece de forma que continue naturalmente o bloco anterior do plano e termine preparando o
+seguinte, sem recontar o que os outros blocos cobrem.
+{_REGRAS_TEXTO}
+Para CADA parágrafo, gere um prompt de IMAGEM extremamente descritivo (em inglês), próprio
+para modelos de geração de imagens como Pollinations (estilo cinematográfico, alta qualidade, 16:9).
+
+Formato OBRIGATÓRIO da resposta (JSON puro):
+
+{{
+  "paragrafos": [{", ".join(f'"p{i + 1}"' for i in range(n))}],
+  "image_prompts": [{", ".join(f'"prompt p{i + 1}"' for i in range(n))}]
+}}
+{_REGRAS_IMAGEM}"""
+
+
+def orcamento_tokens(bloco: str) -> int:
+    """max_tokens de um bloco: o texto pedido e os prompts de imagem, com folga."""
+    n, palavras = ESPECIFICACAO[bloco]
+    return min(MAX_TOKENS, int(palavras * TOKENS_POR_PALAVRA) + n * TOKENS_POR_PROMPT_IMAGEM + 200)
+
+
+def normalizar_bloco(valor) -> tuple[list[str], list[str]]:
+    """`(paragrafos, image_prompts)` de um bloco, com um prompt por parágrafo."""
+    valor = valor if isinstance(valor, dict) else {}
+    paragrafos = [p for p in (valor.get("paragrafos") or []) if isinstance(p, str)]
+    prompts = [p for p in (valor.get("image_prompts") or []) if isinstance(p, str)]
+    if len(prompts) < len(paragrafos):
+        prompts += [PROMPT_IMAGEM_PADRAO] * (len(paragrafos) - len(prompts))
+    return paragrafos, prompts[: len(paragrafos)]
+
+
+def aplicar_bloco(roteiro: dict, chave: str, valor) -> dict:
+    """Grava um bloco (ou o `resumo`) recém-chegado no artefato de roteiro."""
+    if chave == "resumo" and isinstance(valor, dict):
+        for campo in ("hook", "promessa", "estrutura"):
+            roteiro[campo] = str(valor.get(campo, "")).strip()
+    elif chave == "plano" and isinstance(valor, dict):
+        roteiro["plano"] = {b: str(valor.get(b, "")) for b in BLOCOS}
+    elif chave in BLOCOS:
+        paragrafos, prompts = normalizar_bloco(valor)
+        roteiro.setdefault("roteiro", {})[chave] = paragrafos
+        roteiro.setdefault("image_prompts", {})[chave] = prompts
+    return roteiro
+
+
+def blocos_faltando(roteiro: dict) -> list[str]:
+    return [b for b in BLOCOS if not (roteiro.get("roteiro") or {}).get(b)]
+
+
+def blocos_curtos(roteiro: dict, fracao: float = FRACAO_MINIMA) -> list[str]:
+    """Blocos presentes com menos de `fracao` das palavras de `ESPECIFICACAO`."""
+    texto = roteiro.get("roteiro") or {}
+    return [
+        b
+        for b in BLOCOS
+        if texto.get(b) and sum(len(p.split()) for p in texto[b]) < fracao * ESPECIFICACAO[b][1]
+    ]
+
+
+def blocos_a_refazer(roteiro: dict) -> list[str]:
+    refazer = set(blocos_faltando(roteiro)) | set(blocos_curtos(roteiro))
+    return [b for b in BLOCOS if b in refazer]
+
+
+# -------------------------------------------------------------------
+# JSON incremental
+# -------------------------------------------------------------------
+def _sem_virgulas_sobrando(bruto: str) -> str:
+    # Tira a "," seguida só de espaços antes de "}" ou "]", fora de strings
+    partes, em_string, escape = [], False, False
+    for i, c in enumerate(bruto):
+        if em_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                em_string = False
+        elif c == '"':
+            em_string = True
+        elif c == "," and bruto[i + 1 :].lstrip()[:1] in ("}", "]"):
+            continue
+        partes.append(c)
+    return "".join(partes)
+
+
+def carregar_tolerante(bruto: str):
+    """
+    `json.loads` que aceita os defeitos comuns da saída do modelo:
+    caracteres de controle crus dentro de strings e vírgula sobrando antes
+    de `}` ou `]`. Levanta ValueError para o resto.
+    """
+    try:
+        return json.loads(bruto, strict=False)
+    except ValueError:
+        return json.loads(_sem_virgulas_sobrando(bruto), strict=False)
+
+
+def ler_tolerante(texto: str) -> dict:
+    """Pares completos de uma resposta inteira, mesmo cortada ou com defeitos."""
+    return dict(LeitorJson().alimentar(texto))
+
+
+class LeitorJson:
+    """
+    Lê um objeto JSON aos pedaços e devolve, a cada `alimentar`, os pares
+    (chave, valor) do nível superior cujo valor acabou de fechar. Texto
+    antes do primeiro `{` (ex.: uma cerca ```json) é ignorado. Cada
+    caractere é visitado uma vez; só o valor fechado passa por `json.loads`.
+    """
+
+    def __init__(self):
+        self.texto = ""
+        self.terminado = False
+        self._pos = 0
+        self._prof = 0
+        self._em_string = False
+        self._escape = False
+        self._ini_chave = None
+        self._chave = None
+        self._ini_valor = None
+
+    def _fechar_valor(self, fim: int, saidas: list) -> None:
+        bruto = self.texto[self._ini_valor : fim].strip()
+        try:
+            saidas.append((self._chave, carregar_tolerante(bruto)))
+        except ValueError:
+            pass  # valor malformado: fica de fora, o resto segue
+        self._chave = self._ini_valor = None
+
+    def alimentar(self, pedaco: str) -> list[tuple[str, object]]:
+        self.texto += pedaco
+        texto, saidas = self.texto, []
+        i = self._pos
+        while i < len(texto) and not self.terminado:
+            c = texto[i]
+            if self._em_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._em_string = False
+                    if self._prof == 1:
+                        if self._ini_chave is not None:
+                            try:
+                                self._chave = json.loads(texto[self._ini_chave : i + 1])
+                            except ValueError:
+                                self._chave = None
+                            self._ini_chave = None
+                        elif self._ini_valor is not None:
+                            self._fechar_valor(i + 1, saidas)
+            elif self._prof == 0:
+                if c == "{":
+                    self._prof = 1
+            elif c == '"':
+                self._em_string = True
+                if self._prof == 1:
+                    if self._chave is None:
+                        self._ini_chave = i
+                    elif self._ini_valor is None:
+                        self._ini_valor = i
+            elif c in "{[":
+                if self._prof == 1 and self._chave is not None and self._ini_valor is None:
+                    self._ini_valor = i
+                self._prof += 1
+            elif c in "}]":
+                self._prof -= 1
+                if self._prof == 1 and self._ini_valor is not None:
+                    self._fechar_valor(i + 1, saidas)
+                elif self._prof == 0:
+                    if self._ini_valor is not None:  # escalar antes do "}" final
+                        self._fechar_valor(i, saidas)
+                    self.terminado = True
+            elif self._prof == 1:
+                if c == ",":
+                    if self._ini_valor is not None:
+                        self._fechar_valor(i, saidas)
+                    self._chave = None
+                elif c not in " \t\r\n:" and self._chave is not None and self._ini_valor is None:
+                    self._ini_valor = i  # número, true/false/null
+            i += 1
+        self._pos = i
+        return saidas
+
+
+# -------------------------------------------------------------------
+# Chamada em streaming
+# -------------------------------------------------------------------
+def _uso_do_pedaco(pedaco):
+    # A Groq manda o uso no último pedaço, em `x_groq.usage`; APIs
+    # compatíveis com a OpenAI usam `usage`
+    for origem in (getattr(pedaco, "x_groq", None), pedaco):
+        uso = getattr(origem, "usage", None) if origem is not None else None
+        if uso is not None and getattr(uso, "total_tokens", None) is not None:
+            return uso
+    return None
+
+
+def _tentativas(fluxo) -> int:
+    # O SDK da Groq repete 429/5xx/timeouts por conta própria e marca o
+    # pedido que valeu com x-stainless-retry-count; clientes sem isso
+    # (simulados, outras APIs) contam como uma tentativa
+    pedido = getattr(getattr(fluxo, "response", None), "request", None)
+    try:
+        return 1 + int(pedido.headers.get("x-stainless-retry-count", 0))
+    except (AttributeError, TypeError, ValueError):
+        return 1
+
+
+def gerar_em_fluxo(
+    cliente,
+    usuario: str,
+    sistema: str = SISTEMA,
+    modelo: str = MODELO_PADRAO,
+    temperatura: float = TEMPERATURA,
+    max_tokens: int = MAX_TOKENS,
+    ao_bloco=None,
+    ignorar_cache: bool = False,
+    etapa: str = "roteiro",
+    enfileirado_em: float | None = None,
+) -> dict:
+    """
+    Chama o modelo com `stream=True` e chama `ao_bloco(chave, valor)` para
+    cada bloco do JSON assim que ele fecha. Devolve {"blocos", "texto",
+    "tokens", "fim", "tokens_poupados"} (`fim` = finish_reason; "length"
+    indica corte por max_tokens; `tokens_poupados` > 0 quando a resposta
+    veio do cache). Erros no meio do streaming sobem depois de os blocos já
+    completos terem sido entregues.
+
+    `etapa` e `enfileirado_em` (perf_counter de quando a chamada entrou na
+    fila de um pool) vão só para a telemetria.
+    """
+    with telemetria_llm.medir(modelo, etapa, enfileirado_em) as medicao:
+        chave = cache_llm.chave(modelo, temperatura, max_tokens, sistema, usuario)
+        gravada = None
+        if ignorar_cache:
+            cache_llm.ignorar()
+        else:
+            gravada = cache_llm.obter(chave)
+        if gravada is not None:
+            medicao.cache, medicao.fim = True, gravada["fim"]
+            medicao.primeiro_token()
+            blocos = {}
+            for chave_bloco, valor in LeitorJson().alimentar(gravada["texto"]):
+                blocos[chave_bloco] = valor
+                if ao_bloco:
+                    ao_bloco(chave_bloco, valor)
+            return {
+                "blocos": blocos,
+                "texto": gravada["texto"],
+                "tokens": 0,
+                "fim": gravada["fim"],
+                "tokens_poupados": gravada["tokens"],
+            }
+
+        fluxo = cliente.chat.completions.create(
+            model=modelo,
+            messages=[
+                {"role": "system", "content": sistema},
+                {"role": "user", "content": usuario},
+            ],
+            temperature=temperatura,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        medicao.tentativas = _tentativas(fluxo)
+        leitor = LeitorJson()
+        blocos, tokens, fim = {}, 0, None
+        for pedaco in fluxo:
+            uso = _uso_do_pedaco(pedaco)
+            if uso is not None:
+                tokens = uso.total_tokens
+                medicao.uso(uso)
+            if not pedaco.choices:
+                continue
+            escolha = pedaco.choices[0]
+            fim = medicao.fim = escolha.finish_reason or fim
+            if escolha.delta.content:
+                medicao.primeiro_token()
+            for chave_bloco, valor in leitor.alimentar(escolha.delta.content or ""):
+                blocos[chave_bloco] = valor
+                if ao_bloco:
+                    ao_bloco(chave_bloco, valor)
+    if fim == "stop" and leitor.terminado:
+        cache_llm.gravar(chave, modelo, {"texto": leitor.texto, "tokens": tokens, "fim": fim})
+    return {"blocos": blocos, "texto": leitor.texto, "tokens": tokens, "fim": fim, "tokens_poupados": 0}
+
+
+def gerar_em_paralelo(
+    cliente,
+    contexto: dict,
+    modelo: str = MODELO_PADRAO,
+    temperatura: float = TEMPERATURA,
+    concorrencia: int = CONCORRENCIA,
+    blocos: list[str] | None = None,
+    plano: dict | None = None,
+    resumo: dict | None = None,
+    ao_bloco=None,
+    ignorar_cache: bool = False,
+) -> dict:
+    """
+    Planejamento + um pedido por bloco, até `concorrencia` ao mesmo tempo.
+    `ao_bloco(chave, valor)` é chamado na thread de quem chamou (o
+    Streamlit só desenha dela): primeiro com "resumo" e "plano", depois com
+    cada bloco, na ordem em que terminam. Com `plano` já pronto, pula o
+    planejamento; com `resumo` já pronto, o do planejamento é descartado;
+    `blocos` limita quais blocos gerar.
+
+    Devolve {"blocos", "tokens", "tokens_poupados", "fim", "erros", "plano",
+    "resumo"}. Um bloco que falha vai para `erros` sem derrubar os outros;
+    `fim` é "length" se algum bloco foi cortado pelo limite de tokens.
+    """
+    blocos = list(blocos or BLOCOS)
+    resultado = {
+        "blocos": {},
+        "tokens": 0,
+        "tokens_poupados": 0,
+        "fim": "stop",
+        "erros": {},
+        "plano": plano,
+        "resumo": resumo,
+    }
+
+    def entregar(chave, valor):
+        resultado["blocos"][chave] = valor
+        if ao_bloco:
+            ao_bloco(chave, valor)
+
+    def entregar_plano(chave, valor):
+        if chave == "plano" or (chave == "resumo" and resumo is None):
+            entregar(chave, valor)
+
+    if plano is None:
+        planejamento = gerar_em_fluxo(
+            cliente,
+            montar_prompt_plano(**contexto),
+            modelo=modelo,
+            temperatura=temperatura,
+            max_tokens=MAX_TOKENS_PLANO,
+            ao_bloco=entregar_plano,
+            ignorar_cache=ignorar_cache,
+            etapa="plano",
+        )
+        resultado["tokens"] += planejamento["tokens"]
+        resultado["tokens_poupados"] += planejamento["tokens_poupados"]
+        resultado["resumo"] = resumo or planejamento["blocos"].get("resumo") or {}
+        resultado["plano"] = planejamento["blocos"].get("plano")
+        if not isinstance(resultado["plano"], dict):
+            raise ValueError("O planejamento do roteiro não veio no formato esperado.")
+
+    def escrever(bloco, enfileirado_em):
+        return gerar_em_fluxo(
+            cliente,
+            montar_prompt_bloco(bloco, resultado["plano"], resultado["resumo"], **contexto),
+            modelo=modelo,
+            temperatura=temperatura,
+            max_tokens=orcamento_tokens(bloco),
+            ignorar_cache=ignorar_cache,
+            etapa=bloco,
+            enfileirado_em=enfileirado_em,
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concorrencia, len(blocos)))) as pool:
+        futuros = {
+            pool.submit(telemetria_llm.com_contexto(escrever), b, time.perf_counter()): b
+            for b in blocos
+        }
+        for futuro in as_completed(futuros):
+            bloco = futuros[futuro]
+            try:
+                parcial = futuro.result()
+            except Exception as e:
+                resultado["erros"][bloco] = str(e)
+                continue
+            resultado["tokens"] += parcial["tokens"]
+            resultado["tokens_poupados"] += parcial["tokens_poupados"]
+            if parcial["fim"] == "length":
+                resultado["fim"] = "length"
+            if parcial["blocos"].get("paragrafos"):
+                entregar(bloco, parcial["blocos"])
+            else:
+                resultado["erros"][bloco] = "resposta sem parágrafos"
+    return resultado
+
+
+def completar(
+    cliente,
+    contexto: dict,
+    roteiro: dict,
+    modelo: str = MODELO_PADRAO,
+    temperatura: float = TEMPERATURA,
+    concorrencia: int = CONCORRENCIA,
+    ao_bloco=None,
+) -> dict:
+    """
+    Reescreve só os blocos de `roteiro` que faltam ou ficaram curtos
+    (`blocos_a_refazer`), com o plano e o resumo gravados nele; sem plano
+    (roteiro de uma chamada só), um planejamento curto é feito antes e o
+    resumo existente é mantido. Ignora o cache: a resposta guardada é
+    justamente a que veio incompleta.
+
+    Devolve o mesmo que `gerar_em_paralelo`, mais "refeitos" (os blocos
+    pedidos).
+    """
+    refazer = blocos_a_refazer(roteiro)
+    if not refazer:
+        return {"blocos": {}, "tokens": 0, "tokens_poupados": 0, "fim": "stop", "erros": {},
+                "plano": roteiro.get("plano"), "resumo": None, "refeitos": []}
+    plano = roteiro.get("plano")
+    resumo = {campo: roteiro.get(campo, "") for campo in ("hook", "promessa", "estrutura")}
+    resultado = gerar_em_paralelo(
+        cliente,
+        contexto,
+        modelo=modelo,
+        temperatura=temperatura,
+        concorrencia=concorrencia,
+        blocos=refazer,
+        plano=plano if isinstance(plano, dict) and any(plano.values()) else None,
+        resumo=resumo if any(resumo.values()) else None,
+        ao_bloco=ao_bloco,
+        ignorar_cache=True,
+    )
+    resultado["refeitos"] = refazer
+    return resultado
+
@@ -0,0 +1,171 @@
+"""
+Sincronização incremental de canais do YouTube acompanhados.
+
+A primeira sincronização de um canal varre o catálogo (como
+`rastreador.analisar_canal`) e guarda os vídeos em `yt_videos`. As
+seguintes só leem a playlist de uploads até o último `publishedAt` já
+visto e atualizam as estatísticas de uma janela móvel de vídeos recentes
+(`JANELA_DIAS`). Cada atualização vira uma linha em `yt_snapshots`.
+
+Com dois ou mais snapshots dá para medir a velocidade de views (views por
+hora desde a publicação e entre as duas últimas coletas), que é o que
+interessa para achar tendências cedo.
+"""
+
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+import banco
+import rastreador
+import titulos
+
+JANELA_DIAS = int(os.environ.get("PIPELINE_SYNC_JANELA_DIAS", "30"))
+
+
+def _iso_utc(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def sincronizar_canal(
+    youtube,
+    channel_id: str,
+    janela_dias: int = JANELA_DIAS,
+    limite_inicial: int | None = None,
+    limitador=None,
+    conn=None,
+) -> dict | None:
+    """
+    Busca uploads novos e um snapshot de estatísticas da janela recente.
+    `limite_inicial` limita a primeira varredura (None = catálogo todo).
+    Devolve {"novos", "atualizados", "primeira", "uso", "segundos"} ou None
+    se o canal não existir.
+    """
+    conn = conn or banco.conectar()
+    t0 = time.perf_counter()
+    uso = rastreador.novo_uso()
+
+    linha = conn.execute(
+        "SELECT ultimo_publicado FROM yt_sync WHERE channel_id = ?", (channel_id,)
+    ).fetchone()
+    ultimo = linha["ultimo_publicado"] if linha else None
+
+    canal_info = rastreador.obter_canal(youtube, channel_id, uso, limitador)
+    if not canal_info:
+        return None
+
+    # Uploads vêm do mais novo para o mais antigo: para no primeiro já visto.
+    # ttl=0: a primeira página do cache pode ainda não ter o upload de agora.
+    novos = []
+    for video_id, publicado_em in rastreador.listar_uploads(
+        youtube,
+        rastreador.playlist_uploads(canal_info),
+        None if ultimo else limite_inicial,
+        uso,
+        limitador,
+        ttl=0 if ultimo else None,
+    ):
+        if ultimo and publicado_em and publicado_em <= ultimo:
+            break
+        novos.append(video_id)
+
+    corte = _iso_utc(datetime.now(timezone.utc) - timedelta(days=janela_dias))
+    janela = [
+        r[0]
+        for r in conn.execute(
+            "SELECT video_id FROM yt_videos WHERE channel_id = ? AND publicado_em >= ?",
+            (channel_id, corte),
+        )
+    ]
+    ids = list(dict.fromkeys(novos + janela))
+    detalhes = rastreador.detalhes_videos(youtube, ids, uso, limitador, ttl=0)
+
+    agora = int(time.time())
+    linhas = [
+        rastreador._linha_video(video_id, "", item) for video_id, item in detalhes.items()
+    ]
+    shorts = (
+        titulos.extrair(
+            pd.Series([v["titulo"] for v in linhas]),
+            duracoes=pd.Series([v["duracao"] for v in linhas]),
+        )["is_short"].tolist()
+        if linhas
+        else []
+    )
+    with conn:
+        conn.executemany(
+            "INSERT INTO yt_videos (video_id, channel_id, titulo, publicado_em, duracao, is_short) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(video_id) DO UPDATE SET titulo = excluded.titulo",
+            (
+                (v["video_id"], channel_id, v["titulo"], v["publicado"], v["duracao"], int(short))
+                for v, short in zip(linhas, shorts)
+            ),
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO yt_snapshots (video_id, coletado_em, views, likes, comments) "
+            "VALUES (?, ?, ?, ?, ?)",
+            ((v["video_id"], agora, v["views"], v["likes"], v["comments"]) for v in linhas),
+        )
+        publicados = [v["publicado"] for v in linhas if v["publicado"]]
+        novo_ultimo = max(publicados + ([ultimo] if ultimo else []), default=None)
+        conn.execute(
+            "INSERT INTO yt_sync (channel_id, ultimo_publicado, sincronizado_em) VALUES (?, ?, ?) "
+            "ON CONFLICT(channel_id) DO UPDATE SET "
+            "ultimo_publicado = excluded.ultimo_publicado, sincronizado_em = excluded.sincronizado_em",
+            (channel_id, novo_ultimo, time.time()),
+        )
+
+    return {
+        "novos": len(novos),
+        "atualizados": len(linhas),
+        "primeira": ultimo is None,
+        "uso": uso,
+        "segundos": time.perf_counter() - t0,
+    }
+
+
+def velocidade_views(
+    channel_id: str, janela_dias: int | None = JANELA_DIAS, limite: int = 50, conn=None
+) -> list[dict]:
+    """
+    Vídeos do canal (publicados na janela; None = todos) com a última
+    contagem de views, views/hora desde a publicação e views/hora entre as
+    duas últimas coletas (None com um snapshot só), do mais rápido para o
+    mais lento no ritmo recente.
+    """
+    conn = conn or banco.conectar()
+    corte = (
+        _iso_utc(datetime.now(timezone.utc) - timedelta(days=janela_dias))
+        if janela_dias is not None
+        else ""
+    )
+    linhas = conn.execute(
+        """
+        WITH serie AS (
+            SELECT s.video_id, s.coletado_em, s.views,
+                   LAG(s.views) OVER w AS views_ant,
+                   LAG(s.coletado_em) OVER w AS coletado_ant,
+                   ROW_NUMBER() OVER (PARTITION BY s.video_id ORDER BY s.coletado_em DESC) AS ordem
+            FROM yt_snapshots s
+            JOIN yt_videos v ON v.video_id = s.video_id
+            WHERE v.channel_id = ?1 AND v.publicado_em >= ?2
+            WINDOW w AS (PARTITION BY s.video_id ORDER BY s.coletado_em)
+        )
+        SELECT v.video_id, v.titulo, v.publicado_em, v.is_short, s.views,
+               s.views / MAX((s.coletado_em - CAST(strftime('%s', v.publicado_em) AS INTEGER)) / 3600.0, 1.0)
+                   AS views_por_hora,
+               (s.views - s.views_ant) * 3600.0 / (s.coletado_em - s.coletado_ant)
+                   AS views_por_hora_recente,
+               (SELECT COUNT(*) FROM yt_snapshots x WHERE x.video_id = v.video_id) AS snapshots
+        FROM serie s
+        JOIN yt_videos v ON v.video_id = s.video_id
+        WHERE s.ordem = 1
+        ORDER BY views_por_hora_recente IS NULL, views_por_hora_recente DESC, views_por_hora DESC
+        LIMIT ?3
+        """,
+        (channel_id, corte, limite),
+    ).fetchall()
+    return [dict(l) for l in linhas]
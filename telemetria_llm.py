@@ -0,0 +1,172 @@
+"""
+Telemetria das chamadas ao LLM (Groq).
+
+Cada chamada feita por `roteiro_ia.gerar_em_fluxo` vira uma linha em
+`chamadas_llm`: quando começou, canal, modelo, etapa (plano, bloco ou
+roteiro inteiro), espera na fila do pool, tempo até o primeiro token,
+duração total, tokens de prompt e de resposta, finish_reason, se veio do
+cache, a classe do erro, se houve, e quantas tentativas HTTP a chamada
+levou (o SDK da Groq repete sozinho 429/5xx/timeouts; o laço é dele, não
+nosso, então quem chama lê o número da resposta e preenche `tentativas`).
+Custo e tokens/s saem desses campos na leitura (`serie`), então a tabela
+guarda só números.
+
+O canal vem de `contexto(canal_id)`, como em `rastreador.contexto`; as
+threads de um pool herdam com `com_contexto`. Linhas com mais de
+`RETENCAO_DIAS` são apagadas de tempos em tempos.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+import contextvars
+from contextlib import contextmanager
+
+import banco
+
+RETENCAO_DIAS = int(os.environ.get("PIPELINE_LLM_TELEMETRIA_DIAS", "90"))
+_PODA_A_CADA_S = 3600
+
+# US$ por milhão de tokens (prompt, resposta), tabela pública da Groq
+PRECOS_USD_POR_MILHAO = {
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "openai/gpt-oss-120b": (0.15, 0.75),
+    "openai/gpt-oss-20b": (0.10, 0.50),
+}
+
+_canal = contextvars.ContextVar("telemetria_llm_canal", default=None)
+_trava = threading.Lock()
+_ultima_poda = 0.0
+
+
+@contextmanager
+def contexto(canal_id: str | None):
+    """As chamadas feitas dentro do bloco são atribuídas a `canal_id`."""
+    token = _canal.set(canal_id)
+    try:
+        yield
+    finally:
+        _canal.reset(token)
+
+
+def com_contexto(funcao):
+    """`funcao` no contexto de quem chamou (ver `rastreador.com_contexto`)."""
+    atual = contextvars.copy_context()
+    return lambda *args, **kwargs: atual.copy().run(funcao, *args, **kwargs)
+
+
+class Medicao:
+    """Campos de uma chamada, preenchidos por quem chama durante `medir`."""
+
+    def __init__(self, modelo: str, etapa: str, enfileirado_em: float | None):
+        self.modelo = modelo
+        self.etapa = etapa
+        self.em = time.time()
+        self.t0 = time.perf_counter()
+        self.fila_ms = (self.t0 - enfileirado_em) * 1000 if enfileirado_em else 0.0
+        self.ttft_ms = None
+        self.tokens_prompt = 0
+        self.tokens_resposta = 0
+        self.fim = None
+        self.cache = False
+        self.erro = None
+        self.tentativas = 1
+
+    def primeiro_token(self) -> None:
+        if self.ttft_ms is None:
+            self.ttft_ms = (time.perf_counter() - self.t0) * 1000
+
+    def uso(self, uso) -> None:
+        """Lê prompt/completion tokens do `usage` da API (objeto ou None)."""
+        if uso is None:
+            return
+        self.tokens_prompt = getattr(uso, "prompt_tokens", None) or self.tokens_prompt
+        self.tokens_resposta = getattr(uso, "completion_tokens", None) or self.tokens_resposta
+
+
+@contextmanager
+def medir(modelo: str, etapa: str, enfileirado_em: float | None = None):
+    """
+    Mede uma chamada: `enfileirado_em` é o `time.perf_counter()` de quando
+    ela entrou na fila do pool. Exceções sobem normalmente, com a classe
+    registrada em `erro`.
+    """
+    medicao = Medicao(modelo, etapa, enfileirado_em)
+    try:
+        yield medicao
+    except BaseException as e:
+        medicao.erro = type(e).__name__
+        raise
+    finally:
+        gravar(medicao, (time.perf_counter() - medicao.t0) * 1000)
+
+
+def gravar(medicao: Medicao, total_ms: float, conn=None) -> None:
+    global _ultima_poda
+    try:
+        conn = conn or banco.conectar()
+        with conn:
+            conn.execute(
+                "INSERT INTO chamadas_llm (em, canal_id, modelo, etapa, fila_ms, ttft_ms, total_ms, "
+                "tokens_prompt, tokens_resposta, fim, cache, erro, tentativas) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    medicao.em,
+                    _canal.get(),
+                    medicao.modelo,
+                    medicao.etapa,
+                    round(medicao.fila_ms),
+                    None if medicao.ttft_ms is None else round(medicao.ttft_ms),
+                    round(total_ms),
+                    medicao.tokens_prompt,
+                    medicao.tokens_resposta,
+                    medicao.fim,
+                    int(medicao.cache),
+                    medicao.erro,
+                    medicao.tentativas,
+                ),
+            )
+            with _trava:
+                podar = medicao.em - _ultima_poda > _PODA_A_CADA_S
+                if podar:
+                    _ultima_poda = medicao.em
+            if podar:
+                conn.execute(
+                    "DELETE FROM chamadas_llm WHERE em < ?", (medicao.em - RETENCAO_DIAS * 86400,)
+                )
+    except sqlite3.Error:
+        # Telemetria nunca derruba a geração
+        pass
+
+
+def custo_usd(modelo: str, tokens_prompt: int, tokens_resposta: int) -> float | None:
+    precos = PRECOS_USD_POR_MILHAO.get(modelo)
+    if precos is None:
+        return None
+    return (tokens_prompt * precos[0] + tokens_resposta * precos[1]) / 1_000_000
+
+
+def serie(canal_id: str | None = None, desde: float | None = None, conn=None) -> list[dict]:
+    """
+    Chamadas em ordem de tempo (de um canal ou de todos), com `custo_usd`
+    e `tokens_s` (tokens de resposta por segundo depois do primeiro token).
+    """
+    conn = conn or banco.conectar()
+    filtros, params = [], []
+    if canal_id is not None:
+        filtros.append("canal_id = ?")
+        params.append(canal_id)
+    if desde is not None:
+        filtros.append("em >= ?")
+        params.append(desde)
+    onde = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+    linhas = []
+    for linha in conn.execute(f"SELECT * FROM chamadas_llm {onde} ORDER BY em", params):
+        d = dict(linha)
+        geracao_ms = d["total_ms"] - (d["ttft_ms"] or 0)
+        d["custo_usd"] = custo_usd(d["modelo"], d["tokens_prompt"], d["tokens_resposta"])
+        d["tokens_s"] = d["tokens_resposta"] * 1000 / geracao_ms if d["tokens_resposta"] and geracao_ms > 0 else None
+        linhas.append(d)
+    return linhas
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+
+
+def desconectar(caminho):
+    conn = getattr(banco._local, "conns", {}).pop(caminho, None)
+    if conn is not None:
+        conn.close()
+
+
+def apagar_banco(caminho):
+    """Fecha a conexão da thread e apaga o SQLite (o diário fica)."""
+    desconectar(caminho)
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+
+
+@pytest.fixture
+def banco_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(banco, "DB_PATH", str(tmp_path / "dados" / "pipeline.db"))
+    yield banco.DB_PATH
+    desconectar(banco.DB_PATH)
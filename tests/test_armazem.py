@@ -0,0 +1,87 @@
+"""
+Armazém e coletor concorrendo pelo mesmo blob: um órfão apagado entre o
+"já existe" de `guardar_*` e a referência nova é regravado, e a varredura
+de órfãos não apaga o que foi usado há pouco.
+"""
+
+import os
+
+import armazem
+import banco
+import coletor
+
+
+def _orfao(conn, dados, ext=".bin"):
+    """Blob gravado, desligado do vídeo e sem uso há muito tempo."""
+    caminho = armazem.guardar_bytes(dados, ext, "v0", "audio_path", conn=conn)
+    with conn:
+        conn.execute("DELETE FROM blob_refs WHERE video_id = 'v0'")
+        conn.execute("UPDATE blobs SET acessado_em = '2000-01-01T00:00:00'")
+    return caminho
+
+
+def _coletor_no_meio(monkeypatch, conn, hash_):
+    """O coletor ganha a trava logo depois do `os.path.exists` de quem grava."""
+    registrar = armazem._registrar_blob
+    chamadas = []
+
+    def registrar_depois_do_coletor(*args, **kwargs):
+        if not chamadas:
+            assert armazem.apagar_orfao(conn, hash_)
+        chamadas.append(args)
+        return registrar(*args, **kwargs)
+
+    monkeypatch.setattr(armazem, "_registrar_blob", registrar_depois_do_coletor)
+    return chamadas
+
+
+def test_guardar_bytes_regrava_orfao_apagado_no_meio(banco_temporario, monkeypatch):
+    conn = banco.conectar()
+    caminho = _orfao(conn, b"audio")
+    hash_ = os.path.splitext(os.path.basename(caminho))[0]
+    chamadas = _coletor_no_meio(monkeypatch, conn, hash_)
+
+    assert armazem.guardar_bytes(b"audio", ".bin", "v1", "audio_path", conn=conn) == caminho
+    assert len(chamadas) == 2  # a primeira achou o arquivo sumido
+    with open(caminho, "rb") as f:
+        assert f.read() == b"audio"
+    assert armazem.contar_referencias(hash_, conn=conn) == 1
+
+
+def test_guardar_arquivo_regrava_orfao_apagado_no_meio(banco_temporario, monkeypatch, tmp_path):
+    conn = banco.conectar()
+    caminho = _orfao(conn, b"video", ".mp4")
+    hash_ = os.path.splitext(os.path.basename(caminho))[0]
+    _coletor_no_meio(monkeypatch, conn, hash_)
+    origem = tmp_path / "render.mp4"
+    origem.write_bytes(b"video")
+
+    assert armazem.guardar_arquivo(str(origem), "v1", "video_path", conn=conn) == caminho
+    assert not origem.exists()
+    with open(caminho, "rb") as f:
+        assert f.read() == b"video"
+
+
+def test_orfao_referenciado_de_novo_nao_e_apagado(banco_temporario):
+    conn = banco.conectar()
+    caminho = _orfao(conn, b"imagem")
+    hash_ = os.path.splitext(os.path.basename(caminho))[0]
+    armazem.guardar_bytes(b"imagem", ".bin", "v1", "audio_path", conn=conn)
+    assert not armazem.apagar_orfao(conn, hash_)
+    assert os.path.exists(caminho)
+
+
+def test_varredura_respeita_a_carencia(banco_temporario):
+    conn = banco.conectar()
+    caminho = armazem.guardar_bytes(b"novo", ".bin", "v0", "audio_path", conn=conn)
+    with conn:
+        conn.execute("DELETE FROM blob_refs WHERE video_id = 'v0'")
+
+    coletor.coletar(quota=10**12, conn=conn)
+    assert os.path.exists(caminho)  # órfão, mas usado agora há pouco
+
+    with conn:
+        conn.execute("UPDATE blobs SET acessado_em = '2000-01-01T00:00:00'")
+    relatorio = coletor.coletar(quota=10**12, conn=conn)
+    assert not os.path.exists(caminho)
+    assert [i["motivo"] for i in relatorio["itens"]] == ["orfao"]
@@ -0,0 +1,90 @@
+"""
+Compare-and-swap de artefatos e canais: uma gravação concorrente entre a
+leitura e a escrita faz `alterar_*` reler e chamar a função de novo, e
+desiste com `ConflitoDeVersao` depois de `TENTATIVAS_CAS` tentativas.
+"""
+
+import pytest
+
+import banco
+
+
+@pytest.fixture
+def video_id(banco_temporario):
+    canal_id = banco.criar_canal({"nome": "Canal"})
+    vid = banco.criar_video(canal_id, "Vídeo")
+    banco.atualizar_video(vid, artefatos={"thumbs": ["a"]})
+    return vid
+
+
+def test_gravacao_no_meio_faz_reler_e_mesclar(video_id):
+    vistos = []
+
+    def acrescentar_b(atual):
+        vistos.append(list(atual))
+        if len(vistos) == 1:
+            # Outro processo grava entre a leitura e a escrita
+            banco.atualizar_video(video_id, artefatos={"thumbs": atual + ["concorrente"]})
+        return atual + ["b"]
+
+    assert banco.alterar_artefato(video_id, "thumbs", acrescentar_b) == ["a", "concorrente", "b"]
+    assert vistos == [["a"], ["a", "concorrente"]]
+    video = banco.obter_video(video_id)
+    assert video["artefatos"]["thumbs"] == ["a", "concorrente", "b"]
+    assert video["versoes"]["thumbs"] == 3  # "a", concorrente, "b"
+
+
+def test_conflito_em_todas_as_tentativas_levanta(video_id):
+    chamadas = []
+
+    def sempre_perde(atual):
+        chamadas.append(1)
+        banco.atualizar_video(video_id, artefatos={"thumbs": atual + [len(chamadas)]})
+        return ["perdido"]
+
+    with pytest.raises(banco.ConflitoDeVersao) as erro:
+        banco.alterar_artefato(video_id, "thumbs", sempre_perde)
+    assert erro.value.chaves == ["thumbs"]
+    assert len(chamadas) == banco.TENTATIVAS_CAS
+    assert banco.obter_video(video_id)["artefatos"]["thumbs"] == ["a", 1, 2, 3, 4, 5]
+
+
+def test_versao_vencida_nao_grava_nada(video_id):
+    lido = banco.obter_video(video_id)
+    banco.atualizar_video(video_id, artefatos={"thumbs": ["novo"]})
+
+    with pytest.raises(banco.ConflitoDeVersao) as erro:
+        banco.atualizar_video(
+            video_id,
+            artefatos={"thumbs": ["velho"], "roteiro": {"x": 1}},
+            status={"1_roteiro": True},
+            versoes={"thumbs": lido["versoes"]["thumbs"]},
+        )
+    assert erro.value.chaves == ["thumbs"]
+    # A transação inteira foi desfeita, inclusive o que não tinha versão
+    video = banco.obter_video(video_id)
+    assert video["artefatos"]["thumbs"] == ["novo"]
+    assert video["artefatos"]["roteiro"] is None
+    assert video["status"]["1_roteiro"] is False
+
+
+def test_versao_zero_cria_o_artefato_uma_vez(video_id):
+    banco.atualizar_video(video_id, artefatos={"notas": "primeira"}, versoes={"notas": 0})
+    with pytest.raises(banco.ConflitoDeVersao):
+        banco.atualizar_video(video_id, artefatos={"notas": "segunda"}, versoes={"notas": 0})
+    assert banco.obter_video(video_id)["artefatos"]["notas"] == "primeira"
+
+
+def test_alterar_canal_relê_depois_de_gravacao_concorrente(banco_temporario):
+    canal_id = banco.criar_canal({"nome": "Canal", "tags": ["a"]})
+    chamadas = []
+
+    def acrescentar_tag(atual):
+        chamadas.append(1)
+        if len(chamadas) == 1:
+            banco.atualizar_canal(canal_id, {"tags": atual["tags"] + ["concorrente"]})
+        return {"tags": atual["tags"] + ["b"]}
+
+    banco.alterar_canal(canal_id, acrescentar_tag)
+    assert len(chamadas) == 2
+    assert banco.obter_canal(canal_id)["tags"] == ["a", "concorrente", "b"]
@@ -0,0 +1,107 @@
+"""
+Diário de eventos: o evento entra no diário antes do commit no SQLite, de
+modo que uma queda entre os dois deixa o diário à frente do banco (nunca
+atrás), e reaplicar eventos já aplicados não muda o estado.
+"""
+
+import threading
+
+import pytest
+
+import banco
+import diario
+import modelos
+from conftest import apagar_banco
+
+
+def test_queda_entre_diario_e_commit_nao_perde_o_evento(banco_temporario, monkeypatch):
+    canal_id = banco.criar_canal({"nome": "Canal"})
+    video_id = banco.criar_video(canal_id, "Vídeo")
+    registrar = diario.registrar
+
+    def cair_depois_de_anotar(pasta, evento):
+        registrar(pasta, evento)
+        raise KeyboardInterrupt  # o processo morre antes do commit
+
+    monkeypatch.setattr(diario, "registrar", cair_depois_de_anotar)
+    with pytest.raises(KeyboardInterrupt):
+        banco.atualizar_video(video_id, status={"1_roteiro": True}, artefatos={"audio_path": "a.mp3"})
+    monkeypatch.setattr(diario, "registrar", registrar)
+
+    # O banco não viu a gravação; o diário sim
+    assert banco.obter_video(video_id)["status"]["1_roteiro"] is False
+    apagar_banco(banco_temporario)
+    video = banco.obter_video(video_id)
+    assert video["status"]["1_roteiro"] is True
+    assert video["artefatos"]["audio_path"] == "a.mp3"
+
+
+def test_reaplicar_o_diario_e_idempotente(banco_temporario):
+    canal_id = banco.criar_canal({"nome": "Canal"})
+    video_id = banco.criar_video(canal_id, "Vídeo")
+    banco.atualizar_video(video_id, status={"1_roteiro": True}, campos={"titulo": "Outro"})
+    banco.atualizar_video(video_id, status={"2_thumbnail": True})
+    pasta = banco.conectar().pasta_diario
+
+    estado = diario.restaurar(pasta)
+    antes = diario._para_snapshot(estado)
+    diario._ler(pasta, estado=estado)  # a cauda inteira de novo por cima
+    assert diario._para_snapshot(estado) == antes
+    assert estado["videos"][video_id].titulo == "Outro"
+
+
+def _evento(video_id, etapa):
+    return {"tipo": "video", "video_id": video_id, "status": {etapa: True}, "artefatos": {}}
+
+
+def test_compactacao_nao_trava_quem_grava_e_preserva_a_cauda(tmp_path, monkeypatch):
+    pasta = str(tmp_path / "diario")
+    diario.registrar(pasta, _evento("v1", "1_roteiro"))
+    para_snapshot = diario._para_snapshot
+
+    def gravar_no_meio(estado):
+        # Roda durante o replay da compactação: se ela segurasse a trava do
+        # diário, este registrar ficaria esperando para sempre
+        diario.registrar(pasta, _evento("v2", "2_thumbnail"))
+        return para_snapshot(estado)
+
+    monkeypatch.setattr(diario, "_para_snapshot", gravar_no_meio)
+    estado = diario.compactar(pasta)
+    monkeypatch.setattr(diario, "_para_snapshot", para_snapshot)
+
+    assert set(estado["videos"]) == {"v1", "v2"}
+    with open(tmp_path / "diario" / diario.ARQ_EVENTOS, "rb") as f:
+        assert [modelos.loads(l)["video_id"] for l in f] == ["v2"]
+    restaurado = diario.restaurar(pasta)
+    assert diario._para_snapshot(restaurado) == diario._para_snapshot(estado)
+
+
+def test_registrar_acima_do_limite_compacta_em_segundo_plano(tmp_path, monkeypatch):
+    pasta = str(tmp_path / "diario")
+    liberar, compactou = threading.Event(), threading.Event()
+
+    def compactar_devagar(p):
+        liberar.wait(5)
+        compactou.set()
+
+    monkeypatch.setattr(diario, "LIMITE_EVENTOS_BYTES", 1)
+    monkeypatch.setattr(diario, "compactar", compactar_devagar)
+    diario.registrar(pasta, _evento("v1", "1_roteiro"))
+    diario.registrar(pasta, _evento("v1", "2_thumbnail"))  # já agendada: não agenda outra
+    assert not compactou.is_set()
+    liberar.set()
+    assert compactou.wait(5)
+
+
+def test_lead_times_sobrevivem_a_reconstrucao(banco_temporario, monkeypatch):
+    hora = [0]
+    monkeypatch.setattr(banco, "_agora", lambda: f"2026-01-01T{hora[0]:02d}:00:00")
+    video_id = banco.criar_video(banco.criar_canal({"nome": "Canal"}), "Vídeo")
+    for h, etapa in ((1, "1_roteiro"), (3, "2_thumbnail"), (5, "1_roteiro")):
+        hora[0] = h  # a última já estava concluída: não mexe no instante dela
+        banco.atualizar_video(video_id, status={etapa: True})
+
+    esperado = {"0_canal": 0.0, "1_roteiro": 3600.0, "2_thumbnail": 7200.0}
+    assert banco.lead_times(video_id) == esperado
+    apagar_banco(banco_temporario)
+    assert banco.lead_times(video_id) == esperado
@@ -0,0 +1,47 @@
+"""
+Busca no índice de n-gramas: expressões conferidas token a token e termos
+sem posting própria (stopwords, números) encontrados mesmo assim.
+"""
+
+import pytest
+
+import indice_titulos
+
+TITULOS = {
+    "v1": ("O segredo do faraó", 500),
+    "v2": ("Os segredos dos templos", 400),
+    "v3": ("Como os romanos construíam estradas", 300),
+    "v4": ("7 segredos do Egito antigo", 200),
+    "v5": ("Segredo do faraó revelado em 10 minutos", 100),
+}
+
+
+@pytest.fixture
+def indice(banco_temporario):
+    indice_titulos.indexar(
+        [{"video_id": v, "titulo": t, "views": n} for v, (t, n) in TITULOS.items()], "história"
+    )
+
+
+def _ids(termo):
+    return [d["video_id"] for d in indice_titulos.buscar(termo, "história")]
+
+
+def test_expressao_compara_tokens_e_nao_pedacos(indice):
+    assert _ids("segredo do faraó") == ["v1", "v5"]
+    # "segredo do" não pode casar com "segredos dos"
+    assert _ids("segredo do") == ["v1", "v5"]
+    assert _ids("segredos do egito") == ["v4"]
+
+
+@pytest.mark.parametrize(
+    "termo, esperado",
+    [("como", ["v3"]), ("7", ["v4", "v5"]), ("do", ["v1", "v4", "v5"]), ("em 10", ["v5"])],
+)
+def test_termo_sem_posting_ainda_e_encontrado(indice, termo, esperado):
+    assert _ids(termo) == esperado
+
+
+def test_unigrama_usa_a_posting(indice):
+    assert _ids("faraó") == ["v1", "v5"]
+    assert _ids("templos") == ["v2"]
@@ -0,0 +1,57 @@
+"""
+KPIs materializados depois de recargas em massa: reconstrução do banco pelo
+diário e importação de uma exportação. As idades por fase têm de continuar
+finitas e plausíveis (vídeos criados agora -> menos de um dia).
+"""
+
+import math
+
+import pytest
+
+import banco
+from conftest import apagar_banco, desconectar
+
+
+def _popular():
+    canal_id = banco.criar_canal({"nome": "Canal", "nicho": "história"})
+    ids = [banco.criar_video(canal_id, f"Vídeo {i}") for i in range(4)]
+    banco.atualizar_video(ids[1], status={"1_roteiro": True})
+    banco.atualizar_video(ids[2], status={"1_roteiro": True, "2_thumbnail": True, "3_audio": True})
+    banco.atualizar_video(ids[3], status={e: True for e in banco.ETAPAS[1:6]})
+    return canal_id
+
+
+def _conferir(indicadores):
+    assert indicadores["total"] == 4
+    assert indicadores["por_fase"][0] == 1
+    assert indicadores["por_fase"][1] == 1
+    assert indicadores["por_fase"][3] == 1
+    assert indicadores["por_fase"][5] == 1
+    assert set(indicadores["idade_media_dias"]) == {0, 1, 3, 5}
+    for idade in indicadores["idade_media_dias"].values():
+        assert math.isfinite(idade)
+        assert 0 <= idade < 1
+
+
+def test_kpis_depois_de_reconstruir_pelo_diario(banco_temporario):
+    canal_id = _popular()
+    _conferir(banco.kpis(canal_id))
+
+    apagar_banco(banco_temporario)
+
+    _conferir(banco.kpis(canal_id))
+
+
+def test_kpis_depois_de_importar(banco_temporario, tmp_path):
+    exportacao = pytest.importorskip("exportacao")
+    pytest.importorskip("pyarrow")
+    canal_id = _popular()
+    exportacao.exportar(str(tmp_path / "exportado"))
+
+    desconectar(banco_temporario)
+    banco.DB_PATH = str(tmp_path / "outro" / "pipeline.db")
+    try:
+        exportacao.importar(str(tmp_path / "exportado"))
+        _conferir(banco.kpis(canal_id))
+    finally:
+        desconectar(banco.DB_PATH)
@@ -0,0 +1,56 @@
+"""
+`rastreador.executar` com falhas de transporte: DNS/conexão/timeout são
+repetidos e, esgotadas as tentativas, viram `ErroYoutube`; só exceções que
+não vêm da API nem da rede sobem cruas.
+"""
+
+import pytest
+
+import rastreador
+
+httplib2 = pytest.importorskip("httplib2")
+
+
+class Requisicao:
+    def __init__(self, *falhas):
+        self.falhas = list(falhas)
+        self.chamadas = 0
+
+    def execute(self):
+        self.chamadas += 1
+        if self.falhas:
+            raise self.falhas.pop(0)
+        return {"items": []}
+
+
+@pytest.fixture(autouse=True)
+def sem_espera(monkeypatch):
+    monkeypatch.setattr(rastreador, "ESPERA_BASE_S", 0.0)
+    monkeypatch.setattr(rastreador, "LIMITADOR", rastreador.LimitadorTaxa(1000))
+
+
+@pytest.mark.parametrize(
+    "falha",
+    [httplib2.ServerNotFoundError("dns"), TimeoutError("lento"), ConnectionResetError("rst")],
+)
+def test_falha_de_rede_e_repetida(falha):
+    requisicao = Requisicao(falha)
+    uso = rastreador.novo_uso()
+    assert rastreador.executar(requisicao, "teste.list", uso) == {"items": []}
+    assert requisicao.chamadas == 2
+    assert uso["retentativas"] == 1
+
+
+def test_falha_de_rede_persistente_vira_erro_youtube():
+    requisicao = Requisicao(*[httplib2.ServerNotFoundError("dns")] * rastreador.TENTATIVAS)
+    with pytest.raises(rastreador.ErroYoutube) as erro:
+        rastreador.executar(requisicao, "teste.list")
+    assert erro.value.status is None
+    assert requisicao.chamadas == rastreador.TENTATIVAS
+
+
+def test_bug_nao_e_mascarado():
+    requisicao = Requisicao(KeyError("campo"))
+    with pytest.raises(KeyError):
+        rastreador.executar(requisicao, "teste.list")
+    assert requisicao.chamadas == 1
@@ -0,0 +1,182 @@
+"""
+Leitura incremental do JSON do modelo (`LeitorJson`), reparo dos defeitos
+comuns (`carregar_tolerante`) e `completar`, que só pede de novo os blocos
+que faltam ou ficaram curtos.
+"""
+
+import re
+import json
+from types import SimpleNamespace as NS
+
+import pytest
+
+import roteiro_ia
+
+
+def _ler(pedacos):
+    leitor, pares = roteiro_ia.LeitorJson(), []
+    for pedaco in pedacos:
+        pares += leitor.alimentar(pedaco)
+    return leitor, pares
+
+
+def _um_a_um(texto):
+    return list(texto)
+
+
+# -------------------------------------------------------------------
+# LeitorJson
+# -------------------------------------------------------------------
+def test_chaves_e_valores_partidos_entre_pedacos():
+    texto = '{"hook": {"paragrafos": ["era uma vez"]}, "n": 12, "ok": true}'
+    for pedacos in (_um_a_um(texto), [texto[:3], texto[3:9], texto[9:40], texto[40:]]):
+        leitor, pares = _ler(pedacos)
+        assert pares == [("hook", {"paragrafos": ["era uma vez"]}), ("n", 12), ("ok", True)]
+        assert leitor.terminado
+
+
+def test_cada_valor_sai_assim_que_fecha():
+    leitor = roteiro_ia.LeitorJson()
+    assert leitor.alimentar('```json\n{"hook": {"paragrafos": ["a"]}') == [
+        ("hook", {"paragrafos": ["a"]})
+    ]
+    assert leitor.alimentar(', "introducao": {"paragr') == []
+    assert leitor.alimentar('afos": ["b"]}}\n```') == [("introducao", {"paragrafos": ["b"]})]
+
+
+def test_aspas_escapadas_e_chaves_dentro_de_strings():
+    texto = r'{"hook": {"paragrafos": ["ele disse \"fim}\" e saiu ]", "barra \\"]}}'
+    # Partido logo depois de cada contrabarra
+    pedacos = re.split(r"(?<=\\)", texto)
+    assert len(pedacos) > 2
+    _, pares = _ler(pedacos)
+    assert pares == [("hook", {"paragrafos": ['ele disse "fim}" e saiu ]', "barra \\"]})]
+
+
+def test_resposta_cortada_entrega_so_os_pares_completos():
+    completo = {"hook": {"paragrafos": ["a"]}, "introducao": {"paragrafos": ["b", "c"]}}
+    texto = json.dumps(completo, ensure_ascii=False)
+    cortado = texto[: texto.index('"c"') + 2]
+    leitor, pares = _ler(_um_a_um(cortado))
+    assert pares == [("hook", {"paragrafos": ["a"]})]
+    assert not leitor.terminado
+    assert roteiro_ia.ler_tolerante(cortado) == {"hook": {"paragrafos": ["a"]}}
+
+
+def test_virgulas_sobrando_e_controles_crus():
+    texto = '{"hook": {"paragrafos": ["linha\tcom tab", "b",],}, "conclusao": {"paragrafos": ["z"]},}'
+    leitor, pares = _ler(_um_a_um(texto))
+    assert pares == [
+        ("hook", {"paragrafos": ["linha\tcom tab", "b"]}),
+        ("conclusao", {"paragrafos": ["z"]}),
+    ]
+    assert leitor.terminado
+
+
+def test_valor_malformado_fica_de_fora_sem_parar_o_resto():
+    _, pares = _ler(['{"hook": {"paragrafos": ["a" "b"]}, "conclusao": {"paragrafos": ["z"]}}'])
+    assert pares == [("conclusao", {"paragrafos": ["z"]})]
+
+
+# -------------------------------------------------------------------
+# carregar_tolerante
+# -------------------------------------------------------------------
+def test_carregar_tolerante_nao_mexe_em_virgulas_dentro_de_strings():
+    assert roteiro_ia.carregar_tolerante('["a ,]", "b\\" ,}",]') == ["a ,]", 'b" ,}']
+
+
+def test_carregar_tolerante_levanta_value_error_no_resto():
+    with pytest.raises(ValueError):
+        roteiro_ia.carregar_tolerante('{"a": }')
+
+
+# -------------------------------------------------------------------
+# completar
+# -------------------------------------------------------------------
+_POR_DESCRICAO = {roteiro_ia._descricao(b): b for b in roteiro_ia.BLOCOS}
+CONTEXTO = dict(
+    titulo_video="A queda de Roma", briefing="", objetivo="", persona="", tom="",
+    restricoes="", canal_nome="Canal", canal_nicho="história",
+)
+
+
+def _bloco_completo(bloco):
+    n, palavras = roteiro_ia.ESPECIFICACAO[bloco]
+    return {"paragrafos": [" ".join(["palavra"] * (palavras // n))] * n, "image_prompts": ["p"] * n}
+
+
+class ClienteFalso:
+    """Responde cada bloco por inteiro, em pedaços pequenos, e anota o que foi pedido."""
+
+    def __init__(self):
+        self.chat = NS(completions=self)
+        self.pedidos = []
+
+    def create(self, messages, stream=False, **_):
+        prompt = messages[-1]["content"]
+        if "NÃO escreva o roteiro ainda" in prompt:
+            self.pedidos.append("plano")
+            resposta = {"resumo": {"hook": "novo"}, "plano": {b: "plano" for b in roteiro_ia.BLOCOS}}
+        else:
+            bloco = _POR_DESCRICAO[re.search(r'Escreva SOMENTE o bloco "(.+?)"', prompt).group(1)]
+            self.pedidos.append(bloco)
+            resposta = _bloco_completo(bloco)
+        texto = json.dumps(resposta, ensure_ascii=False)
+        uso = NS(prompt_tokens=10, completion_tokens=20, total_tokens=30)
+        return iter(
+            [NS(choices=[NS(delta=NS(content=texto[i : i + 50]), finish_reason=None)])
+             for i in range(0, len(texto), 50)]
+            + [NS(choices=[NS(delta=NS(content=""), finish_reason="stop")], x_groq=NS(usage=uso))]
+        )
+
+
+def _roteiro_incompleto(com_plano=True):
+    roteiro = roteiro_ia.roteiro_vazio("r1", "A queda de Roma")
+    roteiro.update(hook="gancho", promessa="promessa", estrutura="jornada")
+    if com_plano:
+        roteiro["plano"] = {b: f"plano de {b}" for b in roteiro_ia.BLOCOS}
+    for bloco in roteiro_ia.BLOCOS:
+        if bloco != "capitulo_3":  # faltando
+            roteiro_ia.aplicar_bloco(roteiro, bloco, _bloco_completo(bloco))
+    roteiro_ia.aplicar_bloco(roteiro, "capitulo_5", {"paragrafos": ["curto demais"]})
+    return roteiro
+
+
+def test_completar_refaz_so_os_blocos_faltando_ou_curtos(banco_temporario):
+    roteiro = _roteiro_incompleto()
+    assert roteiro_ia.blocos_a_refazer(roteiro) == ["capitulo_3", "capitulo_5"]
+    cliente = ClienteFalso()
+    entregues = []
+
+    resultado = roteiro_ia.completar(
+        cliente, CONTEXTO, roteiro, ao_bloco=lambda chave, _: entregues.append(chave)
+    )
+
+    assert sorted(cliente.pedidos) == ["capitulo_3", "capitulo_5"]  # sem novo plano
+    assert resultado["refeitos"] == ["capitulo_3", "capitulo_5"]
+    assert sorted(entregues) == ["capitulo_3", "capitulo_5"]
+    assert not resultado["erros"]
+    for chave, valor in resultado["blocos"].items():
+        roteiro_ia.aplicar_bloco(roteiro, chave, valor)
+    assert roteiro_ia.blocos_a_refazer(roteiro) == []
+
+
+def test_completar_sem_plano_planeja_e_mantem_o_resumo(banco_temporario):
+    roteiro = _roteiro_incompleto(com_plano=False)
+    cliente = ClienteFalso()
+    entregues = {}
+
+    roteiro_ia.completar(cliente, CONTEXTO, roteiro, ao_bloco=entregues.__setitem__)
+
+    assert cliente.pedidos[0] == "plano"
+    assert sorted(cliente.pedidos[1:]) == ["capitulo_3", "capitulo_5"]
+    assert "resumo" not in entregues  # o resumo gravado no roteiro fica
+
+
+def test_completar_roteiro_inteiro_nao_chama_o_modelo(banco_temporario):
+    roteiro = roteiro_ia.roteiro_vazio("r1")
+    for bloco in roteiro_ia.BLOCOS:
+        roteiro_ia.aplicar_bloco(roteiro, bloco, _bloco_completo(bloco))
+    cliente = ClienteFalso()
+    assert roteiro_ia.completar(cliente, CONTEXTO, roteiro)["refeitos"] == []
+    assert cliente.pedidos == []
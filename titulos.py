@@ -0,0 +1,103 @@
+"""
+Características de títulos de vídeo, extraídas de forma vetorizada.
+
+Trabalha sobre colunas inteiras (`pandas .str` com regex compiladas) em vez
+de laços em Python título a título: números, perguntas, emojis (por faixas
+Unicode), gatilhos de um léxico configurável, tamanho do título e duração
+ISO-8601 de verdade (`PT1H2M3S`, `P1DT2H`), usada para separar Shorts.
+"""
+
+import re
+
+import pandas as pd
+
+GATILHOS_PADRAO = ("segredo", "milionário", "rápido", "fácil", "nunca", "sempre")
+LIMITE_SHORT_S = 60
+
+_RE_NUMERO = re.compile(r"\d")
+# Pictogramas, símbolos, dingbats, bandeiras e setas/estrelas usados como emoji
+_RE_EMOJI = re.compile(
+    "[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF\u2300-\u23FF\u3030\u303D\u3297\u3299]"
+)
+_RE_DURACAO = re.compile(
+    r"^P(?:(?P<d>\d+)D)?(?:T(?:(?P<h>\d+)H)?(?:(?P<m>\d+)M)?(?:(?P<s>\d+(?:\.\d+)?)S)?)?$"
+)
+_SEGUNDOS = {"d": 86400, "h": 3600, "m": 60, "s": 1}
+
+
+def duracao_segundos(iso: str | None) -> float | None:
+    """Segundos de uma duração ISO-8601 (`PT4M13S`); None se vazia/inválida."""
+    m = _RE_DURACAO.match(iso or "")
+    if not m or not any(m.groups()):
+        return None
+    return sum(float(v) * _SEGUNDOS[k] for k, v in m.groupdict().items() if v)
+
+
+def duracao_segundos_serie(duracoes: pd.Series) -> pd.Series:
+    """
+    `duracao_segundos` para uma coluna inteira (NaN onde vazia/inválida).
+    Durações se repetem muito num catálogo: cada valor distinto é
+    interpretado uma vez só e espalhado pelos códigos do `factorize`.
+    """
+    codigos, unicos = pd.factorize(duracoes.fillna("").astype(str))
+    segundos = pd.Series(unicos).map(duracao_segundos).astype(float).to_numpy()
+    return pd.Series(segundos[codigos], index=duracoes.index)
+
+
+def regex_gatilhos(gatilhos) -> re.Pattern | None:
+    """Regex que casa qualquer palavra do léxico (sem diferenciar maiúsculas)."""
+    termos = sorted({g.strip().lower() for g in gatilhos if g and g.strip()}, key=len, reverse=True)
+    if not termos:
+        return None
+    return re.compile("|".join(re.escape(t) for t in termos))
+
+
+def extrair(
+    titulos: pd.Series,
+    duracoes: pd.Series | None = None,
+    gatilhos=GATILHOS_PADRAO,
+) -> pd.DataFrame:
+    """
+    Uma linha por título, no mesmo índice: `tem_numero`, `pergunta`,
+    `tem_emoji`, `gatilhos` (ocorrências do léxico), `comprimento`,
+    `palavras` e, com `duracoes`, `duracao_s` e `is_short`.
+    """
+    t = titulos.fillna("").astype(str)
+    minusculo = t.str.lower()
+    padrao = regex_gatilhos(gatilhos)
+
+    feats = pd.DataFrame(
+        {
+            "tem_numero": t.str.contains(_RE_NUMERO),
+            "pergunta": t.str.contains("?", regex=False),
+            "tem_emoji": t.str.contains(_RE_EMOJI),
+            "gatilhos": minusculo.str.count(padrao) if padrao else 0,
+            "comprimento": t.str.len(),
+            "palavras": t.str.count(r"\S+"),
+        },
+        index=titulos.index,
+    )
+    if duracoes is not None:
+        # Short: até LIMITE_SHORT_S ou `#shorts` no título; `P0D` (live ou
+        # estreia ainda sem duração) não conta
+        feats["duracao_s"] = duracao_segundos_serie(duracoes)
+        feats["is_short"] = (
+            feats["duracao_s"].gt(0) & feats["duracao_s"].le(LIMITE_SHORT_S)
+        ) | minusculo.str.contains("#shorts", regex=False)
+    return feats
+
+
+def resumo(feats: pd.DataFrame) -> dict:
+    """Percentuais e totais para os cards de padrões de título."""
+    n = len(feats)
+    if not n:
+        return {"n": 0, "pct_numeros": 0.0, "pct_perguntas": 0.0, "pct_emojis": 0.0,
+                "gatilhos": 0, "comprimento_medio": 0.0}
+    return {
+        "n": n,
+        "pct_numeros": float(feats["tem_numero"].mean()) * 100,
+        "pct_perguntas": float(feats["pergunta"].mean()) * 100,
+        "pct_emojis": float(feats["tem_emoji"].mean()) * 100,
+        "gatilhos": int(feats["gatilhos"].sum()),
+        "comprimento_medio": float(feats["comprimento"].mean()),
+    }
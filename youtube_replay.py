@@ -0,0 +1,321 @@
+"""
+Gravação e replay local da YouTube Data API, para testes e benchmarks sem
+rede nem quota.
+
+- Gravação: `HttpGravador` é um `httplib2.Http` que, além de fazer a
+  chamada real, guarda cada resposta 200 em
+  `<pasta>/<recurso>/<hash>.json` (URL sem a API key + corpo).
+- Replay: `criar_servidor` sobe um servidor HTTP local que responde em
+  `/youtube/v3/<recurso>` com o que foi gravado, com latência configurável
+  e injeção de erros (500/503, 429 e 403 quotaExceeded no formato de erro
+  do Google). Requisição não gravada dá 404 `notRecorded`; `If-None-Match`
+  com o ETag gravado dá 304.
+
+O cliente aponta para o replay por configuração (`PIPELINE_YOUTUBE_ENDPOINT`,
+ver `cliente_youtube.py`). Também roda sozinho:
+
+    python youtube_replay.py --pasta dados/youtube_gravacoes --porta 8765 \\
+        --latencia-ms 80 --taxa-erro 0.02 --erros 500,429
+
+`--gerar-cenario 20:500` grava antes um catálogo sintético determinístico
+(20 canais de 500 vídeos) para testes de carga sem gravação real.
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+try:
+    import httplib2
+except ImportError:  # só a gravação precisa; o servidor é só biblioteca padrão
+    httplib2 = None
+
+PASTA_PADRAO = os.path.join("dados", "youtube_gravacoes")
+
+ERROS_INJETAVEIS = {
+    500: ("backendError", "Backend Error"),
+    503: ("backendError", "The service is currently unavailable."),
+    429: ("rateLimitExceeded", "Too many requests."),
+    403: ("quotaExceeded", "The request cannot be completed because you have exceeded your quota."),
+}
+
+
+def chave_requisicao(uri: str) -> tuple[str, str]:
+    """`(recurso, hash)` de uma URL da API, ignorando a API key e a ordem dos parâmetros."""
+    partes = urlsplit(uri)
+    params = sorted((k, v) for k, v in parse_qsl(partes.query) if k != "key")
+    recurso = partes.path.rstrip("/").rsplit("/", 1)[-1]
+    hash_ = hashlib.sha256(f"{partes.path}?{urlencode(params)}".encode("utf-8")).hexdigest()
+    return recurso, hash_[:32]
+
+
+def _caminho(pasta: str, uri: str) -> str:
+    recurso, hash_ = chave_requisicao(uri)
+    return os.path.join(pasta, recurso, hash_ + ".json")
+
+
+def gravar_resposta(pasta: str, uri: str, corpo: dict, status: int = 200) -> str:
+    """Grava (ou sobrescreve) a resposta de uma URL. Útil para montar cenários à mão."""
+    caminho = _caminho(pasta, uri)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    partes = urlsplit(uri)
+    uri_sem_chave = partes.path + "?" + urlencode(
+        [(k, v) for k, v in parse_qsl(partes.query) if k != "key"]
+    )
+    fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(caminho))
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"uri": uri_sem_chave, "status": status, "corpo": corpo}, f, ensure_ascii=False)
+    os.replace(tmp, caminho)
+    return caminho
+
+
+def ler_resposta(pasta: str, uri: str) -> dict | None:
+    try:
+        with open(_caminho(pasta, uri), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def gerar_cenario(
+    pasta: str, canais: int = 20, videos: int = 500, semente: int = 0, prefixo: str = "UCreplay"
+) -> list[str]:
+    """
+    Grava um catálogo sintético e determinístico: para cada canal, o
+    `channels.list` (por id e por `@handle`), as páginas da playlist de
+    uploads e os `videos.list` em lotes de 50, exatamente como
+    `rastreador`/`resolvedor` pedem. Devolve os channelIds.
+    """
+    sorteio = random.Random(semente)
+    palavras = ["segredo", "história", "como", "ganhar", "nunca", "império", "mistério",
+                "verdade", "fácil", "roma", "rápido", "guerra", "incrível", "descoberta"]
+    base = "/youtube/v3/"
+    ids = []
+    for c in range(canais):
+        channel_id = f"{prefixo}{c:0{24 - len(prefixo)}d}"
+        uploads = "UU" + channel_id[2:]
+        ids.append(channel_id)
+        info = {
+            "kind": "youtube#channel",
+            "id": channel_id,
+            "snippet": {"title": f"Canal Replay {c}"},
+            "statistics": {"subscriberCount": str(sorteio.randint(1_000, 2_000_000)),
+                           "videoCount": str(videos)},
+            "contentDetails": {"relatedPlaylists": {"uploads": uploads}},
+        }
+        gravar_resposta(pasta, base + "channels?" + urlencode(
+            {"part": "snippet,statistics,contentDetails", "id": channel_id, "alt": "json"}),
+            {"etag": f"c{c}", "items": [info]})
+        gravar_resposta(pasta, base + "channels?" + urlencode(
+            {"part": "id", "forHandle": f"canalreplay{c}", "alt": "json"}),
+            {"etag": f"h{c}", "items": [{"id": channel_id}]})
+
+        vids = [f"{channel_id[-6:]}v{i:05d}" for i in range(videos)]
+        publicados = [
+            time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(1_760_000_000 - i * 86_400))
+            for i in range(videos)
+        ]
+        for p in range(0, max(videos, 1), 50):
+            params = {"part": "contentDetails", "playlistId": uploads, "maxResults": "50", "alt": "json"}
+            if p:
+                params["pageToken"] = f"p{p}"
+            corpo = {
+                "etag": f"{uploads}-{p}",
+                "items": [
+                    {"contentDetails": {"videoId": v, "videoPublishedAt": d}}
+                    for v, d in zip(vids[p : p + 50], publicados[p : p + 50])
+                ],
+            }
+            if p + 50 < videos:
+                corpo["nextPageToken"] = f"p{p + 50}"
+            gravar_resposta(pasta, base + "playlistItems?" + urlencode(params), corpo)
+
+            lote = vids[p : p + 50]
+            if not lote:
+                continue
+            itens = []
+            for v, d in zip(lote, publicados[p : p + 50]):
+                titulo = " ".join(sorteio.choices(palavras, k=sorteio.randint(3, 8)))
+                curto = sorteio.random() < 0.3
+                itens.append({
+                    "id": v,
+                    "snippet": {"title": titulo + (" #shorts" if curto else ""), "publishedAt": d},
+                    "statistics": {"viewCount": str(int(sorteio.paretovariate(1.2) * 1000)),
+                                   "likeCount": str(sorteio.randint(0, 5000)),
+                                   "commentCount": str(sorteio.randint(0, 500))},
+                    "contentDetails": {"duration": f"PT{sorteio.randint(10, 59)}S" if curto
+                                       else f"PT{sorteio.randint(3, 40)}M{sorteio.randint(0, 59)}S"},
+                })
+            gravar_resposta(pasta, base + "videos?" + urlencode(
+                {"part": "snippet,statistics,contentDetails", "id": ",".join(lote),
+                 "maxResults": "50", "alt": "json"}),
+                {"etag": f"v{c}-{p}", "items": itens})
+    return ids
+
+
+# -------------------------------------------------------------------
+# Gravação (cliente real)
+# -------------------------------------------------------------------
+if httplib2 is not None:
+
+    class HttpGravador(httplib2.Http):
+        """Transporte do googleapiclient que grava cada GET 200 em `pasta`."""
+
+        def __init__(self, pasta: str = PASTA_PADRAO, **kwargs):
+            super().__init__(**kwargs)
+            self.pasta = pasta
+
+        def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+            resp, conteudo = super().request(uri, method, body, headers, *args, **kwargs)
+            if method == "GET" and resp.status == 200:
+                gravar_resposta(self.pasta, uri, json.loads(conteudo))
+            return resp, conteudo
+
+else:
+    HttpGravador = None
+
+
+# -------------------------------------------------------------------
+# Replay (servidor local)
+# -------------------------------------------------------------------
+def _corpo_erro(status: int, motivo: str, mensagem: str) -> bytes:
+    return json.dumps(
+        {
+            "error": {
+                "code": status,
+                "message": mensagem,
+                "errors": [{"reason": motivo, "domain": "youtube", "message": mensagem}],
+            }
+        }
+    ).encode("utf-8")
+
+
+def criar_servidor(
+    pasta: str = PASTA_PADRAO,
+    porta: int = 0,
+    latencia_ms: float = 0,
+    jitter_ms: float = 0,
+    taxa_erro: float = 0.0,
+    erros=(500, 503, 429),
+    semente: int | None = None,
+) -> ThreadingHTTPServer:
+    """
+    Servidor de replay (ainda parado; use `serve_forever` ou
+    `servir_em_segundo_plano`). `porta=0` escolhe uma porta livre. Com
+    `semente`, a sequência de latências e erros injetados é reprodutível.
+    Contadores em `servidor.estatisticas`.
+    """
+    sorteio = random.Random(semente)
+    trava = threading.Lock()
+    estatisticas = {"requisicoes": 0, "servidas": 0, "nao_modificadas": 0,
+                    "nao_gravadas": 0, "erros_injetados": 0}
+
+    def contar(chave):
+        with trava:
+            estatisticas[chave] += 1
+
+    class Replay(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _responder(self, status: int, corpo: bytes = b"", etag: str | None = None):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def do_GET(self):
+            contar("requisicoes")
+            with trava:
+                espera = max(0.0, latencia_ms + sorteio.uniform(-jitter_ms, jitter_ms)) / 1000
+                erro = sorteio.choice(erros) if erros and sorteio.random() < taxa_erro else None
+            if espera:
+                time.sleep(espera)
+
+            if erro is not None:
+                contar("erros_injetados")
+                motivo, mensagem = ERROS_INJETAVEIS.get(erro, ("backendError", "Injected error"))
+                return self._responder(erro, _corpo_erro(erro, motivo, mensagem))
+
+            gravado = ler_resposta(pasta, self.path)
+            if gravado is None:
+                contar("nao_gravadas")
+                return self._responder(
+                    404, _corpo_erro(404, "notRecorded", f"Sem gravação para {self.path}")
+                )
+            etag = gravado["corpo"].get("etag") if isinstance(gravado["corpo"], dict) else None
+            if etag and self.headers.get("If-None-Match") == etag:
+                contar("nao_modificadas")
+                return self._responder(304, etag=etag)
+            contar("servidas")
+            self._responder(
+                gravado["status"], json.dumps(gravado["corpo"]).encode("utf-8"), etag
+            )
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), Replay)
+    servidor.daemon_threads = True
+    servidor.estatisticas = estatisticas
+    return servidor
+
+
+def url_de(servidor: ThreadingHTTPServer) -> str:
+    host, porta = servidor.server_address[:2]
+    return f"http://{host}:{porta}/"
+
+
+def servir_em_segundo_plano(**opcoes) -> tuple[ThreadingHTTPServer, str]:
+    """Sobe o replay numa thread daemon; devolve `(servidor, url_base)`."""
+    servidor = criar_servidor(**opcoes)
+    threading.Thread(target=servidor.serve_forever, daemon=True, name="youtube-replay").start()
+    return servidor, url_de(servidor)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay local da YouTube Data API")
+    ap.add_argument("--pasta", default=PASTA_PADRAO)
+    ap.add_argument("--porta", type=int, default=8765)
+    ap.add_argument("--latencia-ms", type=float, default=0)
+    ap.add_argument("--jitter-ms", type=float, default=0)
+    ap.add_argument("--taxa-erro", type=float, default=0.0)
+    ap.add_argument("--erros", default="500,503,429", help="status a injetar (403 = quotaExceeded)")
+    ap.add_argument("--semente", type=int, default=None)
+    ap.add_argument("--gerar-cenario", metavar="CANAIS:VIDEOS",
+                    help="grava antes um catálogo sintético (ex.: 20:500)")
+    args = ap.parse_args()
+
+    if args.gerar_cenario:
+        n_canais, n_videos = (int(x) for x in args.gerar_cenario.split(":"))
+        ids = gerar_cenario(args.pasta, n_canais, n_videos, semente=args.semente or 0)
+        print(f"Cenário gravado: {len(ids)} canais (@canalreplay0.. / {ids[0]}..)")
+
+    servidor = criar_servidor(
+        pasta=args.pasta,
+        porta=args.porta,
+        latencia_ms=args.latencia_ms,
+        jitter_ms=args.jitter_ms,
+        taxa_erro=args.taxa_erro,
+        erros=tuple(int(e) for e in args.erros.split(",") if e.strip()),
+        semente=args.semente,
+    )
+    print(f"Replay da YouTube API em {url_de(servidor)} (gravações em {args.pasta})")
+    print(f"Use: PIPELINE_YOUTUBE_ENDPOINT={url_de(servidor)} streamlit run app.py")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()